@@ -0,0 +1,29 @@
+"""Add composite (user_id, id) index for keyset pagination
+
+Revision ID: a3f1c9d2e7b4
+Revises: 362ab3900083
+Create Date: 2026-10-18 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9d2e7b4'
+down_revision: Union[str, Sequence[str], None] = '362ab3900083'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_contacts_user_id_id', 'contacts', ['user_id', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
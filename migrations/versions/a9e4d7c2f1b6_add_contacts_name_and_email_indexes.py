@@ -0,0 +1,73 @@
+"""Add (user_id, last_name, first_name) and (user_id, email) contact indexes
+
+contacts is hash-partitioned and PostgreSQL cannot build an index on a
+partitioned table CONCURRENTLY. Each index is therefore created ON ONLY the
+parent (invalid until complete), built CONCURRENTLY on every partition and
+attached partition by partition, so no step blocks writes.
+
+Revision ID: a9e4d7c2f1b6
+Revises: f3c9a2b7d815
+Create Date: 2026-10-18 16:40:12.905371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4d7c2f1b6'
+down_revision: Union[str, Sequence[str], None] = 'f3c9a2b7d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'user_id_last_name_first_name': 'user_id, last_name, first_name',
+    'user_id_email': 'user_id, email',
+}
+
+
+def _partitions() -> list:
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'contacts'::regclass ORDER BY c.relname"
+        )
+    ).scalars().all()
+
+
+def _attached(index: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:index)"),
+        {'index': index},
+    ).first() is not None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = _partitions()
+    for name, columns in INDEXES.items():
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_contacts_{name} '
+            f'ON ONLY contacts ({columns})'
+        )
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            for partition in partitions:
+                op.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{partition}_{name} '
+                    f'ON {partition} ({columns})'
+                )
+                if not _attached(f'ix_{partition}_{name}'):
+                    op.execute(
+                        f'ALTER INDEX ix_contacts_{name} '
+                        f'ATTACH PARTITION ix_{partition}_{name}'
+                    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS ix_contacts_{name}')
@@ -0,0 +1,49 @@
+"""Add generated full-text and trigram search columns to contacts
+
+Revision ID: b7e24d019c5f
+Revises: a3f1c9d2e7b4
+Create Date: 2026-10-18 11:04:17.226905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e24d019c5f'
+down_revision: Union[str, Sequence[str], None] = 'a3f1c9d2e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TEXT = (
+    "lower(first_name || ' ' || last_name || ' ' || email || ' ' || phone_number)"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "ALTER TABLE contacts ADD COLUMN search_text text "
+        f"GENERATED ALWAYS AS ({SEARCH_TEXT}) STORED"
+    )
+    op.execute(
+        "ALTER TABLE contacts ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('simple', {SEARCH_TEXT})) STORED"
+    )
+    op.execute(
+        "CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)"
+    )
+    op.execute(
+        "CREATE INDEX ix_contacts_search_text_trgm ON contacts "
+        "USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_search_text_trgm', table_name='contacts')
+    op.drop_index('ix_contacts_search_vector', table_name='contacts')
+    op.drop_column('contacts', 'search_vector')
+    op.drop_column('contacts', 'search_text')
@@ -0,0 +1,40 @@
+"""Add indexed month-day birthday key to contacts
+
+Revision ID: c5d8e3a1f620
+Revises: b7e24d019c5f
+Create Date: 2026-10-18 12:21:09.814532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8e3a1f620'
+down_revision: Union[str, Sequence[str], None] = 'b7e24d019c5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('birthday_md', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE contacts SET birthday_md = "
+        "EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday)"
+    )
+    op.alter_column('contacts', 'birthday_md', nullable=False)
+    op.create_index(
+        'ix_contacts_user_id_birthday_md',
+        'contacts',
+        ['user_id', 'birthday_md'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_user_id_birthday_md', table_name='contacts')
+    op.drop_column('contacts', 'birthday_md')
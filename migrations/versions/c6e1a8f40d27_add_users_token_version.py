@@ -0,0 +1,31 @@
+"""Add token_version column to users
+
+Revision ID: c6e1a8f40d27
+Revises: a9e4d7c2f1b6
+Create Date: 2026-10-18 18:02:13.540271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e1a8f40d27'
+down_revision: Union[str, Sequence[str], None] = 'a9e4d7c2f1b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,111 @@
+"""Add hash-partitioned contacts shadow table kept in sync by a trigger
+
+First half of the online move of contacts to hash partitioning on user_id:
+
+1. this revision creates ``contacts_partitioned`` and a trigger that mirrors
+   every write on ``contacts`` into it;
+2. ``python -m scripts.backfill_contacts_partitions`` copies the existing
+   rows in small batches while the application keeps running;
+3. revision e8b3c6d05a14 copies whatever is still missing and swaps the
+   tables under a short lock.
+
+Revision ID: d2a7f4c81b39
+Revises: c5d8e3a1f620
+Create Date: 2026-10-18 14:02:51.377104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7f4c81b39'
+down_revision: Union[str, Sequence[str], None] = 'c5d8e3a1f620'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+COLUMNS = (
+    'id, first_name, last_name, email, phone_number, birthday, birthday_md, '
+    'additional_data, user_id'
+)
+NEW_COLUMNS = ', '.join(f'NEW.{column}' for column in COLUMNS.split(', '))
+SEARCH_TEXT = (
+    "lower(first_name || ' ' || last_name || ' ' || email || ' ' || phone_number)"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "CREATE TABLE contacts_partitioned ("
+        "id integer NOT NULL DEFAULT nextval('contacts_id_seq'), "
+        "first_name varchar NOT NULL, "
+        "last_name varchar NOT NULL, "
+        "email varchar NOT NULL, "
+        "phone_number varchar NOT NULL, "
+        "birthday date NOT NULL, "
+        "birthday_md integer NOT NULL, "
+        "additional_data varchar, "
+        "user_id integer NOT NULL REFERENCES users (id), "
+        f"search_text text GENERATED ALWAYS AS ({SEARCH_TEXT}) STORED, "
+        "search_vector tsvector GENERATED ALWAYS AS "
+        f"(to_tsvector('simple', {SEARCH_TEXT})) STORED, "
+        "CONSTRAINT contacts_partitioned_pkey PRIMARY KEY (id, user_id)"
+        ") PARTITION BY HASH (user_id)"
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE contacts_partitioned_p{remainder:02d} "
+            "PARTITION OF contacts_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    op.execute('CREATE INDEX ix_contacts_partitioned_id ON contacts_partitioned (id)')
+    op.execute(
+        'CREATE INDEX ix_contacts_partitioned_email ON contacts_partitioned (email)'
+    )
+    op.execute(
+        'CREATE INDEX ix_contacts_partitioned_user_id_id '
+        'ON contacts_partitioned (user_id, id)'
+    )
+    op.execute(
+        'CREATE INDEX ix_contacts_partitioned_user_id_birthday_md '
+        'ON contacts_partitioned (user_id, birthday_md)'
+    )
+    op.execute(
+        'CREATE INDEX ix_contacts_partitioned_search_vector '
+        'ON contacts_partitioned USING gin (search_vector)'
+    )
+    op.execute(
+        'CREATE INDEX ix_contacts_partitioned_search_text_trgm '
+        'ON contacts_partitioned USING gin (search_text gin_trgm_ops)'
+    )
+    op.execute(
+        "CREATE FUNCTION contacts_mirror_to_partitioned() RETURNS trigger AS $$\n"
+        "BEGIN\n"
+        "  IF TG_OP IN ('UPDATE', 'DELETE') THEN\n"
+        "    DELETE FROM contacts_partitioned\n"
+        "    WHERE id = OLD.id AND user_id = OLD.user_id;\n"
+        "  END IF;\n"
+        "  IF TG_OP IN ('INSERT', 'UPDATE') THEN\n"
+        f"    INSERT INTO contacts_partitioned ({COLUMNS})\n"
+        f"    VALUES ({NEW_COLUMNS})\n"
+        "    ON CONFLICT DO NOTHING;\n"
+        "  END IF;\n"
+        "  RETURN NULL;\n"
+        "END\n"
+        "$$ LANGUAGE plpgsql"
+    )
+    op.execute(
+        'CREATE TRIGGER contacts_mirror_to_partitioned '
+        'AFTER INSERT OR UPDATE OR DELETE ON contacts '
+        'FOR EACH ROW EXECUTE FUNCTION contacts_mirror_to_partitioned()'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER contacts_mirror_to_partitioned ON contacts')
+    op.execute('DROP FUNCTION contacts_mirror_to_partitioned()')
+    op.execute('DROP TABLE contacts_partitioned')
@@ -0,0 +1,129 @@
+"""Swap the hash-partitioned contacts table in
+
+Copies any rows the backfill has not reached yet (all of them when the
+backfill script was skipped, e.g. on a development database), then replaces
+``contacts`` with ``contacts_partitioned`` under an ACCESS EXCLUSIVE lock that
+is only held for the renames.
+
+The downgrade rebuilds a plain table with a full copy and is not online.
+
+Revision ID: e8b3c6d05a14
+Revises: d2a7f4c81b39
+Create Date: 2026-10-18 14:09:33.580216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3c6d05a14'
+down_revision: Union[str, Sequence[str], None] = 'd2a7f4c81b39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+COLUMNS = (
+    'id, first_name, last_name, email, phone_number, birthday, birthday_md, '
+    'additional_data, user_id'
+)
+SEARCH_TEXT = (
+    "lower(first_name || ' ' || last_name || ' ' || email || ' ' || phone_number)"
+)
+INDEXES = (
+    'id',
+    'email',
+    'user_id_id',
+    'user_id_birthday_md',
+    'search_vector',
+    'search_text_trgm',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        f"INSERT INTO contacts_partitioned ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM contacts c WHERE NOT EXISTS ("
+        "SELECT 1 FROM contacts_partitioned p "
+        "WHERE p.id = c.id AND p.user_id = c.user_id"
+        ") FOR SHARE OF c"
+    )
+    op.execute('LOCK TABLE contacts IN ACCESS EXCLUSIVE MODE')
+    op.execute('DROP TRIGGER contacts_mirror_to_partitioned ON contacts')
+    op.execute('DROP FUNCTION contacts_mirror_to_partitioned()')
+    op.execute('ALTER SEQUENCE contacts_id_seq OWNED BY contacts_partitioned.id')
+    op.execute('DROP TABLE contacts')
+    op.execute('ALTER TABLE contacts_partitioned RENAME TO contacts')
+    op.execute(
+        'ALTER TABLE contacts RENAME CONSTRAINT contacts_partitioned_pkey '
+        'TO contacts_pkey'
+    )
+    op.execute(
+        'ALTER TABLE contacts RENAME CONSTRAINT contacts_partitioned_user_id_fkey '
+        'TO contacts_user_id_fkey'
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f'ALTER TABLE contacts_partitioned_p{remainder:02d} '
+            f'RENAME TO contacts_p{remainder:02d}'
+        )
+    for index in INDEXES:
+        op.execute(
+            f'ALTER INDEX ix_contacts_partitioned_{index} RENAME TO ix_contacts_{index}'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "CREATE TABLE contacts_unpartitioned ("
+        "id integer NOT NULL DEFAULT nextval('contacts_id_seq') PRIMARY KEY, "
+        "first_name varchar NOT NULL, "
+        "last_name varchar NOT NULL, "
+        "email varchar NOT NULL, "
+        "phone_number varchar NOT NULL, "
+        "birthday date NOT NULL, "
+        "birthday_md integer NOT NULL, "
+        "additional_data varchar, "
+        "user_id integer NOT NULL REFERENCES users (id), "
+        f"search_text text GENERATED ALWAYS AS ({SEARCH_TEXT}) STORED, "
+        "search_vector tsvector GENERATED ALWAYS AS "
+        f"(to_tsvector('simple', {SEARCH_TEXT})) STORED"
+        ")"
+    )
+    op.execute('LOCK TABLE contacts IN EXCLUSIVE MODE')
+    op.execute(
+        f"INSERT INTO contacts_unpartitioned ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM contacts"
+    )
+    op.execute('ALTER SEQUENCE contacts_id_seq OWNED BY contacts_unpartitioned.id')
+    op.execute('DROP TABLE contacts')
+    op.execute('ALTER TABLE contacts_unpartitioned RENAME TO contacts')
+    op.execute(
+        'ALTER TABLE contacts RENAME CONSTRAINT contacts_unpartitioned_pkey '
+        'TO contacts_pkey'
+    )
+    op.execute(
+        'ALTER TABLE contacts RENAME CONSTRAINT contacts_unpartitioned_user_id_fkey '
+        'TO contacts_user_id_fkey'
+    )
+    op.create_index('ix_contacts_id', 'contacts', ['id'], unique=False)
+    op.create_index('ix_contacts_email', 'contacts', ['email'], unique=False)
+    op.create_index(
+        'ix_contacts_user_id_id', 'contacts', ['user_id', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_contacts_user_id_birthday_md',
+        'contacts',
+        ['user_id', 'birthday_md'],
+        unique=False,
+    )
+    op.execute(
+        "CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)"
+    )
+    op.execute(
+        "CREATE INDEX ix_contacts_search_text_trgm ON contacts "
+        "USING gin (search_text gin_trgm_ops)"
+    )
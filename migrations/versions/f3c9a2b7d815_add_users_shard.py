@@ -0,0 +1,31 @@
+"""Add shard column to users
+
+Revision ID: f3c9a2b7d815
+Revises: e8b3c6d05a14
+Create Date: 2026-10-18 15:26:40.118923
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9a2b7d815'
+down_revision: Union[str, Sequence[str], None] = 'e8b3c6d05a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('shard', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'shard')
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Copies existing contacts into the hash-partitioned shadow table online.
+
+Run after migration d2a7f4c81b39 and before e8b3c6d05a14. The trigger from
+d2a7f4c81b39 already mirrors new writes, so this only walks the rows that
+existed before it, in id ranges of --batch-size rows, one short transaction
+per batch. Rows are read FOR SHARE, so a row deleted or updated while its
+batch runs is never copied in a stale version. Safe to interrupt and rerun:
+--start-id resumes, and rows already present are skipped.
+
+Usage:
+    python -m scripts.backfill_contacts_partitions [--batch-size 10000] [--pause 0.05]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import text
+
+from src.database.db import engine
+
+COLUMNS = (
+    "id, first_name, last_name, email, phone_number, birthday, birthday_md, "
+    "additional_data, user_id"
+)
+
+COPY_BATCH = text(
+    f"INSERT INTO contacts_partitioned ({COLUMNS}) "
+    f"SELECT {COLUMNS} FROM contacts "
+    "WHERE id > :start AND id <= :stop "
+    "FOR SHARE "
+    "ON CONFLICT DO NOTHING"
+)
+
+
+async def main(batch_size: int, pause: float, start_id: int) -> int:
+    async with engine.connect() as conn:
+        max_id = (
+            await conn.execute(text("SELECT coalesce(max(id), 0) FROM contacts"))
+        ).scalar()
+        await conn.commit()
+
+    started = time.perf_counter()
+    copied = 0
+    position = start_id
+    while position < max_id:
+        stop = min(position + batch_size, max_id)
+        async with engine.begin() as conn:
+            result = await conn.execute(COPY_BATCH, {"start": position, "stop": stop})
+        copied += result.rowcount
+        position = stop
+        elapsed = time.perf_counter() - started
+        print(
+            f"\rid {position}/{max_id}, {copied} rows copied "
+            f"({copied / max(elapsed, 1e-9):.0f} rows/s)",
+            end="",
+            file=sys.stderr,
+        )
+        if pause:
+            await asyncio.sleep(pause)
+
+    print(file=sys.stderr)
+    print(f"Copied {copied} contacts up to id {max_id}")
+    await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--pause", type=float, default=0.05, help="seconds to sleep between batches"
+    )
+    parser.add_argument("--start-id", type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.batch_size, args.pause, args.start_id)))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the cost of the get_current_user dependency per request.
+
+A token is authorized repeatedly, as a client reusing one bearer token
+would, with the verified-token cache disabled ("before") and enabled
+("after"). The user lookup is served by the in-process user cache and the
+stateless mode needs none, so the numbers show the CPU spent in the
+dependency itself: JWT verification and claim handling.
+
+Usage:
+    python -m scripts.bench_auth [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from unittest.mock import patch
+
+from src.database.db import user_cache
+from src.database.models import Role, User
+from src.services import auth
+from src.services.base import settings
+from src.services.cache import CachedUser, TTLCache
+
+USER = User(
+    id=1,
+    email="bench-auth@example.com",
+    hashed_password="x",
+    is_verified=True,
+    roles=Role.user,
+    shard=0,
+    token_version=0,
+)
+
+
+async def per_request(token: str, requests: int) -> float:
+    await auth.auth_service.get_current_user(token, None)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await auth.auth_service.get_current_user(token, None)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main(requests: int) -> int:
+    user_cache.set(USER.email, CachedUser.from_dict(USER.to_dict()), ttl=3600)
+    for mode, stateless in (("lookup", False), ("stateless", True)):
+        with patch.object(settings, "AUTH_STATELESS", stateless):
+            token = await auth.auth_service.create_user_access_token(USER)
+            with patch.object(
+                auth, "access_token_cache", TTLCache("bench_disabled", 0, 0)
+            ):
+                before = await per_request(token, requests)
+            after = await per_request(token, requests)
+        print(
+            f"{mode:<10} before {before:7.1f} us/request  "
+            f"after {after:7.1f} us/request  ({before / after:.1f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.requests)))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the contact list read path before and after the Core rewrite.
+
+The "before" path reproduces the previous ORM read (``select(Contact)``,
+identity map, then ``ContactResponse`` validation with from_attributes and
+JSON encoding); the "after" path is the repository's Core read plus
+`render_json`. Both produce the same response body. Each path is timed for
+rows/second, then run once more under tracemalloc to report the peak
+memory allocated while serving one request.
+
+Usage:
+    python -m scripts.bench_contact_reads [DATABASE_URL] [--contacts 5000] [--page 100]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.db import Base
+from src.database.models import Contact, User, birthday_key
+from src.repository import contacts as repository
+from src.schemas.schemas import ContactResponse
+from src.services.export import render_json
+
+ROUNDS = 20
+
+contact_list = TypeAdapter(List[ContactResponse])
+
+
+async def legacy_page(db, user, limit):
+    result = await db.execute(
+        select(Contact)
+        .filter(Contact.user_id == user.id)
+        .order_by(Contact.id)
+        .limit(limit)
+    )
+    contacts = contact_list.validate_python(
+        result.scalars().all(), from_attributes=True
+    )
+    return contact_list.dump_json(contacts)
+
+
+async def core_page(db, user, limit):
+    rows = await repository.get_contacts(db, user, 0, limit)
+    return render_json(rows).encode()
+
+
+async def seed(session_maker, contacts: int) -> User:
+    async with session_maker() as db:
+        user = User(email="bench-reads@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        rows = []
+        for n in range(contacts):
+            birthday = date(1970, 1, 1) + timedelta(days=n % 15000)
+            rows.append(
+                {
+                    "first_name": f"First{n}",
+                    "last_name": f"Last{n % 97}",
+                    "email": f"contact{n}@example.com",
+                    "phone_number": f"+38050{n:07d}",
+                    "birthday": birthday,
+                    "birthday_md": birthday_key(birthday),
+                    "additional_data": "note" if n % 3 else None,
+                    "user_id": user.id,
+                }
+            )
+        await db.execute(insert(Contact), rows)
+        await db.commit()
+        return user
+
+
+async def run(label, session_maker, user, page, read) -> bytes:
+    async with session_maker() as db:
+        body = await read(db, user, page)  # warm up the statement cache
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        async with session_maker() as db:
+            await read(db, user, page)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    async with session_maker() as db:
+        await read(db, user, page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<7} {ROUNDS * page / elapsed:>10.0f} rows/s  "
+        f"{elapsed / ROUNDS * 1000:7.2f} ms/request  "
+        f"{peak / 1024:8.1f} KiB allocated at peak per request"
+    )
+    return body
+
+
+async def main(database_url: str, contacts: int, page: int) -> int:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    user = await seed(session_maker, contacts)
+
+    print(f"{contacts} contacts, {page} per page, {ROUNDS} requests per path")
+    before = await run("before", session_maker, user, page, legacy_page)
+    after = await run("after", session_maker, user, page, core_page)
+    await engine.dispose()
+
+    if contact_list.validate_json(before) != contact_list.validate_json(after):
+        print("The two paths returned different contacts", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "database_url", nargs="?", default="sqlite+aiosqlite:///:memory:"
+    )
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.database_url, args.contacts, args.page)))
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Counts Redis round trips per /api/users/me request before and after batching.
+
+The "before" route uses fastapi_limiter's RateLimiter, which runs its check
+on its own, followed by the auth lookups; the "after" route uses
+BatchedRateLimiter, which pipelines the check with those lookups. Both
+serve the real handler with the user record in Redis, and with a read
+replica configured so the read-your-writes marker is consulted as well.
+"cold" requests land on a worker whose in-process user cache has not seen
+the user yet; "warm" ones are served by a worker that has.
+
+Usage:
+    python -m scripts.bench_redis_rtts [REDIS_URL] [--requests 500]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+from fastapi import Depends, FastAPI
+from fastapi_limiter import FastAPILimiter
+from fastapi_limiter.depends import RateLimiter
+from httpx import ASGITransport, AsyncClient
+from redis.asyncio import StrictRedis
+from redis.asyncio.connection import AbstractConnection
+
+from src.database import db
+from src.database.models import Role, User
+from src.routers import users
+from src.services.auth import auth_service
+from src.services.redis_batch import BatchedRateLimiter
+
+USER = User(
+    id=1,
+    email="bench-rtts@example.com",
+    is_verified=True,
+    roles=Role.user,
+    shard=0,
+    token_version=0,
+)
+LIMIT = 10**9
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.get(
+        "/before",
+        dependencies=[
+            Depends(users.allowed_get),
+            Depends(RateLimiter(times=LIMIT, seconds=60)),
+        ],
+    )(users.read_users_me)
+    app.get(
+        "/after",
+        dependencies=[
+            Depends(BatchedRateLimiter(times=LIMIT, seconds=60)),
+            Depends(users.allowed_get),
+        ],
+    )(users.read_users_me)
+
+    async def fake_db():
+        yield AsyncMock()
+
+    app.dependency_overrides[db.get_db] = fake_db
+    return app
+
+
+async def run(client, path, token, requests, cold, round_trips) -> str:
+    started_trips = round_trips[0]
+    started = time.perf_counter()
+    for _ in range(requests):
+        if cold:
+            db.user_cache.clear()
+        response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+        response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    trips = (round_trips[0] - started_trips) / requests
+    return f"{trips:4.1f} RTTs/request  {elapsed / requests * 1000:6.2f} ms/request"
+
+
+async def main(redis_url: str, requests: int) -> int:
+    redis = StrictRedis.from_url(redis_url, decode_responses=True)
+    await redis.set(
+        f"get_user_from_cache:{USER.email}", json.dumps(USER.to_dict()), ex=600
+    )
+    await FastAPILimiter.init(redis)
+    token = await auth_service.create_user_access_token(USER)
+
+    round_trips = [0]
+    send = AbstractConnection.send_packed_command
+
+    async def counting_send(self, command, check_health=True):
+        round_trips[0] += 1
+        return await send(self, command, check_health)
+
+    with (
+        patch.object(db, "rc", redis),
+        patch.object(db, "replica_engine", object()),
+        patch.object(AbstractConnection, "send_packed_command", counting_send),
+    ):
+        async with AsyncClient(
+            transport=ASGITransport(app=build_app()), base_url="http://bench"
+        ) as client:
+            for cold in (True, False):
+                for path in ("/before", "/after"):
+                    await run(client, path, token, 5, cold, round_trips)
+                    result = await run(client, path, token, requests, cold, round_trips)
+                    label = f"{'cold' if cold else 'warm'} {path[1:]}"
+                    print(f"{label:<12} {result}")
+
+    await redis.delete(f"get_user_from_cache:{USER.email}")
+    await FastAPILimiter.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("redis_url", nargs="?", default="redis://localhost:6379/15")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.redis_url, args.requests)))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Counts database round trips per contact write, before and after RETURNING.
+
+The "before" functions reproduce the previous ORM write path
+(INSERT + refresh, SELECT + UPDATE + refresh, SELECT + DELETE). Every
+statement sent to the driver is counted; COMMIT is the same in both paths
+and is not included.
+
+Usage:
+    python -m scripts.bench_write_roundtrips [DATABASE_URL]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.db import Base
+from src.database.models import Contact, User
+from src.repository import contacts as repository
+from src.schemas.schemas import ContactCreate, ContactUpdate
+
+ITERATIONS = 200
+
+
+async def legacy_create(db, contact, user):
+    db_contact = Contact(**contact.model_dump(), user_id=user.id)
+    db.add(db_contact)
+    await db.commit()
+    await db.refresh(db_contact)
+    return db_contact
+
+
+async def legacy_update(db, contact_id, contact, user):
+    result = await db.execute(
+        select(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id)
+    )
+    db_contact = result.scalars().first()
+    for key, value in contact.model_dump(exclude_unset=True).items():
+        setattr(db_contact, key, value)
+    await db.commit()
+    await db.refresh(db_contact)
+    return db_contact
+
+
+async def legacy_delete(db, contact_id, user):
+    result = await db.execute(
+        select(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id)
+    )
+    db_contact = result.scalars().first()
+    await db.delete(db_contact)
+    await db.commit()
+    return db_contact
+
+
+async def run(label, session_maker, user, counter, create, update, delete):
+    new_contact = ContactCreate(
+        first_name="Bench",
+        last_name="Mark",
+        email="bench@example.com",
+        phone_number="+380500000000",
+        birthday=date(1990, 5, 17),
+    )
+    change = ContactUpdate(first_name="Changed")
+    totals = {"create": 0, "update": 0, "delete": 0}
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        async with session_maker() as db:
+            counter[0] = 0
+            contact = await create(db, new_contact, user)
+            totals["create"] += counter[0]
+        async with session_maker() as db:
+            counter[0] = 0
+            await update(db, contact.id, change, user)
+            totals["update"] += counter[0]
+        async with session_maker() as db:
+            counter[0] = 0
+            await delete(db, contact.id, user)
+            totals["delete"] += counter[0]
+    elapsed = time.perf_counter() - started
+    per_op = ", ".join(f"{op}={n / ITERATIONS:g}" for op, n in totals.items())
+    print(f"{label:<7} round trips per op: {per_op}  ({elapsed:.2f}s total)")
+
+
+async def main(database_url: str):
+    engine = create_async_engine(database_url)
+    counter = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*args):
+        counter[0] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_maker() as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+
+    await run(
+        "before",
+        session_maker,
+        user,
+        counter,
+        legacy_create,
+        legacy_update,
+        legacy_delete,
+    )
+    await run(
+        "after",
+        session_maker,
+        user,
+        counter,
+        repository.create_contact,
+        repository.update_contact,
+        repository.delete_contact,
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite+aiosqlite:///:memory:"
+    asyncio.run(main(url))
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Runs EXPLAIN (ANALYZE, BUFFERS) on every read query of the repositories.
+
+Seeds a PostgreSQL database with --users users of --contacts contacts each
+(once; the seed is reused on later runs), runs each repository read for one
+seeded user, captures the SQL it sends and explains it with the same
+parameters. The report lists execution time, shared buffers hit/read and
+the scans used. The exit status is 1 when a query sequentially scans
+contacts, so a lost index shows up as a failed run.
+
+Usage:
+    python -m scripts.explain_queries [DATABASE_URL] [--users 200] [--contacts 500]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.database.db import Base
+from src.database.models import Contact, User, birthday_key
+from src.repository import contacts as repository
+from src.repository.search import search_contacts
+from src.repository.users import get_user_by_email
+from src.services.base import settings
+
+SEED_DOMAIN = "explain.example.com"
+SEED_BATCH = 5000
+
+
+async def seed(db: AsyncSession, users: int, contacts: int) -> None:
+    seeded = await db.scalar(
+        select(func.count())
+        .select_from(User)
+        .where(User.email.like(f"%@{SEED_DOMAIN}"))
+    )
+    if seeded >= users:
+        return
+    for n in range(seeded, users):
+        user_id = await db.scalar(
+            insert(User)
+            .values(email=f"user{n}@{SEED_DOMAIN}", hashed_password="x")
+            .returning(User.id)
+        )
+        rows = []
+        for m in range(contacts):
+            birthday = date(1970, 1, 1) + timedelta(days=(n * contacts + m) % 15000)
+            rows.append(
+                {
+                    "first_name": f"First{m}",
+                    "last_name": f"Last{m % 97}",
+                    "email": f"contact{m}.user{n}@{SEED_DOMAIN}",
+                    "phone_number": f"+380{n:04d}{m:05d}",
+                    "birthday": birthday,
+                    "birthday_md": birthday_key(birthday),
+                    "user_id": user_id,
+                }
+            )
+        for start in range(0, len(rows), SEED_BATCH):
+            await db.execute(insert(Contact), rows[start : start + SEED_BATCH])
+        await db.commit()
+    await db.execute(text("ANALYZE contacts"))
+    await db.execute(text("ANALYZE users"))
+    await db.commit()
+
+
+def repository_queries(user, contact_ids):
+    """The repository reads to explain, as (label, coroutine factory) pairs."""
+    first_page_cursor = repository.encode_cursor(
+        {"id": contact_ids[len(contact_ids) // 2]}
+    )
+    return [
+        ("get_user_by_email", lambda db: get_user_by_email(user.email, db)),
+        ("get_contacts", lambda db: repository.get_contacts(db, user, 40, 20)),
+        ("get_contacts_page", lambda db: repository.get_contacts_page(db, user, 20)),
+        (
+            "get_contacts_page (cursor)",
+            lambda db: repository.get_contacts_page(db, user, 20, first_page_cursor),
+        ),
+        ("get_contact", lambda db: repository.get_contact(db, contact_ids[0], user)),
+        (
+            "get_contacts_by_ids",
+            lambda db: repository.get_contacts_by_ids(db, contact_ids[:50], user),
+        ),
+        ("search_contacts", lambda db: search_contacts(db, "last4", user)),
+        (
+            "get_upcoming_birthdays",
+            lambda db: repository.get_upcoming_birthdays(
+                db, user, 30, date(2025, 12, 20)
+            ),
+        ),
+        ("stream_contacts", lambda db: drain(repository.stream_contacts(db, user))),
+    ]
+
+
+async def drain(partitions) -> None:
+    async for _ in partitions:
+        pass
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def explain(db: AsyncSession, statement: str, parameters) -> dict:
+    conn = await db.connection()
+    rows = await conn.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+    )
+    plan = rows.scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]
+
+
+async def main(database_url: str, users: int, contacts: int) -> int:
+    engine = create_async_engine(database_url)
+    if engine.dialect.name != "postgresql":
+        print("EXPLAIN (ANALYZE, BUFFERS) needs PostgreSQL", file=sys.stderr)
+        return 2
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    captured = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    regressions = 0
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await seed(db, users, contacts)
+        user = await get_user_by_email(f"user{users // 2}@{SEED_DOMAIN}", db)
+        contact_ids = (
+            await db.scalars(
+                select(Contact.id)
+                .where(Contact.user_id == user.id)
+                .order_by(Contact.id)
+            )
+        ).all()
+
+        for label, run in repository_queries(user, contact_ids):
+            captured.clear()
+            await run(db)
+            statements = list(captured)
+            for statement, parameters in statements:
+                report = await explain(db, statement, parameters)
+                nodes = list(plan_nodes(report["Plan"]))
+                scans = sorted(
+                    {
+                        f"{node['Node Type']} on {node['Relation Name']}"
+                        + (
+                            f" using {node['Index Name']}"
+                            if "Index Name" in node
+                            else ""
+                        )
+                        for node in nodes
+                        if "Relation Name" in node
+                    }
+                )
+                seq_scans = [
+                    node
+                    for node in nodes
+                    if node["Node Type"] == "Seq Scan"
+                    and node["Relation Name"].startswith("contacts")
+                ]
+                regressions += bool(seq_scans)
+                root = report["Plan"]
+                print(
+                    f"{'SEQ SCAN ' if seq_scans else ''}{label}: "
+                    f"{report['Execution Time']:.2f}ms, "
+                    f"buffers hit={root.get('Shared Hit Blocks', 0)} "
+                    f"read={root.get('Shared Read Blocks', 0)}"
+                )
+                for scan in scans:
+                    print(f"    {scan}")
+            await db.rollback()
+
+    await engine.dispose()
+    if regressions:
+        print(f"{regressions} queries scan contacts sequentially", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("database_url", nargs="?", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--contacts", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.database_url, args.users, args.contacts)))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk-imports contacts from a CSV or vCard file for an existing user.
+
+The user is looked up in the home database and the contacts are loaded
+into the shard that holds the user's contacts, unless the user is being
+moved to another shard. The user's cached contact reads are invalidated
+once at the end.
+
+Usage:
+    python -m scripts.import_contacts contacts.csv --user owner@example.com
+    python -m scripts.import_contacts contacts.vcf --user owner@example.com --format vcard
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from src.database.shards import HOME_SHARD, shard_map, shard_of
+from src.repository.users import get_user_by_email
+from src.services.importer import import_contacts
+from src.services.result_cache import contacts_cache
+from src.services.revocation import is_fenced
+
+
+async def main(path: str, email: str, import_format: str, chunk_size: int) -> int:
+    started = time.perf_counter()
+
+    def progress(report):
+        elapsed = time.perf_counter() - started
+        print(
+            f"\r{report.processed} rows, {report.imported} imported, "
+            f"{report.failed} failed ({report.processed / max(elapsed, 1e-9):.0f} rows/s)",
+            end="",
+            file=sys.stderr,
+        )
+
+    async with shard_map.session(HOME_SHARD) as directory:
+        user = await get_user_by_email(email, directory)
+    if user is None:
+        print(f"User {email} not found", file=sys.stderr)
+        return 1
+    if await is_fenced(user.id):
+        print(f"User {email} is being moved, retry later", file=sys.stderr)
+        return 1
+
+    async with shard_map.session(shard_of(user)) as db:
+        with open(path, encoding="utf-8-sig", newline="") as lines:
+            report = await import_contacts(
+                db, lines, import_format, user, chunk_size, progress
+            )
+    if report.imported:
+        await contacts_cache.bump(user.id)
+
+    print(file=sys.stderr)
+    for error in report.errors:
+        print(f"row {error.row}: {error.detail}", file=sys.stderr)
+    print(
+        f"Imported {report.imported} of {report.processed} rows "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return 0 if report.failed == 0 else 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="CSV or vCard file to import")
+    parser.add_argument("--user", required=True, help="email of the owning user")
+    parser.add_argument("--format", choices=["csv", "vcard"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.path, args.user, args.format, args.chunk_size)))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Moves a user's contacts to another database shard.
+
+The target shard must be listed in DATABASE_SHARD_URLS (shard 0 is
+DATABASE_URL). The command waits MOVE_GRACE_SECONDS (or --grace) between
+switching the user over and removing the source rows. With AUTH_STATELESS,
+moving signs the user out: their access tokens carry the shard and are
+revoked.
+
+Usage:
+    python -m scripts.move_user_shard owner@example.com 2
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from src.database.db import async_session
+from src.database.shards import MOVE_GRACE_SECONDS, init_shards, move_user
+from src.repository.users import get_user_by_email
+
+
+async def main(email: str, target: int, grace: float) -> int:
+    async with async_session() as db:
+        user = await get_user_by_email(email, db)
+    if user is None:
+        print(f"User {email} not found", file=sys.stderr)
+        return 1
+
+    await init_shards()
+    started = time.perf_counter()
+    try:
+        moved = await move_user(user.id, target, grace)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(
+        f"Moved {moved} contacts of {email} to shard {target} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("email", help="email of the user to move")
+    parser.add_argument("shard", type=int, help="destination shard id")
+    parser.add_argument(
+        "--grace",
+        type=float,
+        default=MOVE_GRACE_SECONDS,
+        help="seconds to wait before deleting the source rows",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.email, args.shard, args.grace)))
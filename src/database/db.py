@@ -1,23 +1,190 @@
+from contextvars import ContextVar
 from redis.asyncio import StrictRedis
 from fastapi import HTTPException
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from src.database.query_log import install_query_log
+from src.database.routing import ReplicaMonitor, RoutingSession
 from src.services.base import settings
+from src.services.cache import CACHE_REQUESTS, CachedUser, TTLCache
+from typing import List, Optional, Tuple
 
+import asyncio
 import logging
 import json
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
 rc = StrictRedis(host="redis", port=6379, decode_responses=True)
 logger.info(f"rc in db.py: {rc}")
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+# Pub/sub channel on which workers share invalidations of per-process state;
+# see src.services.revocation.RevocationListener.
+INVALIDATION_CHANNEL = "token_revocations"
+
+# Redis replies read ahead for the current request, keyed by (command, key);
+# see src.services.redis_batch.
+redis_prefetch: ContextVar[Optional[dict]] = ContextVar("redis_prefetch", default=None)
+
+
+async def redis_read(command: str, key: str):
+    """
+    Runs a read-only Redis command, unless the request already read it ahead.
+
+    Args:
+        command: The command, ``"get"`` or ``"exists"``.
+        key: The key to read.
+
+    Returns:
+        The prefetched or freshly read reply.
+    """
+    prefetched = redis_prefetch.get()
+    if prefetched is not None and (command, key) in prefetched:
+        return prefetched[(command, key)]
+    return await getattr(rc, command)(key)
+
+
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool"
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured number of pooled connections")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections opened beyond the pool size")
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting to check out a connection"
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waits."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def pgbouncer_connect_args() -> dict:
+    """
+    Returns asyncpg connection arguments that are safe behind PgBouncer.
+
+    In transaction pooling mode consecutive transactions of one client can
+    land on different server connections, so neither asyncpg nor SQLAlchemy
+    may cache prepared statements, and every statement that still gets
+    prepared needs a globally unique name.
+    """
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": _unique_statement_name,
+    }
+
+
+def pool_options(
+    database_url: str,
+    pgbouncer: bool = settings.DB_PGBOUNCER_MODE,
+    statement_timeout_ms: int = settings.DB_STATEMENT_TIMEOUT_MS,
+) -> dict:
+    """
+    Builds the engine pool arguments from settings.
+
+    The default statement timeout is set once per connection, so requests
+    only pay for ``SET LOCAL`` on routes that override it. PgBouncer does
+    not pass connection settings on to the server in transaction pooling
+    mode; behind it, set the default on the database role instead
+    (``ALTER ROLE ... SET statement_timeout``).
+
+    Args:
+        database_url: The database URL the engine is created for.
+        pgbouncer: Whether the engine connects through PgBouncer in
+            transaction pooling mode.
+        statement_timeout_ms: The default statement timeout; 0 disables it.
+
+    Returns:
+        Keyword arguments for `create_async_engine`. SQLite manages its own
+        pool, so only pre-ping is applied to it.
+    """
+    if database_url.startswith("sqlite"):
+        return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if pgbouncer:
+        options["connect_args"] = pgbouncer_connect_args()
+    elif statement_timeout_ms:
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(statement_timeout_ms)}
+        }
+    return options
+
+
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=settings.DB_ECHO,
+    **pool_options(settings.DATABASE_URL),
+)
+install_query_log(
+    engine.sync_engine,
+    settings.SLOW_QUERY_THRESHOLD_MS,
+    settings.SLOW_QUERY_SAMPLE_RATE,
+)
+
+replica_engine = None
+replica_monitor = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL,
+        echo=settings.DB_ECHO,
+        **pool_options(settings.DATABASE_REPLICA_URL),
+    )
+    install_query_log(
+        replica_engine.sync_engine,
+        settings.SLOW_QUERY_THRESHOLD_MS,
+        settings.SLOW_QUERY_SAMPLE_RATE,
+    )
+    replica_monitor = ReplicaMonitor(
+        replica_engine,
+        settings.REPLICA_MAX_LAG_SECONDS,
+        settings.REPLICA_LAG_CHECK_SECONDS,
+    )
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _count_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
 
 async_session = sessionmaker(
-    bind=engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    primary=engine.sync_engine,
+    replica=replica_engine.sync_engine if replica_engine else None,
+    monitor=replica_monitor,
     autocommit=False,
     expire_on_commit=False,
     autoflush=False,
@@ -25,6 +192,13 @@ async_session = sessionmaker(
 
 Base = declarative_base()
 
+# Process-local L1 in front of Redis. Invalidations reach every worker over
+# INVALIDATION_CHANNEL; the TTL bounds how long a worker that missed one
+# (while its listener reconnects) can serve a stale user.
+user_cache = TTLCache(
+    "user", settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS
+)
+
 
 async def get_user_from_db(email: str, db: AsyncSession) -> dict:
     """
@@ -49,10 +223,13 @@ async def get_user_from_db(email: str, db: AsyncSession) -> dict:
     return user.to_dict()
 
 
-async def get_user_from_cache(email: str, db: AsyncSession) -> dict:
+async def get_user_from_cache(email: str, db: AsyncSession) -> CachedUser:
     """
     Fetches a user by email address from the cache.
 
+    Lookups go through the in-process `user_cache` first, then Redis, and
+    only then the database; each layer refills the ones above it.
+
     Args:
         email: The email address of the user to find.
         db: The database session to use.
@@ -64,20 +241,176 @@ async def get_user_from_cache(email: str, db: AsyncSession) -> dict:
     Raises:
         HTTPException: If the user is not found in the cache or database.
     """
-    cache_key = f"get_user_from_cache:{email}"
-    cached_user = await rc.get(cache_key)
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
+    cache_key = _user_key(email)
+    cached_user = await redis_read("get", cache_key)
     if cached_user:
         try:
-            return json.loads(cached_user)
+            user = CachedUser.from_dict(json.loads(cached_user))
+            CACHE_REQUESTS.labels("user_redis", "hit").inc()
+            user_cache.set(email, user)
+            return user
         except json.JSONDecodeError:
             logger.warning(f"Invalid cached data for key {cache_key}")
+    CACHE_REQUESTS.labels("user_redis", "miss").inc()
     user_dict = await get_user_from_db(email, db)
+    # End the read transaction right away so the pooled connection is not
+    # held for the rest of the request by handlers that never issue SQL.
+    await db.commit()
     try:
         await rc.setex(cache_key, 3600, json.dumps(user_dict))
     except Exception as e:
         logger.error(f"Failed to cache user {email}: {str(e)}")
 
-    return user_dict
+    user = CachedUser.from_dict(user_dict)
+    user_cache.set(email, user)
+    return user
+
+
+async def invalidate_user_cache(email: str) -> None:
+    """
+    Drops a user from the Redis cache and the in-process cache of every worker.
+
+    Call after any change to a cached field (role, verification, avatar,
+    shard). The Redis entry is deleted and the invalidation is published in
+    the same round trip.
+
+    Args:
+        email: The email address of the user to invalidate.
+    """
+    user_cache.invalidate(email)
+    prefetched = redis_prefetch.get()
+    if prefetched is not None:
+        prefetched.pop(("get", _user_key(email)), None)
+    try:
+        async with rc.pipeline(transaction=False) as pipe:
+            pipe.delete(_user_key(email))
+            pipe.publish(INVALIDATION_CHANNEL, f"user {email}")
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to invalidate cached user {email}: {str(e)}")
+
+
+def _user_key(email: str) -> str:
+    return f"get_user_from_cache:{email}"
+
+
+def _sticky_key(user_id) -> str:
+    return f"db_primary_sticky:{user_id}"
+
+
+def user_reads(email: str, user_id: Optional[int] = None) -> List[Tuple[str, str]]:
+    """
+    Lists the Redis reads authenticating a user will make.
+
+    Used to read them ahead in one round trip. Nothing is listed for data
+    the in-process caches already hold.
+
+    Args:
+        email: The email address of the user.
+        user_id: The id of the user, if known without a lookup.
+
+    Returns:
+        ``(command, key)`` pairs for `redis_read`.
+    """
+    reads = []
+    cached = user_cache.peek(email)
+    if cached is None:
+        reads.append(("get", _user_key(email)))
+    else:
+        user_id = cached.id
+    if replica_engine is not None and user_id is not None:
+        reads.append(("exists", _sticky_key(user_id)))
+    return reads
+
+
+async def pin_reads_for_user(db: AsyncSession, user_id: int) -> None:
+    """
+    Ties a session to the user it serves for read-your-writes routing.
+
+    If the user wrote within the last `REPLICA_STICKY_SECONDS`, the session's
+    reads go to the primary so the user never sees a replica that has not
+    caught up with their own change yet.
+
+    Args:
+        db: The request's database session.
+        user_id: The id of the authenticated user.
+    """
+    if replica_engine is None:
+        return
+    db.info["user_id"] = user_id
+    try:
+        if await redis_read("exists", _sticky_key(user_id)):
+            db.info["use_primary"] = True
+    except Exception as e:
+        logger.error(f"Failed to read primary stickiness: {str(e)}")
+        db.info["use_primary"] = True
+
+
+async def remember_writes(db: AsyncSession) -> None:
+    """
+    Starts the read-your-writes window for a user whose session wrote.
+
+    Args:
+        db: The request's database session.
+    """
+    user_id = db.info.get("user_id")
+    if replica_engine is None or user_id is None or not db.info.get("wrote"):
+        return
+    try:
+        await rc.setex(_sticky_key(user_id), settings.REPLICA_STICKY_SECONDS, 1)
+    except Exception as e:
+        logger.error(f"Failed to record primary stickiness: {str(e)}")
+
+
+async def prewarm_pool(connections: int = settings.DB_POOL_PREWARM) -> int:
+    """
+    Opens pooled connections ahead of traffic.
+
+    The connections are opened concurrently and then returned to the pool,
+    so the first requests after a deploy do not pay the connect cost.
+
+    Args:
+        connections: The number of connections to open, capped at the pool size.
+
+    Returns:
+        The number of connections that were opened.
+    """
+    pool_size = getattr(engine.sync_engine.pool, "size", lambda: 0)()
+    count = min(connections, pool_size)
+    if count <= 0:
+        return 0
+    opened = await asyncio.gather(
+        *(engine.connect() for _ in range(count)), return_exceptions=True
+    )
+    warmed = 0
+    for conn in opened:
+        if isinstance(conn, Exception):
+            logger.warning(f"Failed to pre-warm a database connection: {conn}")
+            continue
+        await conn.close()
+        warmed += 1
+    logger.info(f"Pre-warmed {warmed} database connections")
+    return warmed
+
+
+def pool_metrics():
+    """
+    Returns an Instrumentator instrumentation that samples pool state.
+
+    The gauges are refreshed on every instrumented request, next to the
+    HTTP metrics exposed on /metrics.
+    """
+    pool = engine.sync_engine.pool
+
+    def instrumentation(info) -> None:
+        DB_POOL_SIZE.set(getattr(pool, "size", lambda: 0)())
+        DB_POOL_OVERFLOW.set(max(getattr(pool, "overflow", lambda: 0)(), 0))
+
+    return instrumentation
 
 
 async def init_db():
@@ -105,6 +438,14 @@ async def get_db():
     that the session is properly initialized, committed, or rolled back in case
     of errors, and closed after use.
 
+    The session is lazy: a pooled connection is checked out only when the
+    first statement runs and is returned at the next commit, rollback or
+    close, so requests that never touch the database never hold one.
+
+    With a read replica configured, plain SELECTs are served by the replica
+    (see `RoutingSession`); a user's writes keep their reads on the primary
+    for `REPLICA_STICKY_SECONDS`.
+
     Yields:
         AsyncSession: An active database session.
 
@@ -116,6 +457,7 @@ async def get_db():
     async with async_session() as db:
         try:
             yield db
+            await remember_writes(db)
         except Exception as err:
             await db.rollback()
             logger.error(f"Database error: {str(err)}")
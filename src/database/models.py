@@ -1,9 +1,40 @@
 import enum
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, Enum
-from sqlalchemy.orm import relationship
+from datetime import date
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    ForeignKey,
+    Date,
+    Enum,
+    Index,
+    DDL,
+    PrimaryKeyConstraint,
+    event,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import relationship, validates
 from .db import Base
 
 
+def birthday_key(birthday: date) -> int:
+    """
+    Returns the month-day key of a birthday, e.g. 1231 for December 31.
+
+    Args:
+        birthday: The date of birth.
+
+    Returns:
+        The birthday's month * 100 + day, which orders birthdays within a year.
+    """
+    return birthday.month * 100 + birthday.day
+
+
+def _birthday_key_default(context) -> int:
+    return birthday_key(context.get_current_parameters()["birthday"])
+
+
 class Role(enum.Enum):
     admin: str = "admin"
     user: str = "user"
@@ -17,6 +48,12 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     avatar_url = Column(String, nullable=True)
     roles = Column(Enum(Role), default=Role.user)
+    # The database shard that holds the user's contacts (0 is the home
+    # database); see src/database/shards.py.
+    shard = Column(Integer, nullable=False, default=0, server_default="0")
+    # Access tokens carry the version they were issued with; bumping it
+    # revokes every token issued before.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     contacts = relationship("Contact", back_populates="user")
 
     def to_dict(self):
@@ -25,7 +62,7 @@ class User(Base):
 
         Returns:
             dict: A dictionary containing the user's id, email, verification status,
-                  avatar URL, and roles.
+                  avatar URL, roles, shard and token version.
         """
 
         return {
@@ -34,17 +71,103 @@ class User(Base):
             "is_verified": self.is_verified,
             "avatar_url": self.avatar_url,
             "roles": self.roles.value,
+            "shard": self.shard or 0,
+            "token_version": self.token_version or 0,
         }
 
 
+# Number of hash partitions of the contacts table on PostgreSQL. Changing it
+# means re-partitioning, so it is a migration, not a setting.
+CONTACT_PARTITIONS = 16
+
+
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_birthday_md", "user_id", "birthday_md"),
+        Index(
+            "ix_contacts_user_id_last_name_first_name",
+            "user_id",
+            "last_name",
+            "first_name",
+        ),
+        Index("ix_contacts_user_id_email", "user_id", "email"),
+        {
+            "postgresql_partition_by": "HASH (user_id)",
+            "info": {"partition_key": ("user_id",)},
+        },
+    )
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     email = Column(String, index=True, nullable=False)
     phone_number = Column(String, nullable=False)
     birthday = Column(Date, nullable=False)
+    birthday_md = Column(Integer, nullable=False, default=_birthday_key_default)
     additional_data = Column(String, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user = relationship("User", back_populates="contacts")
+
+    @validates("birthday")
+    def _sync_birthday_md(self, key, value):
+        """Keeps the indexed month-day key in step with the birthday."""
+        if value is not None:
+            self.birthday_md = birthday_key(value)
+        return value
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _partitioned_primary_key(constraint, compiler, **kw):
+    """
+    Extends the primary key of a partitioned table with its partition key.
+
+    PostgreSQL only accepts unique constraints on a partitioned table that
+    include the partition key, so `contacts` gets PRIMARY KEY (id, user_id)
+    there. The ORM identity stays `id`, and SQLite keeps its plain key.
+    """
+    partition_key = constraint.table.info.get("partition_key", ())
+    names = [column.name for column in constraint.columns]
+    names += [name for name in partition_key if name not in names]
+    sql = ""
+    if constraint.name is not None:
+        sql += f"CONSTRAINT {compiler.preparer.format_constraint(constraint)} "
+    return sql + f"PRIMARY KEY ({', '.join(map(compiler.preparer.quote, names))})"
+
+
+CONTACT_PARTITION_DDL = tuple(
+    f"CREATE TABLE contacts_p{remainder:02d} PARTITION OF contacts "
+    f"FOR VALUES WITH (MODULUS {CONTACT_PARTITIONS}, REMAINDER {remainder})"
+    for remainder in range(CONTACT_PARTITIONS)
+)
+
+for _statement in CONTACT_PARTITION_DDL:
+    event.listen(
+        Contact.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
+
+# Full-text search columns are generated by PostgreSQL itself and are not
+# mapped on the model, so other dialects (SQLite in tests) keep a plain table.
+CONTACT_SEARCH_TEXT_SQL = (
+    "lower(first_name || ' ' || last_name || ' ' || email || ' ' || phone_number)"
+)
+
+CONTACT_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE contacts ADD COLUMN search_text text "
+    f"GENERATED ALWAYS AS ({CONTACT_SEARCH_TEXT_SQL}) STORED",
+    "ALTER TABLE contacts ADD COLUMN search_vector tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('simple', {CONTACT_SEARCH_TEXT_SQL})) STORED",
+    "CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)",
+    "CREATE INDEX ix_contacts_search_text_trgm ON contacts "
+    "USING gin (search_text gin_trgm_ops)",
+)
+
+for _statement in CONTACT_SEARCH_DDL:
+    event.listen(
+        Contact.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
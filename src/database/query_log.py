@@ -0,0 +1,125 @@
+from contextvars import ContextVar
+from functools import lru_cache
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import logging
+import random
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+QUERY_DURATION_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency by normalized statement fingerprint",
+    ["fingerprint"],
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_CAST = re.compile(
+    r"::\w+(?:\s+(?:PRECISION|VARYING|WITH(?:OUT)?\s+TIME\s+ZONE))?"
+    r"(?:\s*\([\d\s,]*\))?(?:\[\])*",
+    re.IGNORECASE,
+)
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUE_ROWS = re.compile(r"\(\?\+?\)(?:\s*,\s*\(\?\+?\))+")
+_WHITESPACE = re.compile(r"\s+")
+_POSTCOMPILE = re.compile(r"__\[POSTCOMPILE_\w+\]")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Normalizes a SQL statement so that executions differing only in values
+    share one fingerprint.
+
+    Literals and bind placeholders become ``?`` (type casts such as
+    asyncpg's ``$1::INTEGER`` are dropped first), value lists such as
+    ``IN (?, ?, ?)`` and multi-row ``VALUES (?, ?), (?, ?)`` collapse to
+    ``(?+)`` and whitespace is squeezed.
+
+    Args:
+        statement: The SQL text sent to the driver.
+
+    Returns:
+        The normalized statement.
+    """
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _POSTCOMPILE.sub("?", sql)
+    sql = _CAST.sub("", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _VALUE_LIST.sub("(?+)", sql)
+    sql = _VALUE_ROWS.sub("(?+)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def install_query_log(
+    engine: Engine, threshold_ms: float, sample_rate: float = 0.0
+) -> None:
+    """
+    Hooks statement timing into an engine.
+
+    Every statement feeds the per-fingerprint latency histogram. A statement
+    is logged only when it takes at least `threshold_ms`, or when it is picked
+    by `sample_rate` sampling. Bound parameters are never logged.
+
+    Args:
+        engine: The (sync) engine to instrument; pass `engine.sync_engine`
+            for an async engine.
+        threshold_ms: Statements at or above this duration are logged.
+        sample_rate: Fraction (0..1) of the remaining statements to log.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        normalized = fingerprint(statement)
+        QUERY_DURATION_SECONDS.labels(normalized).observe(elapsed)
+        elapsed_ms = elapsed * 1000
+        slow = elapsed_ms >= threshold_ms
+        if slow or (sample_rate and random.random() < sample_rate):
+            logger.log(
+                logging.WARNING if slow else logging.INFO,
+                f"{'Slow' if slow else 'Sampled'} query {elapsed_ms:.1f}ms "
+                f"route={current_route.get()} sql={normalized}",
+                extra={
+                    "duration_ms": round(elapsed_ms, 3),
+                    "fingerprint": normalized,
+                    "route": current_route.get(),
+                    "executemany": executemany,
+                },
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_timer(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+class RouteContextMiddleware:
+    """ASGI middleware that tags everything run by a request with its route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = current_route.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
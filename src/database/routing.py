@@ -0,0 +1,134 @@
+from prometheus_client import Counter, Gauge
+from sqlalchemy import Select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from typing import Optional
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DB_ROUTED_STATEMENTS = Counter(
+    "db_routed_statements_total",
+    "Statements routed by the session, by target engine",
+    ["target"],
+)
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds", "Last measured replication lag of the read replica"
+)
+
+# Zero when the replica has replayed everything it received; otherwise the
+# age of the last replayed transaction.
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - "
+    "pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaMonitor:
+    """
+    Polls the read replica's replication lag.
+
+    While the lag is above `max_lag` or the replica cannot be reached,
+    `healthy` is False and sessions send reads to the primary.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_lag: float, interval: float):
+        """
+        Initialize a ReplicaMonitor.
+
+        Args:
+            engine: The replica engine.
+            max_lag: The largest acceptable lag in seconds.
+            interval: Seconds between two lag checks.
+        """
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.healthy = True
+
+    async def check(self) -> Optional[float]:
+        """
+        Measures the replica lag once and updates `healthy`.
+
+        Returns:
+            The lag in seconds, or None if the replica could not be queried.
+        """
+        if self.engine.dialect.name != "postgresql":
+            return 0.0
+        try:
+            async with self.engine.connect() as conn:
+                lag = float((await conn.execute(REPLICA_LAG_SQL)).scalar() or 0)
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"Read replica unavailable, using primary: {e}")
+            self.healthy = False
+            return None
+        DB_REPLICA_LAG_SECONDS.set(lag)
+        healthy = lag <= self.max_lag
+        if healthy != self.healthy:
+            logger.warning(
+                f"Read replica lag {lag:.1f}s, "
+                f"{'resuming replica reads' if healthy else 'using primary'}"
+            )
+        self.healthy = healthy
+        return lag
+
+    async def run(self) -> None:
+        """Checks the lag every `interval` seconds until cancelled."""
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to a read replica.
+
+    Everything else goes to the primary: ORM flushes, INSERT/UPDATE/DELETE,
+    textual SQL, SELECT ... FOR UPDATE and raw connection access. Once a
+    session has written, or when `info["use_primary"]` is set (read-your-writes
+    stickiness), the rest of its reads stay on the primary as well.
+    Without a replica, or while the monitor reports it unhealthy, every
+    statement uses the primary.
+    """
+
+    def __init__(
+        self,
+        primary: Engine = None,
+        replica: Optional[Engine] = None,
+        monitor: Optional[ReplicaMonitor] = None,
+        **kwargs,
+    ):
+        """
+        Initialize a RoutingSession.
+
+        Args:
+            primary: The sync engine of the primary database.
+            replica: The sync engine of the read replica, if any.
+            monitor: The lag monitor of the replica.
+            **kwargs: Passed on to `Session`.
+        """
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replica = replica
+        self.monitor = monitor
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replica is None or (clause is None and not self._flushing):
+            return self.primary
+        if self._flushing or not isinstance(clause, Select):
+            self.info["wrote"] = True
+            self.info["use_primary"] = True
+        elif (
+            clause._for_update_arg is None
+            and not self.info.get("use_primary")
+            and (self.monitor is None or self.monitor.healthy)
+        ):
+            DB_ROUTED_STATEMENTS.labels("replica").inc()
+            return self.replica
+        DB_ROUTED_STATEMENTS.labels("primary").inc()
+        return self.primary
@@ -0,0 +1,351 @@
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+from src.database.db import (
+    async_session,
+    get_db,
+    invalidate_user_cache,
+    pool_options,
+)
+from src.database.models import Base, Contact, User
+from src.database.query_log import install_query_log
+from src.services.auth import auth_service
+from src.services.base import settings
+from src.services.revocation import (
+    announce_token_version,
+    fence_writes,
+    is_fenced,
+    lift_fence,
+)
+from src.services.token_versions import revoke_tokens
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+HOME_SHARD = 0
+# Every shard allocates contact ids from its own range, so a user's contacts
+# keep their ids when they move to another shard.
+CONTACT_ID_SPAN = 100_000_000
+MOVE_BATCH_SIZE = 1000
+# How long workers may keep routing a moved user to the old shard: the
+# in-process user cache TTL for a worker that missed the published
+# invalidation, or the lifetime of stateless access tokens, which carry the
+# shard as a claim.
+MOVE_GRACE_SECONDS = max(
+    settings.USER_CACHE_TTL_SECONDS,
+    settings.AUTH_STATELESS_EXPIRE_MINUTES * 60 if settings.AUTH_STATELESS else 0,
+)
+# How long writes that passed the fence check just before it went up, and
+# the fence message itself, get to settle before the contacts are copied.
+MOVE_SETTLE_SECONDS = 2
+# Extra lifetime of the write fence, should the move die before lifting it.
+MOVE_FENCE_MARGIN_SECONDS = 60
+
+
+class ShardMap:
+    """Maps shard ids to the session factories of their databases."""
+
+    def __init__(self, sessions: Dict[int, Callable[[], AsyncSession]]):
+        """
+        Initialize a ShardMap.
+
+        Args:
+            sessions: Session factories keyed by shard id; shard 0 is the home
+                database that also holds the users table.
+        """
+        self.sessions = dict(sessions)
+
+    @property
+    def shards(self) -> List[int]:
+        return sorted(self.sessions)
+
+    def session(self, shard: int) -> AsyncSession:
+        """
+        Opens a session on a shard.
+
+        Args:
+            shard: The shard id.
+
+        Returns:
+            A new session bound to the shard's database.
+
+        Raises:
+            ValueError: If the shard is not configured.
+        """
+        try:
+            factory = self.sessions[shard]
+        except KeyError:
+            raise ValueError(f"Unknown shard {shard}")
+        return factory()
+
+
+shard_engines = {
+    shard: create_async_engine(url, echo=settings.DB_ECHO, **pool_options(url))
+    for shard, url in settings.DATABASE_SHARD_URLS.items()
+}
+for _engine in shard_engines.values():
+    install_query_log(
+        _engine.sync_engine,
+        settings.SLOW_QUERY_THRESHOLD_MS,
+        settings.SLOW_QUERY_SAMPLE_RATE,
+    )
+
+shard_map = ShardMap(
+    {
+        HOME_SHARD: async_session,
+        **{
+            shard: sessionmaker(
+                bind=engine,
+                class_=AsyncSession,
+                autocommit=False,
+                expire_on_commit=False,
+                autoflush=False,
+            )
+            for shard, engine in shard_engines.items()
+        },
+    }
+)
+
+
+def shard_of(user) -> int:
+    """
+    Returns the shard that holds a user's contacts.
+
+    Args:
+        user: The user as a model, `CachedUser` or dictionary.
+
+    Returns:
+        The user's shard id.
+    """
+    if isinstance(user, dict):
+        shard = user.get("shard")
+    else:
+        shard = getattr(user, "shard", None)
+    return shard or HOME_SHARD
+
+
+async def init_shards() -> None:
+    """
+    Creates the tables on every extra shard.
+
+    On PostgreSQL the contact id sequence of shard N is moved to start at
+    N * CONTACT_ID_SPAN so that ids never collide across shards.
+    """
+    for shard, engine in shard_engines.items():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            if conn.dialect.name == "postgresql":
+                await conn.execute(
+                    text(
+                        "SELECT setval('contacts_id_seq', GREATEST("
+                        "(SELECT last_value FROM contacts_id_seq), :start))"
+                    ),
+                    {"start": shard * CONTACT_ID_SPAN},
+                )
+
+
+@asynccontextmanager
+async def _user_shard_session(
+    current_user, db: AsyncSession
+) -> AsyncIterator[AsyncSession]:
+    shard = shard_of(current_user)
+    if shard == HOME_SHARD:
+        yield db
+        return
+    async with shard_map.session(shard) as shard_db:
+        try:
+            yield shard_db
+        except Exception as err:
+            await shard_db.rollback()
+            logger.error(f"Database error on shard {shard}: {str(err)}")
+            raise
+
+
+async def get_shard_db(
+    current_user=Depends(auth_service.get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Dependency function that provides a session on the current user's shard.
+
+    Users on the home shard share the request's `get_db` session; others get
+    a session on their shard with the same rollback-on-error handling.
+
+    Args:
+        current_user: The authenticated user.
+        db: The request's session on the home database.
+
+    Yields:
+        AsyncSession: A session on the database holding the user's contacts.
+    """
+    async with _user_shard_session(current_user, db) as shard_db:
+        yield shard_db
+
+
+async def get_writable_shard_db(
+    current_user=Depends(auth_service.get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Dependency function like `get_shard_db` for routes that change contacts.
+
+    Args:
+        current_user: The authenticated user.
+        db: The request's session on the home database.
+
+    Yields:
+        AsyncSession: A session on the database holding the user's contacts.
+
+    Raises:
+        HTTPException: With status 503 while the user is being moved to
+            another shard.
+    """
+    if await is_fenced(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Contacts are being moved, please retry",
+            headers={"Retry-After": str(MOVE_SETTLE_SECONDS)},
+        )
+    async with _user_shard_session(current_user, db) as shard_db:
+        yield shard_db
+
+
+async def fan_out(
+    query: Callable[..., Awaitable[Any]], *args, **kwargs
+) -> Dict[int, Any]:
+    """
+    Runs a query on every shard concurrently.
+
+    Args:
+        query: An async function taking a session as its first argument.
+        *args: Further positional arguments for `query`.
+        **kwargs: Keyword arguments for `query`.
+
+    Returns:
+        The result of `query` keyed by shard id.
+    """
+
+    async def run(shard: int):
+        async with shard_map.session(shard) as db:
+            return await query(db, *args, **kwargs)
+
+    shards = shard_map.shards
+    results = await asyncio.gather(*(run(shard) for shard in shards))
+    return dict(zip(shards, results))
+
+
+async def _copy_contacts(
+    source_db: AsyncSession, target_db: AsyncSession, user_row: dict
+) -> List[int]:
+    """
+    Copies a user's contacts with their ids and commits them on the target.
+
+    The source rows stay locked FOR UPDATE until `source_db` ends its
+    transaction, so they cannot change while the move is in progress.
+    """
+    if await target_db.get(User, user_row["id"]) is None:
+        await target_db.execute(insert(User.__table__), [user_row])
+    result = await source_db.stream(
+        select(Contact.__table__)
+        .where(Contact.user_id == user_row["id"])
+        .with_for_update()
+        .execution_options(yield_per=MOVE_BATCH_SIZE)
+    )
+    ids = []
+    async for rows in result.partitions():
+        batch = [dict(row._mapping) for row in rows]
+        await target_db.execute(insert(Contact.__table__), batch)
+        ids.extend(row["id"] for row in batch)
+    await target_db.commit()
+    return ids
+
+
+async def _delete_contacts(db: AsyncSession, user_id: int, ids: List[int]) -> None:
+    for start in range(0, len(ids), MOVE_BATCH_SIZE):
+        await db.execute(
+            delete(Contact).where(
+                Contact.user_id == user_id,
+                Contact.id.in_(ids[start : start + MOVE_BATCH_SIZE]),
+            )
+        )
+    await db.commit()
+
+
+async def move_user(
+    user_id: int,
+    target: int,
+    grace: float = MOVE_GRACE_SECONDS,
+    settle: float = MOVE_SETTLE_SECONDS,
+) -> int:
+    """
+    Moves a user's contacts to another shard.
+
+    Writes to the user's contacts are fenced first (`get_writable_shard_db`
+    answers 503) and `settle` seconds are given to writes already under
+    way. The contacts are then copied with their ids and the source rows
+    stay locked while the directory entry (`users.shard`) is switched and
+    the cached user is invalidated. With `AUTH_STATELESS` the user's access
+    tokens, which carry the old shard as a claim, are revoked as well;
+    other tokens are looked up and follow the directory. The source
+    transaction then ends, so the locks are not held while waiting. The
+    source rows are deleted only after `grace` seconds, once no worker can
+    still route the user to the old shard; contacts a racing write created
+    meanwhile are moved by a final sweep. The fence is lifted at the end.
+
+    Args:
+        user_id: The id of the user to move.
+        target: The id of the destination shard.
+        grace: Seconds to wait before the source rows are removed.
+        settle: Seconds to wait between fencing writes and copying.
+
+    Returns:
+        The number of contacts moved.
+
+    Raises:
+        ValueError: If the user or the target shard does not exist.
+    """
+    async with shard_map.session(HOME_SHARD) as directory:
+        user = await directory.get(User, user_id)
+        if user is None:
+            raise ValueError(f"User {user_id} not found")
+        source = user.shard or HOME_SHARD
+        if source == target:
+            return 0
+        await directory.commit()
+        await fence_writes(user_id, settle + grace + MOVE_FENCE_MARGIN_SECONDS)
+        if settle:
+            await asyncio.sleep(settle)
+        await directory.refresh(user)
+        user_row = {
+            column.name: getattr(user, column.name) for column in User.__table__.columns
+        }
+
+        async with (
+            shard_map.session(target) as target_db,
+            shard_map.session(source) as source_db,
+        ):
+            # Leftovers of an interrupted move; the target is not authoritative yet.
+            await target_db.execute(delete(Contact).where(Contact.user_id == user_id))
+            moved = await _copy_contacts(source_db, target_db, user_row)
+            user.shard = target
+            if settings.AUTH_STATELESS:
+                revoke_tokens(user)
+            await directory.commit()
+            await source_db.commit()
+            await invalidate_user_cache(user.email)
+            if settings.AUTH_STATELESS:
+                await announce_token_version(user)
+            logger.info(f"User {user_id} moved from shard {source} to {target}")
+            await asyncio.sleep(grace)
+            await _delete_contacts(source_db, user_id, moved)
+
+            stragglers = await _copy_contacts(source_db, target_db, user_row)
+            await _delete_contacts(source_db, user_id, stragglers)
+    await lift_fence(user_id)
+    return len(moved) + len(stragglers)
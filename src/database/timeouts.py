@@ -0,0 +1,151 @@
+from contextvars import ContextVar
+from fastapi import Request
+from prometheus_client import Counter
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from typing import Dict, Optional
+
+import asyncio
+import logging
+
+from src.services.base import settings
+
+logger = logging.getLogger(__name__)
+
+statement_timeout_ms: ContextVar[Optional[int]] = ContextVar(
+    "statement_timeout_ms", default=None
+)
+
+REQUESTS_CANCELLED = Counter(
+    "http_requests_cancelled_on_disconnect_total",
+    "Requests whose handler was cancelled because the client went away",
+)
+
+QUERY_CANCELED_SQLSTATE = "57014"
+
+
+def route_timeout(
+    route: str,
+    timeouts: Dict[str, int] = settings.DB_ROUTE_STATEMENT_TIMEOUTS_MS,
+    default: int = settings.DB_STATEMENT_TIMEOUT_MS,
+) -> int:
+    """
+    Returns the statement timeout configured for a route.
+
+    Args:
+        route: The route as ``"METHOD /path/template"``.
+        timeouts: Per-route overrides in milliseconds.
+        default: The timeout for routes without an override.
+
+    Returns:
+        The timeout in milliseconds; 0 disables it.
+    """
+    return timeouts.get(route, default)
+
+
+async def apply_statement_timeout(request: Request) -> None:
+    """
+    Dependency that sets the statement timeout for the current route.
+
+    Registered on the application. Connections already run with the
+    default timeout (see `pool_options`), so only the transactions of
+    routes with an override start with ``SET LOCAL statement_timeout``.
+    Being transaction-scoped, the override never leaks to other clients of
+    a pooled (or PgBouncer) connection.
+    """
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    statement_timeout_ms.set(route_timeout(f"{request.method} {path}"))
+
+
+@event.listens_for(Session, "after_begin")
+def _set_local_statement_timeout(session, transaction, connection):
+    timeout = statement_timeout_ms.get()
+    if (
+        timeout is None
+        or timeout == settings.DB_STATEMENT_TIMEOUT_MS
+        or connection.dialect.name != "postgresql"
+    ):
+        return
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def is_statement_timeout(error: Exception) -> bool:
+    """
+    Tells whether a database error was raised by a statement timeout.
+
+    Args:
+        error: The exception raised by SQLAlchemy.
+
+    Returns:
+        True if PostgreSQL cancelled the statement.
+    """
+    if not isinstance(error, DBAPIError):
+        return False
+    original = error.orig
+    sqlstate = getattr(original, "sqlstate", None) or getattr(original, "pgcode", None)
+    return sqlstate == QUERY_CANCELED_SQLSTATE
+
+
+class CancelOnDisconnectMiddleware:
+    """
+    ASGI middleware that cancels a request's handler when the client leaves.
+
+    Cancelling the handler task cancels the query it is awaiting: asyncpg
+    sends a cancel request to the server and the connection goes back to the
+    pool instead of waiting for an answer nobody will read.
+
+    Messages are handed to the handler through a queue of one, so a request
+    body is still read only as fast as the handler consumes it; a
+    disconnect in the middle of an upload is noticed on the handler's next
+    read.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        messages: asyncio.Queue = asyncio.Queue(maxsize=1)
+        disconnected = False
+        response_complete = False
+
+        async def send_wrapper(message):
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                response_complete = True
+            await send(message)
+
+        async def watch():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    # After the response, a disconnect is the normal end of
+                    # the exchange; background tasks must keep running.
+                    if not response_complete:
+                        disconnected = True
+                        handler.cancel()
+                    await messages.put(message)
+                    return
+                await messages.put(message)
+
+        handler = asyncio.ensure_future(self.app(scope, messages.get, send_wrapper))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not disconnected:
+                handler.cancel()
+                raise
+            REQUESTS_CANCELLED.inc()
+            logger.info(
+                f"Client disconnected, cancelled {scope['method']} {scope['path']}"
+            )
+        finally:
+            watcher.cancel()
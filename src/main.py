@@ -1,17 +1,38 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_limiter import FastAPILimiter
 
-from src.database.db import init_db, rc
+from src.database.db import (
+    init_db,
+    pool_metrics,
+    prewarm_pool,
+    rc,
+    replica_monitor,
+)
+from src.database.query_log import RouteContextMiddleware
+from src.database.shards import init_shards
+from src.database.timeouts import (
+    CancelOnDisconnectMiddleware,
+    apply_statement_timeout,
+)
 from src.routers import contacts, users, utils
-from prometheus_fastapi_instrumentator import Instrumentator
+from src.services.revocation import revocation_listener
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
+import asyncio
 import uvicorn
 
 
-app = FastAPI(title="Contacts API", description="Contacts management REST API")
+app = FastAPI(
+    title="Contacts API",
+    description="Contacts management REST API",
+    dependencies=[Depends(apply_statement_timeout)],
+)
 
-Instrumentator().instrument(app).expose(app)
+instrumentator = Instrumentator()
+instrumentator.add(metrics.default())
+instrumentator.add(pool_metrics())
+instrumentator.instrument(app).expose(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,16 +40,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(RouteContextMiddleware)
+app.add_middleware(CancelOnDisconnectMiddleware)
 
 
 @app.on_event("startup")
 async def startup():
     """
     Application startup event handler.
-    Initializes the database and the FastAPI rate limiter.
+    Initializes the database and the contact shards, pre-warms the connection
+    pool, starts the read replica lag monitor and the token revocation
+    listener, and initializes the FastAPI rate limiter.
     """
     await init_db()
+    await init_shards()
+    await prewarm_pool()
+    if replica_monitor is not None:
+        app.state.replica_monitor_task = asyncio.create_task(replica_monitor.run())
+    app.state.revocation_task = asyncio.create_task(revocation_listener.run())
     await FastAPILimiter.init(rc)
 
 
@@ -1,16 +1,39 @@
-from fastapi import HTTPException
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, extract, func
+from sqlalchemy import select, insert, update, delete, or_, case, func, text
 from datetime import date, timedelta
-
-from src.database.models import Contact, User
-from src.schemas.schemas import ContactCreate, ContactUpdate
+from sqlalchemy.engine import Row
+from sqlalchemy.orm.util import identity_key
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+import base64
+import binascii
+import calendar
+import json
+
+from src.database.models import Contact, User, birthday_key
+from src.schemas.schemas import ContactCreate, ContactUpdate, ContactBulkUpdate
+
+# The columns of `ContactResponse`, in `EXPORT_FIELDS` order. Reads that feed
+# responses select these as plain rows: no identity map, no instrumented
+# instances, and the rows can be serialized without Pydantic.
+CONTACT_COLUMNS = (
+    Contact.id,
+    Contact.first_name,
+    Contact.last_name,
+    Contact.email,
+    Contact.phone_number,
+    Contact.birthday,
+    Contact.additional_data,
+)
 
 
 async def create_contact(db: AsyncSession, contact: ContactCreate, user: User):
     """
     Creates a new contact and returns the newly created contact.
 
+    The row is written and read back with a single INSERT ... RETURNING.
+
     Args:
         db: The database session to use.
         contact: The new contact's details.
@@ -22,14 +45,19 @@ async def create_contact(db: AsyncSession, contact: ContactCreate, user: User):
     Raises:
         HTTPException: If there is an error while creating the contact.
     """
-    db_contact = Contact(**contact.model_dump(), user_id=user.id)
-    db.add(db_contact)
+    result = await db.scalars(
+        insert(Contact)
+        .values(**contact.model_dump(), user_id=user.id)
+        .returning(Contact)
+    )
+    db_contact = result.one()
     await db.commit()
-    await db.refresh(db_contact)
     return db_contact
 
 
-async def get_contacts(db: AsyncSession, user: User, skip: int = 0, limit: int = 10):
+async def get_contacts(
+    db: AsyncSession, user: User, skip: int = 0, limit: int = 10
+) -> Sequence[Row]:
     """
     Retrieves a list of contacts associated with the given user.
 
@@ -40,12 +68,108 @@ async def get_contacts(db: AsyncSession, user: User, skip: int = 0, limit: int =
         limit: The number of contacts to return.
 
     Returns:
-        A list of contacts associated with the given user.
+        Rows with the `CONTACT_COLUMNS` of the user's contacts.
     """
     result = await db.execute(
-        select(Contact).filter(Contact.user_id == user.id).offset(skip).limit(limit)
+        select(*CONTACT_COLUMNS)
+        .filter(Contact.user_id == user.id)
+        .order_by(Contact.id)
+        .offset(skip)
+        .limit(limit)
     )
-    return result.scalars().all()
+    return result.all()
+
+
+async def count_contacts(db: AsyncSession) -> int:
+    """
+    Counts all contacts in the database, across users.
+
+    Args:
+        db: The database session to use.
+
+    Returns:
+        The number of contacts.
+    """
+    return await db.scalar(select(func.count()).select_from(Contact))
+
+
+def encode_cursor(values: dict) -> str:
+    """
+    Encodes keyset pagination values into an opaque cursor token.
+
+    Args:
+        values: The sort key values of the last row on the current page.
+
+    Returns:
+        A URL-safe token that can be passed back to fetch the next page.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decodes an opaque cursor token produced by `encode_cursor`.
+
+    Args:
+        cursor: The cursor token received from the client.
+
+    Returns:
+        The sort key values stored in the cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, dict):
+            raise ValueError("cursor must encode an object")
+        return values
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+async def get_contacts_page(
+    db: AsyncSession, user: User, limit: int = 10, cursor: Optional[str] = None
+) -> Tuple[Sequence[Row], Optional[str]]:
+    """
+    Retrieves one page of the user's contacts using keyset pagination.
+
+    Rows are ordered by `(user_id, id)` and each page starts right after the
+    last id of the previous one, so the query is an index range scan whose
+    cost does not depend on how deep the page is.
+
+    Args:
+        db: The database session to use.
+        user: The user whose contacts to retrieve.
+        limit: The number of contacts to return.
+        cursor: The `next_cursor` token from the previous page, or None for
+            the first page.
+
+    Returns:
+        A tuple of the `CONTACT_COLUMNS` rows on the page and the cursor for
+        the next page, or None if there are no more contacts.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    stmt = select(*CONTACT_COLUMNS).filter(Contact.user_id == user.id)
+    if cursor:
+        last_id = decode_cursor(cursor).get("id")
+        if not isinstance(last_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        stmt = stmt.filter(Contact.id > last_id)
+    result = await db.execute(stmt.order_by(Contact.id).limit(limit + 1))
+    contacts = result.all()
+    if len(contacts) > limit:
+        contacts = contacts[:limit]
+        return contacts, encode_cursor({"id": contacts[-1].id})
+    return contacts, None
 
 
 async def get_contact(db: AsyncSession, contact_id: int, user: User):
@@ -72,6 +196,8 @@ async def update_contact(
     """
     Updates an existing contact and returns the updated contact.
 
+    Ownership check, write and read-back happen in one UPDATE ... RETURNING.
+
     Args:
         db: The database session to use.
         contact_id: The ID of the contact to update.
@@ -84,23 +210,29 @@ async def update_contact(
     Raises:
         HTTPException: If there is an error while updating the contact.
     """
-    result = await db.execute(
-        select(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id)
+    values = contact.model_dump(exclude_unset=True)
+    if not values:
+        return await get_contact(db, contact_id, user)
+    if values.get("birthday") is not None:
+        values["birthday_md"] = birthday_key(values["birthday"])
+    result = await db.scalars(
+        update(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == user.id)
+        .values(**values)
+        .returning(Contact)
+        .execution_options(synchronize_session=False, populate_existing=True)
     )
-    db_contact = result.scalars().first()
-    if db_contact:
-        for key, value in contact.model_dump(exclude_unset=True).items():
-            setattr(db_contact, key, value)
-        await db.commit()
-        await db.refresh(db_contact)
-        return db_contact
-    return None
+    db_contact = result.first()
+    await db.commit()
+    return db_contact
 
 
 async def delete_contact(db: AsyncSession, contact_id: int, user: User):
     """
     Deletes a contact by ID if it belongs to the given user.
 
+    Ownership check and delete happen in one DELETE ... RETURNING.
+
     Args:
         db: The database session to use.
         contact_id: The ID of the contact to delete.
@@ -109,40 +241,263 @@ async def delete_contact(db: AsyncSession, contact_id: int, user: User):
     Returns:
         The deleted contact if it exists and belongs to the given user, or None if not found.
     """
+    result = await db.scalars(
+        delete(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == user.id)
+        .returning(Contact)
+        .execution_options(synchronize_session=False)
+    )
+    db_contact = result.first()
+    await db.commit()
+    return db_contact
+
+
+async def get_contacts_by_ids(
+    db: AsyncSession, ids: List[int], user: User
+) -> Sequence[Row]:
+    """
+    Retrieves the given user's contacts with the given IDs in one query.
 
+    Args:
+        db: The database session to use.
+        ids: The IDs of the contacts to retrieve.
+        user: The user who owns the contacts.
+
+    Returns:
+        The `CONTACT_COLUMNS` rows of the contacts that exist and belong to
+        the given user, ordered by ID.
+    """
     result = await db.execute(
-        select(Contact).filter(Contact.id == contact_id, Contact.user_id == user.id)
+        select(*CONTACT_COLUMNS)
+        .filter(Contact.user_id == user.id, Contact.id.in_(ids))
+        .order_by(Contact.id)
     )
-    db_contact = result.scalars().first()
-    if db_contact:
-        await db.delete(db_contact)
-        await db.commit()
-    return db_contact
+    return result.all()
+
+
+async def bulk_create_contacts(
+    db: AsyncSession, contacts: List[ContactCreate], user: User
+) -> List[Contact]:
+    """
+    Creates several contacts with one multi-row INSERT ... RETURNING.
+
+    Args:
+        db: The database session to use.
+        contacts: The new contacts' details.
+        user: The user who is creating the contacts.
+
+    Returns:
+        The newly created contacts, in the same order as `contacts`.
+    """
+    if not contacts:
+        return []
+    result = await db.scalars(
+        insert(Contact).returning(Contact, sort_by_parameter_order=True),
+        [{**contact.model_dump(), "user_id": user.id} for contact in contacts],
+    )
+    db_contacts = result.all()
+    await db.commit()
+    return db_contacts
 
 
-async def search_contacts(db: AsyncSession, query: str, user: User):
+async def bulk_update_contacts(
+    db: AsyncSession, contacts: List[ContactBulkUpdate], user: User
+) -> List[int]:
     """
-    Searches for contacts by query.
+    Applies partial updates to several contacts in one batch.
+
+    Ownership is checked with a single query, then all owned rows are
+    updated through one executemany UPDATE by primary key. The UPDATE
+    matches the owner as well as the id, so it stays within the user's
+    partition and never reaches another user's rows.
 
     Args:
         db: The database session to use.
-        query: The search query.
-        user: The user whose contacts to search.
+        contacts: The updates, each carrying the ID of the contact to change.
+        user: The user who owns the contacts.
 
     Returns:
-        A list of contacts that match the given query.
+        The IDs of the contacts that were updated.
     """
     result = await db.execute(
-        select(Contact).filter(
+        select(Contact.id).filter(
             Contact.user_id == user.id,
-            or_(
-                Contact.first_name.ilike(f"%{query}%"),
-                Contact.last_name.ilike(f"%{query}%"),
-                Contact.email.ilike(f"%{query}%"),
-            ),
+            Contact.id.in_([contact.id for contact in contacts]),
+        )
+    )
+    owned = set(result.scalars().all())
+    updated, rows = [], []
+    for contact in contacts:
+        if contact.id not in owned:
+            continue
+        updated.append(contact.id)
+        values = contact.model_dump(exclude_unset=True)
+        if values.get("birthday") is not None:
+            values["birthday_md"] = birthday_key(values["birthday"])
+        if len(values) > 1:
+            rows.append(values)
+    if rows:
+        await db.execute(
+            update(Contact)
+            .where(Contact.user_id == user.id)
+            .execution_options(synchronize_session=None),
+            rows,
         )
+        for contact_id in updated:
+            instance = db.identity_map.get(identity_key(Contact, contact_id))
+            if instance is not None:
+                db.expire(instance)
+        await db.commit()
+    return updated
+
+
+async def bulk_delete_contacts(
+    db: AsyncSession, ids: List[int], user: User
+) -> List[int]:
+    """
+    Deletes several contacts with one DELETE ... RETURNING.
+
+    Args:
+        db: The database session to use.
+        ids: The IDs of the contacts to delete.
+        user: The user who owns the contacts.
+
+    Returns:
+        The IDs of the contacts that were deleted.
+    """
+    if not ids:
+        return []
+    result = await db.scalars(
+        delete(Contact)
+        .where(Contact.user_id == user.id, Contact.id.in_(ids))
+        .returning(Contact.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.all()
+    await db.commit()
+    return deleted
+
+
+async def stream_contacts(
+    db: AsyncSession, user: User, batch_size: int = 500
+) -> AsyncIterator[Sequence]:
+    """
+    Streams all of the user's contacts in batches through a server-side cursor.
+
+    Plain rows are fetched instead of ORM objects, so memory use depends on
+    `batch_size` only, not on the size of the address book.
+
+    Args:
+        db: The database session to use. It must stay open while iterating.
+        user: The user whose contacts to stream.
+        batch_size: The number of rows fetched per round trip.
+
+    Yields:
+        Lists of rows with the `CONTACT_COLUMNS`.
+    """
+    result = await db.stream(
+        select(*CONTACT_COLUMNS)
+        .filter(Contact.user_id == user.id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=batch_size)
     )
-    return result.scalars().all()
+    async for partition in result.partitions():
+        yield partition
+
+
+IMPORT_COLUMNS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "birthday",
+    "birthday_md",
+    "additional_data",
+    "user_id",
+)
+
+
+async def copy_contacts(
+    db: AsyncSession, contacts: List[ContactCreate], user: User
+) -> int:
+    """
+    Loads a chunk of validated contacts without committing.
+
+    On PostgreSQL the rows are sent with asyncpg's binary COPY into a
+    transaction-scoped staging table and merged into `contacts` with one
+    INSERT ... SELECT. Other dialects fall back to an executemany INSERT.
+
+    Args:
+        db: The database session to use.
+        contacts: The validated contacts to load.
+        user: The user who will own the contacts.
+
+    Returns:
+        The number of contacts loaded.
+    """
+    if not contacts:
+        return 0
+    records = [
+        (
+            contact.first_name,
+            contact.last_name,
+            contact.email,
+            contact.phone_number,
+            contact.birthday,
+            birthday_key(contact.birthday),
+            contact.additional_data,
+            user.id,
+        )
+        for contact in contacts
+    ]
+    if db.get_bind().dialect.name != "postgresql":
+        await db.execute(
+            insert(Contact), [dict(zip(IMPORT_COLUMNS, record)) for record in records]
+        )
+        return len(records)
+
+    columns = ", ".join(IMPORT_COLUMNS)
+    await db.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS contacts_import ("
+            "first_name varchar, last_name varchar, email varchar, "
+            "phone_number varchar, birthday date, birthday_md integer, "
+            "additional_data varchar, user_id integer) ON COMMIT DROP"
+        )
+    )
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        "contacts_import", records=records, columns=list(IMPORT_COLUMNS)
+    )
+    await db.execute(
+        text(f"INSERT INTO contacts ({columns}) SELECT {columns} FROM contacts_import")
+    )
+    await db.execute(text("TRUNCATE contacts_import"))
+    return len(records)
+
+
+def next_birthday(birthday: date, start: date) -> date:
+    """
+    Returns the first anniversary of a birthday on or after the given date.
+
+    February 29 birthdays are celebrated on February 28 in non-leap years.
+
+    Args:
+        birthday: The date of birth.
+        start: The date to count from.
+
+    Returns:
+        The date of the next birthday.
+    """
+    for year in (start.year, start.year + 1):
+        try:
+            candidate = birthday.replace(year=year)
+        except ValueError:
+            candidate = date(year, 2, 28)
+        if candidate >= start:
+            return candidate
+    return candidate
 
 
 async def get_upcoming_birthdays(
@@ -151,6 +506,11 @@ async def get_upcoming_birthdays(
     """
     Retrieves a list of contacts that have an upcoming birthday in the given time range.
 
+    The window is matched against the indexed `(user_id, birthday_md)` key, so
+    the query is a range scan (two ranges when the window wraps past
+    December 31) and works the same on every database dialect. In common
+    years a window ending on February 28 also covers February 29 birthdays.
+
     Args:
         db: The database session to use.
         user: The user whose contacts to check.
@@ -158,36 +518,54 @@ async def get_upcoming_birthdays(
         start_date: The start date of the range to check for birthdays. If None, defaults to today.
 
     Returns:
-        A list of contacts with upcoming birthdays, along with a message describing the birthday.
+        A list of contacts with upcoming birthdays ordered by date, each with a
+        message describing the birthday and the date it falls on.
+
+    Raises:
+        HTTPException: If `days` is not positive.
     """
     if days < 1:
         raise HTTPException(status_code=400, detail="Days must be positive")
     start = start_date or date.today()
     end = start + timedelta(days=days)
-    result = await db.execute(
-        select(
-            Contact.id,
-            Contact.first_name,
-            Contact.last_name,
-            func.to_char(Contact.birthday, "MON-DD").label("birthday_formatted"),
-        ).filter(
-            Contact.user_id == user.id,
-            or_(
-                (extract("month", Contact.birthday) == extract("month", start))
-                & (
-                    extract("day", Contact.birthday).between(
-                        extract("day", start), extract("day", end)
-                    )
-                ),
-                (extract("month", Contact.birthday) == extract("month", end))
-                & (extract("day", Contact.birthday) <= extract("day", end)),
-            ),
+    start_key, end_key = birthday_key(start), birthday_key(end)
+    if (end.month, end.day) == (2, 28) and not calendar.isleap(end.year):
+        # February 29 birthdays are celebrated on the 28th in common years.
+        end_key = birthday_key(date(2000, 2, 29))
+
+    stmt = select(
+        Contact.id, Contact.first_name, Contact.last_name, Contact.birthday
+    ).filter(Contact.user_id == user.id)
+    if days >= 365:
+        stmt = stmt.order_by(
+            case((Contact.birthday_md >= start_key, 0), else_=1),
+            Contact.birthday_md,
         )
-    )
-    contacts = result.all()
-    return [
-        {
-            "message": f"{contact.first_name} {contact.last_name}'s birthday is on {contact.birthday_formatted} (ID: {contact.id})"
-        }
-        for contact in contacts
-    ]
+    elif start.year == end.year:
+        stmt = stmt.filter(Contact.birthday_md.between(start_key, end_key)).order_by(
+            Contact.birthday_md
+        )
+    else:
+        stmt = stmt.filter(
+            or_(Contact.birthday_md >= start_key, Contact.birthday_md <= end_key)
+        ).order_by(
+            case((Contact.birthday_md >= start_key, 0), else_=1),
+            Contact.birthday_md,
+        )
+    result = await db.execute(stmt)
+
+    upcoming = []
+    for contact in result.all():
+        celebrated_on = next_birthday(contact.birthday, start)
+        upcoming.append(
+            {
+                "message": f"{contact.first_name} {contact.last_name}'s birthday is on {celebrated_on.strftime('%b-%d').upper()} (ID: {contact.id})",
+                "id": contact.id,
+                "first_name": contact.first_name,
+                "last_name": contact.last_name,
+                "birthday": contact.birthday,
+                "next_birthday": celebrated_on,
+                "days_until": (celebrated_on - start).days,
+            }
+        )
+    return upcoming
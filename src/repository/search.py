@@ -0,0 +1,124 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_, and_, case, cast, func, literal_column, Float
+from sqlalchemy.engine import Row
+from typing import Optional, Sequence, Tuple
+
+from src.database.models import Contact, User
+from src.repository.contacts import CONTACT_COLUMNS, encode_cursor, decode_cursor
+
+
+def _postgres_ranking(term: str):
+    """
+    Builds the match predicate and relevance score for PostgreSQL.
+
+    The predicate is served by the GIN indexes on the generated
+    `search_vector` (full-text) and `search_text` (trigram) columns.
+
+    Args:
+        term: The normalized search term.
+
+    Returns:
+        A tuple of the match predicate and the score expression.
+    """
+    search_text = literal_column("contacts.search_text")
+    search_vector = literal_column("contacts.search_vector")
+    ts_query = func.websearch_to_tsquery("simple", term)
+    match = or_(
+        search_vector.op("@@")(ts_query),
+        search_text.contains(term, autoescape=True),
+    )
+    score = cast(
+        func.ts_rank_cd(search_vector, ts_query) + func.similarity(search_text, term),
+        Float,
+    )
+    return match, score
+
+
+def _fallback_ranking(term: str):
+    """
+    Builds the match predicate and relevance score for other dialects.
+
+    Used with SQLite in tests: exact matches on a name or email rank first,
+    prefix matches second and any other substring match last.
+
+    Args:
+        term: The normalized search term.
+
+    Returns:
+        A tuple of the match predicate and the score expression.
+    """
+    fields = [
+        func.lower(Contact.first_name),
+        func.lower(Contact.last_name),
+        func.lower(Contact.email),
+    ]
+    match = or_(
+        *(field.contains(term, autoescape=True) for field in fields),
+        Contact.phone_number.contains(term, autoescape=True),
+    )
+    score = case(
+        (or_(*(field == term for field in fields)), 3),
+        (or_(*(field.startswith(term, autoescape=True) for field in fields)), 2),
+        else_=1,
+    )
+    return match, score
+
+
+async def search_contacts(
+    db: AsyncSession,
+    query: str,
+    user: User,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Tuple[Sequence[Row], Optional[str]]:
+    """
+    Searches the user's contacts by name, email or phone number.
+
+    Results are ordered by relevance and returned one bounded page at a time.
+
+    Args:
+        db: The database session to use.
+        query: The search query.
+        user: The user whose contacts to search.
+        limit: The maximum number of contacts to return.
+        cursor: The `next_cursor` token from the previous page, or None for
+            the first page.
+
+    Returns:
+        A tuple of the matching rows (the `CONTACT_COLUMNS` followed by
+        ``score``) and the cursor for the next page, or None if there are no
+        more matches.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    term = query.strip().lower()
+    if not term:
+        return [], None
+
+    if db.get_bind().dialect.name == "postgresql":
+        match, score = _postgres_ranking(term)
+    else:
+        match, score = _fallback_ranking(term)
+
+    stmt = select(*CONTACT_COLUMNS, score.label("score")).filter(
+        Contact.user_id == user.id, match
+    )
+    if cursor:
+        values = decode_cursor(cursor)
+        last_score, last_id = values.get("score"), values.get("id")
+        if not isinstance(last_score, (int, float)) or not isinstance(last_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        stmt = stmt.filter(
+            or_(score < last_score, and_(score == last_score, Contact.id > last_id))
+        )
+    result = await db.execute(stmt.order_by(score.desc(), Contact.id).limit(limit + 1))
+    rows = result.all()
+
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        return rows[:limit], encode_cursor({"score": last.score, "id": last.id})
+    return rows, None
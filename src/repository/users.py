@@ -6,7 +6,7 @@ from fastapi import HTTPException, status, Depends
 from typing import Optional, Union
 from libgravatar import Gravatar
 
-from src.database.db import get_db
+from src.database.db import get_db, invalidate_user_cache
 from src.database.models import User
 from src.schemas.schemas import UserCreate, UserResponse
 from src.services.auth import auth_service
@@ -38,7 +38,7 @@ async def create_user(
             status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
         )
 
-    hashed_password = auth_service.get_password_hash(body.password)
+    hashed_password = await auth_service.hash_password(body.password)
 
     # Get avatar link from Gravatar
     try:
@@ -124,6 +124,7 @@ async def confirm_email(
         db.add(user)
         await db.commit()
         await db.refresh(user)
+        await invalidate_user_cache(email)
         logger.info(
             f"Email {email} verified successfully, is_verified={user.is_verified}"
         )
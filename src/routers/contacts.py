@@ -1,24 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from typing import Any, Dict, Literal, Optional, List
 from datetime import date
 
-from src.database.db import get_db
+import io
+
+from src.database.db import pin_reads_for_user
+from src.database.shards import (
+    fan_out,
+    get_shard_db,
+    get_writable_shard_db,
+    shard_map,
+    shard_of,
+)
+from src.database.timeouts import is_statement_timeout
 from src.schemas.schemas import (
     ContactCreate,
     ContactResponse,
     ContactUpdate,
+    ContactBulkUpdate,
+    ContactIds,
+    BulkItemResult,
+    BulkResponse,
+    ImportReport,
     BirthdayResponse,
+    ContactStats,
 )
 from src.repository.contacts import (
+    count_contacts,
     create_contact,
     get_contacts,
+    get_contacts_page,
+    get_contacts_by_ids,
     get_contact,
     update_contact,
     delete_contact,
-    search_contacts,
     get_upcoming_birthdays,
+    bulk_create_contacts,
+    bulk_update_contacts,
+    bulk_delete_contacts,
+    stream_contacts,
 )
+from src.repository.search import search_contacts
+from src.services.export import (
+    FILE_EXTENSIONS,
+    MEDIA_TYPES,
+    render_export,
+    render_json,
+)
+from src.services.importer import format_validation_error, import_contacts
+from src.services.result_cache import contacts_cache
 from src.database.models import User
 from src.services.auth import auth_service
 
@@ -27,11 +70,69 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+MAX_BULK_ITEMS = 1000
+
+_birthday_list = TypeAdapter(List[BirthdayResponse])
+
+
+def _page_entry(body: str, next_cursor: Optional[str] = None) -> str:
+    """
+    Packs a JSON response body and its next-page token for the result cache.
+
+    Cursors are base64url, so the first line holds the cursor (empty on the
+    last page) and the rest is the body, which is served without re-encoding.
+
+    Args:
+        body: The JSON response body.
+        next_cursor: The token for the next page, if any.
+
+    Returns:
+        The cache entry.
+    """
+    return f"{next_cursor or ''}\n{body}"
+
+
+def _page_response(entry: str) -> Response:
+    next_cursor, body = entry.split("\n", 1)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _validate_items(items: List[Dict[str, Any]], schema):
+    """
+    Validates every item of a bulk request on its own.
+
+    Args:
+        items: The raw items from the request body.
+        schema: The Pydantic model to validate each item against.
+
+    Returns:
+        A tuple of the valid `(index, model)` pairs and the results for the
+        items that failed validation.
+    """
+    valid, invalid = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            invalid.append(
+                BulkItemResult(
+                    index=index, status="invalid", detail=format_validation_error(e)
+                )
+            )
+    return valid, invalid
+
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    results.sort(key=lambda result: result.index)
+    failed = sum(result.status in ("invalid", "not_found") for result in results)
+    return BulkResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_contact(
     contact: ContactCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_writable_shard_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
@@ -46,26 +147,177 @@ async def create_new_contact(
         The newly created contact
     """
     try:
-        return await create_contact(db, contact, current_user)
+        db_contact = await create_contact(db, contact, current_user)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
+    await contacts_cache.bump(current_user.id)
+    return db_contact
+
+
+@router.post("/bulk", response_model=BulkResponse)
+async def create_contacts_bulk(
+    contacts: List[Dict[str, Any]] = Body(max_length=MAX_BULK_ITEMS),
+    db: AsyncSession = Depends(get_writable_shard_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Create several contacts in one request.
+
+    Each item is validated on its own; the valid ones are written with a
+    single multi-row INSERT and invalid ones are reported without failing
+    the batch.
+
+    Args:
+        contacts: The contacts to create.
+        db: Database session
+        current_user: The current user
+
+    Returns:
+        The outcome for every item, in request order.
+    """
+    valid, results = _validate_items(contacts, ContactCreate)
+    try:
+        created = await bulk_create_contacts(
+            db, [contact for _, contact in valid], current_user
+        )
+    except Exception as e:
+        logger.error(f"Error creating contacts in bulk: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+    if created:
+        await contacts_cache.bump(current_user.id)
+    results.extend(
+        BulkItemResult(index=index, id=db_contact.id, status="created")
+        for (index, _), db_contact in zip(valid, created)
+    )
+    return _bulk_response(results)
+
+
+@router.patch("/bulk", response_model=BulkResponse)
+async def update_contacts_bulk(
+    contacts: List[Dict[str, Any]] = Body(max_length=MAX_BULK_ITEMS),
+    db: AsyncSession = Depends(get_writable_shard_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Partially update several contacts in one request.
+
+    Every item must carry the ``id`` of the contact to change plus the fields
+    to update. Items that are invalid or refer to unknown contacts are reported
+    without failing the batch.
+
+    Args:
+        contacts: The updates to apply.
+        db: Database session
+        current_user: The current user
+
+    Returns:
+        The outcome for every item, in request order.
+    """
+    valid, results = _validate_items(contacts, ContactBulkUpdate)
+    try:
+        updated = set(
+            await bulk_update_contacts(
+                db, [contact for _, contact in valid], current_user
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error updating contacts in bulk: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+    if updated:
+        await contacts_cache.bump(current_user.id)
+    results.extend(
+        BulkItemResult(
+            index=index,
+            id=contact.id,
+            status="updated" if contact.id in updated else "not_found",
+        )
+        for index, contact in valid
+    )
+    return _bulk_response(results)
+
+
+@router.delete("/bulk", response_model=BulkResponse)
+async def delete_contacts_bulk(
+    body: ContactIds,
+    db: AsyncSession = Depends(get_writable_shard_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Delete several contacts in one request with a single DELETE statement.
+
+    Args:
+        body: The IDs of the contacts to delete.
+        db: Database session
+        current_user: The current user
+
+    Returns:
+        The outcome for every ID, in request order.
+
+    Raises:
+        HTTPException: If more than ``MAX_BULK_ITEMS`` IDs are given.
+    """
+    if len(body.ids) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_ITEMS} ids per request",
+        )
+    try:
+        deleted = set(await bulk_delete_contacts(db, body.ids, current_user))
+    except Exception as e:
+        logger.error(f"Error deleting contacts in bulk: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+    if deleted:
+        await contacts_cache.bump(current_user.id)
+    return _bulk_response(
+        [
+            BulkItemResult(
+                index=index,
+                id=contact_id,
+                status="deleted" if contact_id in deleted else "not_found",
+            )
+            for index, contact_id in enumerate(body.ids)
+        ]
+    )
 
 
 @router.get("/", response_model=List[ContactResponse])
 async def read_contacts(
     skip: int = 0,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    ids: Optional[List[int]] = Query(None, max_length=MAX_BULK_ITEMS),
+    db: AsyncSession = Depends(get_shard_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
     Retrieve a list of contacts for the current user.
 
+    With ``ids`` the listing is replaced by a multi-get that returns the
+    requested contacts in one query; unknown IDs are skipped.
+
+    The first page (``skip=0``) and every page requested with ``cursor`` use
+    keyset pagination: when more contacts are available, the token for the
+    next page is returned in the ``X-Next-Cursor`` response header. Passing
+    ``skip`` keeps the legacy offset behaviour.
+
+    Results are served from the per-user result cache when possible.
+
     Args:
         skip: Number of contacts to skip before starting to collect the result set.
         limit: Maximum number of contacts to return.
+        cursor: The ``X-Next-Cursor`` token returned with the previous page.
+        ids: IDs of specific contacts to retrieve.
         db: Database session for executing queries.
         current_user: The user whose contacts are to be retrieved.
 
@@ -73,21 +325,157 @@ async def read_contacts(
         A list of contacts associated with the current user.
 
     Raises:
-        HTTPException: If an error occurs while retrieving contacts.
+        HTTPException: If both ``skip`` and ``cursor`` are given, if the cursor
+            is invalid, or if an error occurs while retrieving contacts.
     """
-
+    if cursor and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either skip or cursor, not both",
+        )
+    key, entry = await contacts_cache.lookup(
+        current_user.id,
+        "list",
+        {"skip": skip, "limit": limit, "cursor": cursor, "ids": ids},
+    )
+    if entry is not None:
+        return _page_response(entry)
     try:
-        return await get_contacts(db, current_user, skip, limit)
+        next_cursor = None
+        if ids:
+            contacts = await get_contacts_by_ids(db, ids, current_user)
+        elif skip:
+            contacts = await get_contacts(db, current_user, skip, limit)
+        else:
+            contacts, next_cursor = await get_contacts_page(
+                db, current_user, limit, cursor
+            )
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
+    entry = _page_entry(render_json(contacts), next_cursor)
+    await contacts_cache.store(key, entry)
+    return _page_response(entry)
+
+
+@router.post("/import", response_model=ImportReport)
+async def import_contacts_file(
+    file: UploadFile = File(),
+    format: Literal["csv", "vcard"] = "csv",
+    db: AsyncSession = Depends(get_writable_shard_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Import contacts from an uploaded CSV or vCard file.
+
+    The file is parsed as a stream and validated in chunks on a worker
+    thread, then bulk-loaded (COPY on PostgreSQL). Invalid rows are skipped
+    and reported.
+
+    Args:
+        file: The CSV or vCard file to import.
+        format: The file format: ``csv`` or ``vcard``.
+        db: Database session
+        current_user: The current user
+
+    Returns:
+        The number of processed, imported and failed rows with per-row errors.
+
+    Raises:
+        HTTPException: If the file is not valid UTF-8, too many imports are
+            queued or the load fails.
+    """
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = await import_contacts(db, lines, format, current_user)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error importing contacts: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+    if report.imported:
+        await contacts_cache.bump(current_user.id)
+    return report
+
+
+@router.get("/export")
+async def export_contacts(
+    format: Literal["csv", "ndjson", "vcard"] = "csv",
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    Export all contacts of the current user as CSV, NDJSON or vCard.
+
+    Rows are read through a server-side cursor and written to the response as
+    they arrive, so memory use stays flat for any address book size. The
+    stream owns its session on the user's shard because request-scoped
+    sessions are closed before a streaming body is sent; that session is
+    pinned like the request's, so a user who just wrote reads the export
+    from the primary rather than a lagging replica.
+
+    Args:
+        format: The export format: ``csv``, ``ndjson`` or ``vcard``.
+        current_user: The current user.
+
+    Returns:
+        A streaming response with the exported contacts as an attachment.
+    """
+
+    async def body():
+        async with shard_map.session(shard_of(current_user)) as db:
+            await pin_reads_for_user(db, current_user.id)
+            async for chunk in render_export(stream_contacts(db, current_user), format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="contacts.{FILE_EXTENSIONS[format]}"'
+        },
+    )
+
+
+@router.get("/stats", response_model=ContactStats)
+async def read_contact_stats(
+    current_user: User = Depends(auth_service.get_current_admin),
+):
+    """
+    Count the contacts on every shard. Admin only.
+
+    The shards are queried in parallel.
+
+    Args:
+        current_user: The current user, who must be an admin.
+
+    Returns:
+        The total number of contacts and the count per shard.
+    """
+    try:
+        counts = await fan_out(count_contacts)
+    except Exception as e:
+        logger.error(f"Error counting contacts: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+    return ContactStats(total=sum(counts.values()), shards=counts)
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
 async def read_contact(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_shard_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
@@ -124,15 +512,23 @@ async def read_contact(
 
 @router.get("/search/", response_model=List[ContactResponse])
 async def search_contacts_by_query(
-    query: str,
-    db: AsyncSession = Depends(get_db),
+    query: str = Query(min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_shard_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
     Search for contacts by query string.
 
+    Matches are ordered by relevance. When more matches are available, the
+    token for the next page is returned in the ``X-Next-Cursor`` response header.
+    Results are served from the per-user result cache when possible.
+
     Args:
         query: The query string to search for.
+        limit: Maximum number of contacts to return.
+        cursor: The ``X-Next-Cursor`` token returned with the previous page.
         db: Database session for executing queries.
         current_user: The current user.
 
@@ -140,23 +536,42 @@ async def search_contacts_by_query(
         A list of contacts associated with the current user that match the search query.
 
     Raises:
-        HTTPException: If an error occurs while searching for contacts.
+        HTTPException: If the cursor is invalid, 503 if the search exceeds its
+            statement timeout, or if an error occurs while searching for
+            contacts.
     """
+    key, entry = await contacts_cache.lookup(
+        current_user.id, "search", {"query": query, "limit": limit, "cursor": cursor}
+    )
+    if entry is not None:
+        return _page_response(entry)
     try:
-        return await search_contacts(db, query, current_user)
+        contacts, next_cursor = await search_contacts(
+            db, query, current_user, limit, cursor
+        )
+    except HTTPException as e:
+        raise e
     except Exception as e:
+        if is_statement_timeout(e):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Search took too long, please narrow the query",
+            )
         logger.error(f"Error searching contacts: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error",
         )
+    entry = _page_entry(render_json(contacts), next_cursor)
+    await contacts_cache.store(key, entry)
+    return _page_response(entry)
 
 
 @router.put("/{contact_id}", response_model=ContactResponse)
 async def update_existing_contact(
     contact_id: int,
     contact: ContactUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_writable_shard_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
@@ -180,13 +595,14 @@ async def update_existing_contact(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
+    await contacts_cache.bump(current_user.id)
     return updated_contact
 
 
 @router.delete("/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_existing_contact(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_writable_shard_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
@@ -209,6 +625,7 @@ async def delete_existing_contact(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
+    await contacts_cache.bump(current_user.id)
     return None
 
 
@@ -216,7 +633,7 @@ async def delete_existing_contact(
 async def get_contacts_with_upcoming_birthdays(
     days: int = 7,
     start_date: Optional[date] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_shard_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     """
@@ -227,14 +644,28 @@ async def get_contacts_with_upcoming_birthdays(
         start_date: The start date of the range to check for birthdays. If None, defaults to today.
 
     Returns:
-        A list of contacts with upcoming birthdays, along with a message describing the birthday.
+        A list of contacts with upcoming birthdays ordered by date, each with a
+        message describing the birthday and the date it falls on.
 
     Raises:
-        HTTPException: If there is an error while retrieving the list of contacts.
+        HTTPException: If `days` is not positive, or if there is an error while
+            retrieving the list of contacts.
     """
+    start_date = start_date or date.today()
+    key, entry = await contacts_cache.lookup(
+        current_user.id, "birthdays", {"days": days, "start_date": start_date}
+    )
+    if entry is not None:
+        return _page_response(entry)
     try:
-        return await get_upcoming_birthdays(db, current_user, days, start_date)
+        upcoming = await get_upcoming_birthdays(db, current_user, days, start_date)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
+    birthdays = _birthday_list.validate_python(upcoming)
+    entry = _page_entry(_birthday_list.dump_json(birthdays).decode())
+    await contacts_cache.store(key, entry)
+    return _page_response(entry)
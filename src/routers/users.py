@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from fastapi import (
     APIRouter,
     HTTPException,
@@ -11,11 +12,13 @@ from fastapi import (
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.database.db import get_db, rc
+from src.database.db import get_db, invalidate_user_cache
 from src.schemas.schemas import (
     UserCreate,
     UserResponse,
     Token,
+    RefreshRequest,
+    LogoutRequest,
     RequestEmail,
     PasswordResetRequest,
     PasswordResetConfirm,
@@ -24,6 +27,7 @@ from src.services.email import send_verification_email
 from src.services.auth import auth_service
 from src.services.base import settings
 from src.services.get_upload import get_upload_file_service
+from src.services.redis_batch import BatchedRateLimiter
 from src.database.models import Role, User
 from src.services.roles import RoleAccess
 from src.repository.users import (
@@ -84,12 +88,15 @@ async def login(
     """
     Authenticates a user using username and password.
 
+    Password verification runs off the event loop; a hash made with a
+    deprecated scheme is transparently replaced on success.
+
     Args:
         form_data: The OAuth2 form data containing the username and password.
         db: The database session to use.
 
     Returns:
-        An access token and token type.
+        An access token, a refresh token and the token type.
 
     Raises:
         HTTPException: If the credentials are invalid.
@@ -97,9 +104,12 @@ async def login(
     email = form_data.username
     user_model = await get_user_by_email(email, db)
 
-    if not user_model or not auth_service.verify_password(
-        form_data.password, user_model.hashed_password
-    ):
+    valid, new_hash = False, None
+    if user_model:
+        valid, new_hash = await auth_service.check_password(
+            form_data.password, user_model.hashed_password
+        )
+    if not valid:
         logger.warning(f"Failed login attempt for user: {form_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,8 +117,79 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = await auth_service.create_access_token({"sub": user_model.email})
-    return {"access_token": access_token, "token_type": "bearer"}
+    if new_hash:
+        user_model.hashed_password = new_hash
+        await db.commit()
+
+    access_token = await auth_service.create_user_access_token(user_model)
+    refresh_token = await auth_service.create_refresh_token(user_model)
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post(
+    "/refresh",
+    response_model=Token,
+)
+async def refresh(
+    body: RefreshRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Exchanges a refresh token for a new access token and refresh token.
+
+    Unlike login this hashes no password. Each refresh token can be used
+    once; reusing one revokes every token of its login.
+
+    Args:
+        body: The request containing the refresh token.
+        db: The database session to use.
+
+    Returns:
+        An access token, a refresh token and the token type.
+
+    Raises:
+        HTTPException: If the refresh token is invalid, reused or revoked.
+    """
+    access_token, refresh_token = await auth_service.refresh_access_token(
+        body.refresh_token, db
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/logout")
+async def logout(
+    body: Optional[LogoutRequest] = None,
+    token: str = Depends(auth_service.oauth2_scheme),
+    current_user: dict = Depends(auth_service.get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Logs the current user out.
+
+    The access token of the request and the given refresh token, if it was
+    issued to the same user, stop working at once on every worker. With ``everywhere`` set, every other
+    token of the user is revoked as well.
+
+    Args:
+        body: The refresh token to revoke and whether to log out everywhere.
+        token: The access token of the request.
+        current_user: The current authenticated user obtained from the token.
+        db: The database session to use.
+
+    Returns:
+        A message indicating that the user was logged out.
+    """
+    body = body or LogoutRequest()
+    await auth_service.logout(token, body.refresh_token, body.everywhere, db)
+    return {"message": "Logged out"}
 
 
 @router.post("/request_email")
@@ -187,12 +268,12 @@ async def verify_email(
     "/me",
     response_model=UserResponse,
     dependencies=[
+        Depends(BatchedRateLimiter(times=5, seconds=60)),
         Depends(allowed_get),
-        Depends(RateLimiter(times=5, seconds=60)),
     ],
 )
 async def read_users_me(
-    current_user: dict = Depends(auth_service.get_current_user),
+    current_user: dict = Depends(auth_service.get_current_profile),
 ):
     """
     Retrieve the current authenticated user's information.
@@ -205,8 +286,9 @@ async def read_users_me(
         avatar URL, and roles as a UserResponse model.
 
     Dependencies:
+        - Rate limiting to 5 requests per 60 seconds, in the same Redis round
+          trip as the reads that authenticate the user.
         - Role-based access control allowing 'admin' and 'user' roles.
-        - Rate limiting to 5 requests per 60 seconds.
     """
 
     return UserResponse.model_validate(
@@ -259,7 +341,7 @@ async def update_avatar(
     db.add(user)
     await db.commit()
     await db.refresh(user)
-    await rc.delete(f"fetch_user:{current_user['email']}")
+    await invalidate_user_cache(current_user["email"])
     return UserResponse.model_validate(user)
 
 
@@ -1,8 +1,8 @@
 """Data Validation with Pydantic - ensures data sent to API is valid"""
 
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, field_validator
 from datetime import date
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 from src.database.models import Role
 
@@ -29,14 +29,66 @@ class ContactUpdate(BaseModel):
     birthday: Optional[date] = None
     additional_data: Optional[str] = None
 
+    @field_validator("first_name", "last_name", "email", "phone_number", "birthday")
+    @classmethod
+    def required_fields_not_null(cls, value):
+        """Required contact fields may be left out of an update, but not nulled."""
+        if value is None:
+            raise ValueError("may be omitted but not set to null")
+        return value
+
 
 class ContactResponse(ContactBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
 
+class ContactBulkUpdate(ContactUpdate):
+    id: int
+
+
+class ContactIds(BaseModel):
+    ids: List[int]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found", "invalid"]
+    detail: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class ContactStats(BaseModel):
+    total: int
+    shards: Dict[int, int]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
+
 class BirthdayResponse(BaseModel):
     message: str
+    id: Optional[int] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    birthday: Optional[date] = None
+    next_birthday: Optional[date] = None
+    days_until: Optional[int] = None
 
 
 # User Schemas
@@ -57,9 +109,19 @@ class UserResponse(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+    everywhere: bool = False
+
+
 class RequestEmail(BaseModel):
     email: EmailStr
 
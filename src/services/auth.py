@@ -4,20 +4,73 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
 from src.services.base import settings
 from src.services.email import send_reset_email
-from src.database.db import get_db, get_user_from_cache, rc
-from src.database.models import Role
-
+from src.services.executor import BoundedExecutor
+from src.database.db import (
+    get_db,
+    get_user_from_cache,
+    invalidate_user_cache,
+    pin_reads_for_user,
+    rc,
+)
+from src.database.models import Role, User
+from src.services.cache import CachedUser, TTLCache
+from src.services.refresh_tokens import RefreshTokenError, refresh_tokens
+from src.services.revocation import (
+    announce_token_version,
+    is_revoked,
+    revocation_listener,
+    revoke_token,
+)
+from src.services.token_versions import is_current, revoke_tokens
+
+import hashlib
 import logging
+import secrets
+import time
 
 logger = logging.getLogger(__name__)
 
+# Decoded claims of verified access tokens, keyed by the token's SHA-256.
+# Entries expire with the token; revocation is checked on every request
+# after the claims are read, so a cached token is still revoked at once.
+access_token_cache = TTLCache(
+    "access_tokens",
+    settings.ACCESS_TOKEN_CACHE_SIZE,
+    settings.JWT_EXPIRE_MINUTES * 60,
+)
+
+
+def _password_schemes() -> List[str]:
+    """
+    Returns the passlib schemes to use, preferred scheme first.
+
+    Hashes made with any later scheme are marked deprecated, so they are
+    upgraded on the next successful login.
+    """
+    if settings.PASSWORD_HASH_SCHEME == "argon2":
+        try:
+            import argon2  # noqa: F401
+
+            return ["argon2", "bcrypt"]
+        except ImportError:
+            logger.warning(
+                "argon2-cffi is not installed (poetry install -E argon2), using bcrypt"
+            )
+    return ["bcrypt"]
+
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = CryptContext(schemes=_password_schemes(), deprecated="auto")
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
+    password_executor = BoundedExecutor(
+        "password_hash",
+        settings.PASSWORD_HASH_WORKERS,
+        settings.PASSWORD_HASH_MAX_QUEUE,
+    )
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
@@ -44,6 +97,43 @@ class Auth:
         """
         return self.pwd_context.hash(password)
 
+    async def hash_password(self, password: str) -> str:
+        """
+        Hashes a password on the password executor, off the event loop.
+
+        Args:
+            password (str): The plain password to hash.
+
+        Returns:
+            str: The hashed password.
+
+        Raises:
+            HTTPException: With status 503 if too many hashes are already queued.
+        """
+        return await self.password_executor.run(self.get_password_hash, password)
+
+    async def check_password(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verifies a password on the password executor, off the event loop.
+
+        Args:
+            plain_password (str): The plain password to verify.
+            hashed_password (str): The stored hash to verify against.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether the password is valid, and a
+                replacement hash if the stored one uses a deprecated scheme or
+                settings (None otherwise).
+
+        Raises:
+            HTTPException: With status 503 if too many hashes are already queued.
+        """
+        return await self.password_executor.run(
+            self.pwd_context.verify_and_update, plain_password, hashed_password
+        )
+
     async def create_access_token(
         self, data: dict, expires_delta: float = settings.JWT_EXPIRE_MINUTES
     ) -> str:
@@ -67,6 +157,93 @@ class Auth:
             to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
         )
 
+    async def create_user_access_token(self, user: User) -> str:
+        """
+        Creates the access token issued to a user at login.
+
+        The token carries a random id (``jti``) so it can be revoked on its
+        own, the user's id and the user's token version. With
+        ``settings.AUTH_STATELESS`` it also carries the roles,
+        verification status and shard, and lives for
+        ``settings.AUTH_STATELESS_EXPIRE_MINUTES``.
+
+        Args:
+            user (User): The authenticated user.
+
+        Returns:
+            str: The encoded JWT access token.
+        """
+        claims = {
+            "sub": user.email,
+            "uid": user.id,
+            "ver": user.token_version or 0,
+            "jti": secrets.token_urlsafe(8),
+        }
+        if not settings.AUTH_STATELESS:
+            return await self.create_access_token(claims)
+        claims.update(
+            {
+                "roles": Role(user.roles).value,
+                "verified": bool(user.is_verified),
+                "shard": user.shard or 0,
+            }
+        )
+        return await self.create_access_token(
+            claims, settings.AUTH_STATELESS_EXPIRE_MINUTES
+        )
+
+    async def create_refresh_token(self, user: User) -> str:
+        """
+        Creates the refresh token issued to a user at login.
+
+        Args:
+            user (User): The authenticated user.
+
+        Returns:
+            str: The opaque refresh token.
+        """
+        return await refresh_tokens.issue(user.email, user.token_version or 0)
+
+    async def refresh_access_token(
+        self, refresh_token: str, db: AsyncSession
+    ) -> Tuple[str, str]:
+        """
+        Exchanges a refresh token for a new access token and refresh token.
+
+        No password is hashed: the refresh token is rotated in Redis and the
+        user comes from the user cache. Tokens issued before the user's
+        tokens were revoked are rejected, and so is any refresh token that
+        was already used, which also revokes the rest of its family.
+
+        Args:
+            refresh_token (str): The refresh token presented by the client.
+            db (AsyncSession): The database session to use on a cache miss.
+
+        Returns:
+            Tuple[str, str]: The new access token and refresh token.
+
+        Raises:
+            HTTPException: With status 401 if the refresh token is invalid,
+                reused or revoked.
+        """
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            email, version, new_refresh_token = await refresh_tokens.rotate(
+                refresh_token
+            )
+        except RefreshTokenError:
+            raise credentials_exception
+        user = await get_user_from_cache(email, db)
+        if version < (user.token_version or 0):
+            await refresh_tokens.revoke(new_refresh_token, email)
+            raise credentials_exception
+        access_token = await self.create_user_access_token(user)
+        return access_token, new_refresh_token
+
     async def create_email_token(self, data: dict) -> str:
         """
         Creates a JWT email token.
@@ -89,12 +266,51 @@ class Auth:
             to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
         )
 
+    def decode_access_token(self, token: str) -> dict:
+        """
+        Verifies an access token and returns its claims.
+
+        Clients reuse a token for many requests, so verified claims are
+        cached until the token expires and the signature is checked once.
+
+        Args:
+            token (str): The JWT access token.
+
+        Returns:
+            dict: The token's claims.
+
+        Raises:
+            JWTError: If the token is invalid or expired.
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        payload = access_token_cache.get(key)
+        if payload is not None:
+            return payload
+        payload = jwt.decode(
+            token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+        )
+        expires_in = payload.get("exp", 0) - time.time()
+        if expires_in > 0:
+            access_token_cache.set(key, payload, expires_in)
+        return payload
+
     async def get_current_user(
         self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
     ) -> dict:
         """
         Gets the current authenticated user by verifying the JWT access token.
 
+        Stateless tokens (see `create_user_access_token`) are authorized from
+        their claims alone, without network I/O, while the revocation
+        listener keeps this process in sync with token version bumps made
+        anywhere; otherwise they are looked up like other tokens. A user
+        authorized from claims has no avatar URL, so handlers that need the
+        full profile depend on `get_current_profile`. Other tokens are
+        resolved through the user cache. Either way, a token older than the user's token version, or
+        one revoked at logout, is rejected; while the listener is synced, a
+        token that was not revoked is told apart by the in-process Bloom
+        filter without a Redis call, and until then it is checked in Redis.
+
         Args:
             token (str, optional): The JWT access token to verify. Defaults to
                 Depends(oauth2_scheme).
@@ -111,19 +327,110 @@ class Auth:
             headers={"WWW-Authenticate": "Bearer"},
         )
         try:
-            payload = jwt.decode(
-                token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
-            )
+            payload = self.decode_access_token(token)
             email = payload.get("sub")
             if email is None:
                 raise credentials_exception
         except JWTError:
             raise credentials_exception
+        jti = payload.get("jti")
+        if jti is not None and await is_revoked(jti):
+            raise credentials_exception
 
-        user = await get_user_from_cache(email, db)
+        version = payload.get("ver", 0)
+        if (
+            settings.AUTH_STATELESS
+            and "roles" in payload
+            and revocation_listener.synced
+        ):
+            user = CachedUser(
+                payload["uid"],
+                email,
+                payload.get("verified", False),
+                None,
+                payload.get("roles"),
+                payload.get("shard", 0),
+                version,
+            )
+            if not is_current(user.id, version):
+                raise credentials_exception
+        else:
+            user = await get_user_from_cache(email, db)
+            if version < (user.get("token_version") or 0) or not is_current(
+                user.id, version
+            ):
+                raise credentials_exception
+        await pin_reads_for_user(db, user.get("id"))
 
         return user
 
+    async def get_current_profile(
+        self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+    ) -> CachedUser:
+        """
+        Gets the full record of the current user, including the avatar URL.
+
+        In stateless mode this is the only place a request looks the user up.
+
+        Args:
+            token (str, optional): The JWT access token to verify. Defaults to
+                Depends(oauth2_scheme).
+            db (AsyncSession, optional): The database session to use. Defaults to
+                Depends(get_db).
+
+        Returns:
+            CachedUser: The current user's cached record.
+
+        Raises:
+            HTTPException: With status 401 if the token is invalid or revoked.
+        """
+        user = await self.get_current_user(token, db)
+        if not settings.AUTH_STATELESS:
+            return user
+        profile = await get_user_from_cache(user.email, db)
+        if user.token_version < (profile.token_version or 0):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return profile
+
+    async def logout(
+        self,
+        token: str,
+        refresh_token: Optional[str],
+        everywhere: bool,
+        db: AsyncSession,
+    ) -> None:
+        """
+        Revokes the presented access token and refresh token.
+
+        Args:
+            token (str): The verified access token of the request.
+            refresh_token (Optional[str]): The refresh token of the same login,
+                if the client has one; a token of another user is ignored.
+            everywhere (bool): Also revoke every other token of the user by
+                bumping the user's token version.
+            db (AsyncSession): The database session to use.
+        """
+        from src.repository.users import get_user_by_email
+
+        payload = self.decode_access_token(token)
+        jti = payload.get("jti")
+        if jti is not None:
+            await revoke_token(jti, payload["exp"] - time.time())
+        email = payload["sub"]
+        if refresh_token and not await refresh_tokens.revoke(refresh_token, email):
+            logger.warning(f"Ignored a refresh token not issued to {email} at logout")
+        if not everywhere:
+            return
+        user = await get_user_by_email(email, db)
+        revoke_tokens(user)
+        await db.commit()
+        await invalidate_user_cache(user.email)
+        await announce_token_version(user)
+
     async def get_email_from_token(self, token: str) -> str:
         """
         Gets the email address associated with a JWT email token.
@@ -196,7 +503,8 @@ class Auth:
                         or if the user is not found in the database.
 
         Side Effects:
-            Updates the user's password in the database and deletes the reset token from the cache.
+            Updates the user's password in the database, revokes the user's
+            access tokens and deletes the reset token from the cache.
         """
         logger.info(f"rc in reset_password: {rc}")
         from src.repository.users import get_user_by_email
@@ -210,9 +518,12 @@ class Auth:
         user = await get_user_by_email(email, db)
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
-        hashed_password = self.get_password_hash(new_password)
+        hashed_password = await self.hash_password(new_password)
         user.hashed_password = hashed_password
+        revoke_tokens(user)
         await db.commit()
+        await invalidate_user_cache(email)
+        await announce_token_version(user)
         await rc.delete(f"reset_token:{token}")
 
     async def get_current_admin(self, user: dict = Depends(get_current_user)) -> dict:
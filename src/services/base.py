@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, Optional
 import os
 
 
@@ -7,6 +8,20 @@ class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str
     JWT_EXPIRE_MINUTES: int
+    # Embed id, roles, verification and shard in access tokens so requests
+    # are authorized without a user lookup. Such tokens live for
+    # AUTH_STATELESS_EXPIRE_MINUTES, which bounds how stale their claims get.
+    AUTH_STATELESS: bool = False
+    AUTH_STATELESS_EXPIRE_MINUTES: int = 15
+    # Token version bumps remembered in process to reject stateless tokens.
+    TOKEN_VERSION_CACHE_SIZE: int = 100000
+    # Verified access tokens kept decoded in process until they expire.
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+    # Lifetime of a refresh token family, counted from the login.
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # In-process Bloom filter of revoked access token ids (1 MiB by default).
+    REVOCATION_BLOOM_BITS: int = 1 << 23
+    REVOCATION_BLOOM_HASHES: int = 7
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
@@ -21,8 +36,48 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     PGADMIN_DEFAULT_EMAIL: str
     PGADMIN_DEFAULT_PASSWORD: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_PREWARM: int = 5
+    DB_ECHO: bool = False
+    # Set when DATABASE_URL points at PgBouncer in transaction pooling mode.
+    DB_PGBOUNCER_MODE: bool = False
+    # Plain SELECTs go to this replica when set; see src/database/routing.py.
+    DATABASE_REPLICA_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 2.0
+    REPLICA_LAG_CHECK_SECONDS: float = 1.0
+    # How long a user's reads stay on the primary after they wrote.
+    REPLICA_STICKY_SECONDS: int = 5
+    # Extra contact shards as a JSON object, e.g. '{"1": "postgresql+asyncpg://..."}'.
+    # Shard 0 is always DATABASE_URL, which also holds the users table.
+    DATABASE_SHARD_URLS: Dict[int, str] = {}
+    # Per-statement limit set on every connection; 0 disables. Behind
+    # PgBouncer, set it on the database role instead.
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # Overrides keyed by "METHOD /route/template", applied with SET LOCAL.
+    DB_ROUTE_STATEMENT_TIMEOUTS_MS: Dict[str, int] = {
+        "GET /api/contacts/contacts/search/": 2000,
+    }
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_SAMPLE_RATE: float = 0.0
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    # Contact list, search and birthday results cached in Redis; 0 disables.
+    RESULT_CACHE_TTL_SECONDS: int = 300
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    # "argon2" hashes new passwords with argon2id and rehashes bcrypt
+    # passwords on the next successful login. It needs the optional
+    # argon2-cffi dependency: ``poetry install -E argon2``.
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    # Threads that parse and validate uploaded imports off the event loop.
+    IMPORT_PARSE_WORKERS: int = 2
+    IMPORT_PARSE_MAX_QUEUE: int = 16
 
     model_config = SettingsConfigDict(
         env_file=("/app/.env.test" if os.getenv("TEST_ENV") == "1" else ".env"),
@@ -0,0 +1,246 @@
+from collections import OrderedDict
+from prometheus_client import Counter, Gauge
+from typing import Any, Hashable, Optional
+
+import hashlib
+import time
+
+CACHE_REQUESTS = Counter(
+    "inprocess_cache_requests_total",
+    "In-process cache lookups by cache name and result",
+    ["cache", "result"],
+)
+CACHE_SIZE = Gauge(
+    "inprocess_cache_entries",
+    "Number of entries held by an in-process cache",
+    ["cache"],
+)
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, name: str, max_size: int, ttl: float):
+        """
+        Initialize a TTLCache.
+
+        Args:
+            name: The cache name used as the metrics label.
+            max_size: The maximum number of entries; the least recently used
+                entry is evicted when the cache is full.
+            ttl: The default number of seconds an entry stays valid.
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+        self._size = CACHE_SIZE.labels(name)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value for a key, or None if it is missing or expired.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached value or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                self._size.set(len(self._entries))
+            self._misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        self._hits.inc()
+        return entry[1]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value like `get`, without counting a lookup or
+        refreshing the entry's recency.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached value or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores a value, evicting the least recently used entry if needed.
+
+        Args:
+            key: The cache key.
+            value: The value to store.
+            ttl: Seconds the entry stays valid; defaults to the cache TTL.
+        """
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._size.set(len(self._entries))
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Removes a key from the cache if present.
+
+        Args:
+            key: The cache key.
+        """
+        if self._entries.pop(key, None) is not None:
+            self._size.set(len(self._entries))
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        self._entries.clear()
+        self._size.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BloomFilter:
+    """
+    Fixed-size in-process Bloom filter of strings.
+
+    Membership tests never miss an added item but may report items that
+    were never added, so a hit must be confirmed elsewhere.
+    """
+
+    def __init__(self, size: int, hashes: int):
+        """
+        Initialize a BloomFilter.
+
+        Args:
+            size: The number of bits.
+            hashes: The number of bits set per item.
+        """
+        self.size = size
+        self.hashes = hashes
+        self._bits = bytearray((size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * step) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        """
+        Adds an item to the filter.
+
+        Args:
+            item: The item to add.
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def clear(self) -> None:
+        """Removes every item from the filter."""
+        self._bits = bytearray(len(self._bits))
+
+
+class CachedUser:
+    """
+    Compact snapshot of an authenticated user.
+
+    Supports both attribute access (`user.id`, used by the repositories) and
+    the dict-style access (`user["email"]`, `user.get("roles")`) the routers
+    and role checks rely on.
+    """
+
+    __slots__ = (
+        "id",
+        "email",
+        "is_verified",
+        "avatar_url",
+        "roles",
+        "shard",
+        "token_version",
+    )
+
+    def __init__(
+        self,
+        id,
+        email,
+        is_verified=False,
+        avatar_url=None,
+        roles=None,
+        shard=0,
+        token_version=0,
+    ):
+        self.id = id
+        self.email = email
+        self.is_verified = is_verified
+        self.avatar_url = avatar_url
+        self.roles = roles
+        self.shard = shard
+        self.token_version = token_version
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CachedUser":
+        """
+        Builds a CachedUser from the dictionary produced by `User.to_dict`.
+
+        Args:
+            data: The user dictionary.
+
+        Returns:
+            The user record.
+        """
+        return cls(
+            data.get("id"),
+            data.get("email"),
+            data.get("is_verified", False),
+            data.get("avatar_url"),
+            data.get("roles"),
+            data.get("shard", 0),
+            data.get("token_version", 0),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Converts the record back to the `User.to_dict` representation.
+
+        Returns:
+            dict: The user's id, email, verification status, avatar URL, roles,
+                shard and token version.
+        """
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CachedUser):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CachedUser(id={self.id!r}, email={self.email!r}, roles={self.roles!r})"
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from prometheus_client import Gauge, Histogram
+from typing import Any, Callable
+
+import asyncio
+import time
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "offload_executor_queue_depth",
+    "Calls waiting for or running on an offload executor",
+    ["executor"],
+)
+EXECUTOR_WAIT_SECONDS = Histogram(
+    "offload_executor_wait_seconds",
+    "Time a call waited for a free executor worker",
+    ["executor"],
+)
+
+
+class BoundedExecutor:
+    """
+    Runs blocking calls on a dedicated thread pool with a bounded queue.
+
+    Keeps CPU-heavy work such as password hashing off the event loop. When
+    more than `max_queue` calls are pending, new calls are rejected with 503
+    instead of piling up behind each other.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        """
+        Initialize a BoundedExecutor.
+
+        Args:
+            name: The executor name used for thread names and metrics labels.
+            max_workers: The number of worker threads.
+            max_queue: The maximum number of pending calls, including the
+                ones currently running.
+        """
+        self.name = name
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._pending = 0
+        self._depth = EXECUTOR_QUEUE_DEPTH.labels(name)
+        self._wait = EXECUTOR_WAIT_SECONDS.labels(name)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a blocking function on the pool and awaits its result.
+
+        Args:
+            fn: The function to call.
+            *args: Positional arguments for `fn`.
+            **kwargs: Keyword arguments for `fn`.
+
+        Returns:
+            The function's return value.
+
+        Raises:
+            HTTPException: With status 503 if the queue is full.
+        """
+        if self._pending >= self.max_queue:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry",
+            )
+        submitted = time.perf_counter()
+
+        def call():
+            self._wait.observe(time.perf_counter() - submitted)
+            return fn(*args, **kwargs)
+
+        self._pending += 1
+        self._depth.set(self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, call)
+        finally:
+            self._pending -= 1
+            self._depth.set(self._pending)
+
+    def shutdown(self) -> None:
+        """Stops the worker threads once pending calls finish."""
+        self._pool.shutdown(wait=True)
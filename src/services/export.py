@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Iterable, Sequence
+
+EXPORT_FIELDS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "birthday",
+    "additional_data",
+)
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "vcard": "text/vcard",
+}
+
+FILE_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "vcard": "vcf"}
+
+
+def _csv_chunk(rows: Iterable[Sequence], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["birthday"] = record["birthday"].isoformat()
+        writer.writerow(record.values())
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(rows: Iterable[Sequence]) -> str:
+    lines = []
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["birthday"] = record["birthday"].isoformat()
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "".join(line + "\n" for line in lines)
+
+
+def _vcard_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+    )
+
+
+def _vcard_chunk(rows: Iterable[Sequence]) -> str:
+    cards = []
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        first = _vcard_escape(record["first_name"])
+        last = _vcard_escape(record["last_name"])
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"N:{last};{first};;;",
+            f"FN:{first} {last}",
+            f"EMAIL:{_vcard_escape(record['email'])}",
+            f"TEL:{_vcard_escape(record['phone_number'])}",
+            f"BDAY:{record['birthday'].isoformat()}",
+        ]
+        if record["additional_data"]:
+            lines.append(f"NOTE:{_vcard_escape(record['additional_data'])}")
+        lines.append("END:VCARD")
+        cards.append("\r\n".join(lines) + "\r\n")
+    return "".join(cards)
+
+
+def render_json(rows: Iterable[Sequence]) -> str:
+    """
+    Renders contact rows as the JSON array of a `ContactResponse` list.
+
+    Plain rows are serialized directly, without building ORM instances or
+    validating them through Pydantic on the way out.
+
+    Args:
+        rows: Rows whose leading columns follow `EXPORT_FIELDS`; extra
+            trailing columns (such as a search score) are ignored.
+
+    Returns:
+        The JSON document.
+    """
+    return json.dumps(
+        [dict(zip(EXPORT_FIELDS, row)) for row in rows],
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=date.isoformat,
+    )
+
+
+async def render_export(
+    batches: AsyncIterator[Sequence[Sequence]], export_format: str
+) -> AsyncIterator[str]:
+    """
+    Renders batches of contact rows into chunks of the requested format.
+
+    Only one batch is held in memory at a time, so the output can be streamed
+    regardless of how many contacts are exported.
+
+    Args:
+        batches: Batches of rows whose columns follow `EXPORT_FIELDS`.
+        export_format: One of "csv", "ndjson" or "vcard".
+
+    Yields:
+        Text chunks, one per batch (plus the CSV header).
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if export_format not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format == "csv":
+        yield _csv_chunk([], header=True)
+    async for batch in batches:
+        if export_format == "csv":
+            yield _csv_chunk(batch)
+        elif export_format == "ndjson":
+            yield _ndjson_chunk(batch)
+        else:
+            yield _vcard_chunk(batch)
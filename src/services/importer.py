@@ -0,0 +1,208 @@
+import csv
+import re
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.repository.contacts import copy_contacts
+from src.schemas.schemas import ContactCreate, ImportReport, ImportRowError
+from src.services.base import settings
+from src.services.executor import BoundedExecutor
+
+IMPORT_FORMATS = ("csv", "vcard")
+MAX_REPORTED_ERRORS = 1000
+
+# Reading, parsing and validating rows is CPU-bound and the upload is read
+# with blocking file I/O, so it runs here rather than on the event loop.
+import_executor = BoundedExecutor(
+    "contact_import",
+    settings.IMPORT_PARSE_WORKERS,
+    settings.IMPORT_PARSE_MAX_QUEUE,
+)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """
+    Flattens a Pydantic validation error into a single readable line.
+
+    Args:
+        error: The validation error.
+
+    Returns:
+        The failing field locations and messages, separated by semicolons.
+    """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+    """
+    Parses contacts from CSV lines, one row at a time.
+
+    The header must name the contact fields, as produced by the CSV export;
+    unknown columns such as ``id`` are ignored.
+
+    Args:
+        lines: An iterable of text lines, e.g. an open file.
+
+    Yields:
+        Tuples of the 1-based data row number and the raw field values.
+    """
+    for number, row in enumerate(csv.DictReader(lines), start=1):
+        yield (
+            number,
+            {
+                key: (value or None) if key == "additional_data" else value
+                for key, value in row.items()
+                if key is not None
+            },
+        )
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[str]:
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _vcard_unescape(value: str) -> str:
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _vcard_date(value: str) -> str:
+    value = value.strip()
+    if re.fullmatch(r"\d{8}", value):
+        return datetime.strptime(value, "%Y%m%d").date().isoformat()
+    return value
+
+
+def parse_vcard(lines: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+    """
+    Parses contacts from vCard 3.0/4.0 lines, one card at a time.
+
+    Args:
+        lines: An iterable of text lines, e.g. an open file.
+
+    Yields:
+        Tuples of the 1-based card number and the raw field values.
+    """
+    number, card = 0, None
+    for line in _unfold(lines):
+        name, _, value = line.partition(":")
+        prop = name.split(";", 1)[0].upper()
+        if prop == "BEGIN" and value.upper() == "VCARD":
+            card = {}
+        elif prop == "END" and card is not None:
+            number += 1
+            yield number, card
+            card = None
+        elif card is None:
+            continue
+        elif prop == "N":
+            parts = re.split(r"(?<!\\);", value)
+            card["last_name"] = _vcard_unescape(parts[0])
+            if len(parts) > 1:
+                card["first_name"] = _vcard_unescape(parts[1])
+        elif prop == "EMAIL":
+            card.setdefault("email", _vcard_unescape(value))
+        elif prop == "TEL":
+            card.setdefault("phone_number", _vcard_unescape(value))
+        elif prop == "BDAY":
+            card["birthday"] = _vcard_date(value)
+        elif prop == "NOTE":
+            card["additional_data"] = _vcard_unescape(value)
+
+
+def _read_chunk(
+    rows: Iterator[Tuple[int, Dict]], chunk_size: int, report: ImportReport
+) -> Tuple[List[ContactCreate], bool]:
+    """
+    Validates parsed rows until `chunk_size` of them are valid.
+
+    Args:
+        rows: The parser's iterator of row numbers and raw values.
+        chunk_size: The number of valid rows to collect.
+        report: The running report; counts and errors are added to it.
+
+    Returns:
+        The valid contacts and whether the input is exhausted.
+    """
+    chunk = []
+    for row, values in rows:
+        report.processed += 1
+        try:
+            chunk.append(ContactCreate.model_validate(values))
+        except ValidationError as e:
+            report.failed += 1
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                report.errors.append(
+                    ImportRowError(row=row, detail=format_validation_error(e))
+                )
+        if len(chunk) >= chunk_size:
+            return chunk, False
+    return chunk, True
+
+
+async def import_contacts(
+    db: AsyncSession,
+    lines: Iterable[str],
+    import_format: str,
+    user: User,
+    chunk_size: int = 5000,
+    on_progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """
+    Imports contacts from a CSV or vCard stream.
+
+    Rows are parsed lazily, validated with `ContactCreate` and loaded
+    `chunk_size` at a time, so memory use is bounded by the chunk size.
+    Each chunk is read and validated on `import_executor`, keeping the event
+    loop free while only the load itself runs on it. Invalid rows are
+    reported and skipped; all valid rows are committed in a single
+    transaction at the end.
+
+    Args:
+        db: The database session to use.
+        lines: An iterable of text lines.
+        import_format: Either "csv" or "vcard".
+        user: The user who will own the imported contacts.
+        chunk_size: The number of rows validated and loaded per batch.
+        on_progress: Called with the running report after every chunk.
+
+    Returns:
+        The import report with counts and per-row errors (the first
+        `MAX_REPORTED_ERRORS` of them).
+
+    Raises:
+        ValueError: If the format is not supported.
+        HTTPException: With status 503 if too many imports are already queued.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {import_format}")
+    parse = parse_csv if import_format == "csv" else parse_vcard
+    rows = parse(lines)
+    report = ImportReport()
+
+    exhausted = False
+    while not exhausted:
+        chunk, exhausted = await import_executor.run(
+            _read_chunk, rows, chunk_size, report
+        )
+        report.imported += await copy_contacts(db, chunk, user)
+        if on_progress:
+            on_progress(report)
+    await db.commit()
+    return report
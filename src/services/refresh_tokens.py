@@ -0,0 +1,156 @@
+from typing import Optional, Tuple
+
+import hashlib
+import logging
+import secrets
+
+from src.database.db import rc
+from src.services.base import settings
+
+logger = logging.getLogger(__name__)
+
+# Swaps the secret of a refresh token family, provided the presented secret
+# is the current one. A stale secret means the token was used before: the
+# whole family is dropped, so neither the thief nor the victim can go on.
+# Returns the previous entry on success, 0 for an unknown family and -1 on
+# reuse.
+ROTATE_SCRIPT = """
+local entry = redis.call('GET', KEYS[1])
+if not entry then
+    return 0
+end
+if string.sub(entry, 1, 32) ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2] .. string.sub(entry, 33), 'KEEPTTL')
+return entry
+"""
+
+# Drops a token family, provided it belongs to the given email address.
+REVOKE_SCRIPT = """
+local entry = redis.call('GET', KEYS[1])
+local space = entry and string.find(entry, ' ', 33, true)
+if space and string.sub(entry, space + 1) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token is unknown, expired or reused."""
+
+
+class RefreshTokens:
+    """
+    Opaque, rotating refresh tokens stored in Redis.
+
+    A token is ``"<family>.<secret>"``. Each family is one Redis string,
+    ``"<digest of the current secret><version> <email>"``, that expires
+    with the family. Every refresh replaces the secret, so a refresh token
+    works once; presenting an already rotated one revokes the family.
+    """
+
+    def __init__(self, redis, ttl: int):
+        """
+        Initialize RefreshTokens.
+
+        Args:
+            redis: The Redis client.
+            ttl: Seconds a token family lives after login.
+        """
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(family: str) -> str:
+        return f"refresh:{family}"
+
+    @staticmethod
+    def _digest(secret: str) -> str:
+        return hashlib.blake2b(secret.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _split(token: str) -> Tuple[str, str]:
+        family, _, secret = token.partition(".")
+        if not family or not secret:
+            raise RefreshTokenError("Malformed refresh token")
+        return family, secret
+
+    async def issue(self, email: str, token_version: int) -> str:
+        """
+        Starts a new token family at login.
+
+        Args:
+            email: The email address of the user.
+            token_version: The user's token version; the family is rejected
+                once the user's tokens are revoked past it.
+
+        Returns:
+            The refresh token.
+        """
+        family, secret = secrets.token_urlsafe(12), secrets.token_urlsafe(24)
+        entry = f"{self._digest(secret)}{token_version} {email}"
+        await self.redis.setex(self._key(family), self.ttl, entry)
+        return f"{family}.{secret}"
+
+    async def rotate(self, token: str) -> Tuple[str, int, str]:
+        """
+        Exchanges a refresh token for the next one of its family.
+
+        The check and the swap run as one Lua script, so two requests racing
+        with the same token cannot both succeed.
+
+        Args:
+            token: The refresh token presented by the client.
+
+        Returns:
+            A tuple of the user's email, the token version the family was
+            issued under, and the new refresh token.
+
+        Raises:
+            RefreshTokenError: If the token is malformed, unknown, expired
+                or was already used.
+        """
+        family, secret = self._split(token)
+        new_secret = secrets.token_urlsafe(24)
+        entry = await self.redis.eval(
+            ROTATE_SCRIPT,
+            1,
+            self._key(family),
+            self._digest(secret),
+            self._digest(new_secret),
+        )
+        if entry == -1:
+            logger.warning(f"Refresh token reuse detected, revoked family {family}")
+            raise RefreshTokenError("Refresh token reused")
+        if not entry:
+            raise RefreshTokenError("Unknown or expired refresh token")
+        version, _, email = entry[32:].partition(" ")
+        return email, int(version), f"{family}.{new_secret}"
+
+    async def revoke(self, token: Optional[str], email: str) -> bool:
+        """
+        Drops the family of a refresh token issued to a given user.
+
+        The owner is checked in the same Lua script that deletes the family,
+        so a token presented on behalf of someone else is left alone.
+
+        Args:
+            token: The refresh token, or None to do nothing.
+            email: The email address of the user the token must belong to.
+
+        Returns:
+            True if the family was dropped.
+        """
+        if not token:
+            return False
+        try:
+            family, _ = self._split(token)
+        except RefreshTokenError:
+            return False
+        return bool(await self.redis.eval(REVOKE_SCRIPT, 1, self._key(family), email))
+
+
+refresh_tokens = RefreshTokens(rc, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
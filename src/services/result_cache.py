@@ -0,0 +1,154 @@
+from typing import Mapping, Optional, Tuple
+
+import hashlib
+import json
+import logging
+import time
+
+from src.database.db import rc
+from src.services.base import settings
+from src.services.cache import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Redis cache of serialized read results, invalidated per user in O(1).
+
+    Values are stored as given, so a cached response body is returned
+    without being decoded and encoded again.
+
+    Every user has a generation counter, and each cache key embeds the
+    generation current when the entry was stored. A write bumps the counter,
+    so every entry of that user stops being addressable at once without
+    scanning or deleting keys; the orphaned entries simply expire.
+    """
+
+    def __init__(self, redis, name: str, ttl: int):
+        """
+        Initialize a ResultCache.
+
+        Args:
+            redis: The Redis client.
+            name: The key prefix and metrics label.
+            ttl: Seconds an entry stays cached; 0 disables the cache.
+        """
+        self.redis = redis
+        self.name = name
+        self.ttl = ttl
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.name}_gen:{user_id}"
+
+    async def generation(self, user_id: int) -> int:
+        """
+        Returns the user's current generation.
+
+        A missing counter (new user, or evicted by Redis) starts from the
+        current time in milliseconds, so it never goes back to a generation
+        whose entries may still be cached.
+
+        Args:
+            user_id: The id of the user.
+
+        Returns:
+            The generation number.
+        """
+        key = self._generation_key(user_id)
+        generation = await self.redis.get(key)
+        if generation is None:
+            await self.redis.set(key, time.time_ns() // 1_000_000, nx=True)
+            generation = await self.redis.get(key)
+        return int(generation)
+
+    def key(self, user_id: int, generation: int, kind: str, params: Mapping) -> str:
+        """
+        Builds the cache key for one read.
+
+        Args:
+            user_id: The id of the user.
+            generation: The user's current generation.
+            kind: The kind of read, e.g. ``"list"`` or ``"search"``.
+            params: The parameters that determine the result.
+
+        Returns:
+            The Redis key.
+        """
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"{self.name}:{user_id}:{generation}:{kind}:{digest}"
+
+    async def lookup(
+        self, user_id: int, kind: str, params: Mapping
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Looks up a cached result.
+
+        Redis errors are logged and reported as a miss without a key, so the
+        caller serves from the database and does not try to store.
+
+        Args:
+            user_id: The id of the user.
+            kind: The kind of read.
+            params: The parameters that determine the result.
+
+        Returns:
+            A tuple of the key to store a fresh result under (None when the
+            cache is disabled or unavailable) and the cached value or None.
+        """
+        if self.ttl <= 0:
+            return None, None
+        try:
+            key = self.key(user_id, await self.generation(user_id), kind, params)
+            cached = await self.redis.get(key)
+        except Exception as e:
+            logger.error(f"Failed to read {self.name} cache: {str(e)}")
+            return None, None
+        if cached is None:
+            self._misses.inc()
+            return key, None
+        self._hits.inc()
+        return key, cached
+
+    async def store(self, key: Optional[str], value: str) -> None:
+        """
+        Stores a result under a key returned by `lookup`.
+
+        Args:
+            key: The cache key, or None to skip storing.
+            value: The serialized result.
+        """
+        if key is None:
+            return
+        try:
+            await self.redis.setex(key, self.ttl, value)
+        except Exception as e:
+            logger.error(f"Failed to store {self.name} cache entry: {str(e)}")
+
+    async def bump(self, user_id: int) -> None:
+        """
+        Invalidates every cached result of a user.
+
+        A missing counter is seeded from the clock first, as in `generation`,
+        so the bumped value is never one that older entries were stored under.
+
+        Args:
+            user_id: The id of the user whose data changed.
+        """
+        if self.ttl <= 0:
+            return
+        key = self._generation_key(user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(key, time.time_ns() // 1_000_000, nx=True)
+                pipe.incr(key)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to bump {self.name} generation: {str(e)}")
+
+
+contacts_cache = ResultCache(rc, "contacts_result", settings.RESULT_CACHE_TTL_SECONDS)
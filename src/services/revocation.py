@@ -0,0 +1,280 @@
+from typing import Dict, Iterable, List, Tuple
+
+import asyncio
+import logging
+import time
+
+from src.database.db import INVALIDATION_CHANNEL, rc, redis_read, user_cache
+from src.services.base import settings
+from src.services.cache import BloomFilter
+from src.services.token_versions import token_versions
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = INVALIDATION_CHANNEL
+REVOKED_PREFIX = "revoked_token:"
+VERSION_PREFIX = "token_version:"
+MOVING_PREFIX = "moving_user:"
+
+# Ids of revoked access tokens known to this process. A miss, the common
+# case, proves the token was not revoked without asking Redis; a hit may be
+# a false positive and is confirmed against the Redis key.
+revoked_tokens = BloomFilter(
+    settings.REVOCATION_BLOOM_BITS, settings.REVOCATION_BLOOM_HASHES
+)
+# Users whose contacts are being moved to another shard, with the
+# time.monotonic() at which the fence lapses on its own.
+moving_users: Dict[int, float] = {}
+
+
+def _version_ttl() -> int:
+    return max(settings.JWT_EXPIRE_MINUTES, settings.AUTH_STATELESS_EXPIRE_MINUTES) * 60
+
+
+async def revoke_token(jti: str, expires_in: float) -> None:
+    """
+    Revokes a single access token until it expires.
+
+    Args:
+        jti: The ``jti`` claim of the token.
+        expires_in: Seconds until the token expires.
+    """
+    revoked_tokens.add(jti)
+    async with rc.pipeline(transaction=False) as pipe:
+        pipe.setex(f"{REVOKED_PREFIX}{jti}", max(int(expires_in) + 1, 1), 1)
+        pipe.publish(CHANNEL, f"jti {jti}")
+        await pipe.execute()
+
+
+async def is_revoked(jti: str) -> bool:
+    """
+    Tells whether an access token was revoked.
+
+    While the listener is synced, only ids that hit the Bloom filter cost a
+    Redis round trip. Until then the filter may miss revocations made on
+    other workers, so every id is checked in Redis.
+
+    Args:
+        jti: The ``jti`` claim of the token.
+
+    Returns:
+        True if the token was revoked.
+    """
+    if revocation_listener.synced and jti not in revoked_tokens:
+        return False
+    return bool(await redis_read("exists", f"{REVOKED_PREFIX}{jti}"))
+
+
+def token_reads(jti: str) -> List[Tuple[str, str]]:
+    """
+    Lists the Redis reads `is_revoked` will make for a token.
+
+    Args:
+        jti: The ``jti`` claim of the token.
+
+    Returns:
+        ``(command, key)`` pairs for `redis_read`; empty if the listener is
+        synced and the Bloom filter does not report the token.
+    """
+    if revocation_listener.synced and jti not in revoked_tokens:
+        return []
+    return [("exists", f"{REVOKED_PREFIX}{jti}")]
+
+
+async def announce_token_version(user) -> None:
+    """
+    Shares a user's new token version with every worker.
+
+    Call after committing `revoke_tokens`. The version is stored in Redis
+    for as long as a token issued before it can be unexpired, and published
+    so other workers reject older tokens and drop the cached user at once.
+    Redis errors are logged: the committed version still rejects older
+    tokens on lookups, and workers that lose the channel stop trusting
+    stateless tokens until they have reloaded.
+
+    Args:
+        user: The user whose tokens were revoked.
+    """
+    token_versions.set(user.id, user.token_version)
+    try:
+        async with rc.pipeline(transaction=False) as pipe:
+            pipe.setex(f"{VERSION_PREFIX}{user.id}", _version_ttl(), user.token_version)
+            pipe.publish(CHANNEL, f"ver {user.id} {user.token_version} {user.email}")
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to announce token version of {user.email}: {str(e)}")
+
+
+async def fence_writes(user_id: int, ttl: float) -> None:
+    """
+    Stops every worker from writing a user's contacts for `ttl` seconds.
+
+    Used while the user moves between shards, so no worker that still
+    routes the user to the old shard can change rows already copied.
+
+    Args:
+        user_id: The id of the user being moved.
+        ttl: Seconds the fence holds unless lifted earlier.
+    """
+    expires_at = time.time() + ttl
+    moving_users[user_id] = time.monotonic() + ttl
+    async with rc.pipeline(transaction=False) as pipe:
+        pipe.setex(f"{MOVING_PREFIX}{user_id}", int(ttl) + 1, expires_at)
+        pipe.publish(CHANNEL, f"fence {user_id} {expires_at}")
+        await pipe.execute()
+
+
+async def lift_fence(user_id: int) -> None:
+    """
+    Lets every worker write a user's contacts again.
+
+    Redis errors are logged; the fence then lapses with its TTL.
+
+    Args:
+        user_id: The id of the moved user.
+    """
+    moving_users.pop(user_id, None)
+    try:
+        async with rc.pipeline(transaction=False) as pipe:
+            pipe.delete(f"{MOVING_PREFIX}{user_id}")
+            pipe.publish(CHANNEL, f"unfence {user_id}")
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to lift the write fence of user {user_id}: {str(e)}")
+
+
+async def is_fenced(user_id: int) -> bool:
+    """
+    Tells whether a user's contacts may not be written right now.
+
+    Answered from memory while the listener is synced, and from Redis
+    otherwise.
+
+    Args:
+        user_id: The id of the user.
+
+    Returns:
+        True while the user is being moved between shards.
+    """
+    if not revocation_listener.synced:
+        return bool(await rc.exists(f"{MOVING_PREFIX}{user_id}"))
+    lapses_at = moving_users.get(user_id)
+    return lapses_at is not None and lapses_at > time.monotonic()
+
+
+def _record_fence(user_id: int, expires_at: float) -> None:
+    moving_users[user_id] = time.monotonic() + expires_at - time.time()
+
+
+def _record_version(user_id: int, version: int) -> None:
+    known = token_versions.get(user_id)
+    if known is None or version > known:
+        token_versions.set(user_id, version)
+
+
+class RevocationListener:
+    """
+    Keeps this process's revocation state in sync with Redis.
+
+    On every (re)connect it subscribes first and then loads the revoked
+    token ids, token versions and write fences stored in Redis, so nothing
+    published in between is lost. Revoked ids cannot be removed from a Bloom filter, so
+    the filter is also rebuilt from Redis every `rebuild_interval` seconds
+    to shed tokens that have expired.
+    """
+
+    def __init__(self, redis, rebuild_interval: float):
+        """
+        Initialize a RevocationListener.
+
+        Args:
+            redis: The Redis client.
+            rebuild_interval: Seconds between rebuilds of the Bloom filter.
+        """
+        self.redis = redis
+        self.rebuild_interval = rebuild_interval
+        # Whether this process is subscribed and has loaded the shared
+        # revocation state; stateless tokens are only trusted while it is.
+        self.synced = False
+
+    async def _scan(self, prefix: str) -> Iterable[str]:
+        return [key async for key in self.redis.scan_iter(f"{prefix}*", count=1000)]
+
+    async def load(self) -> None:
+        """Reloads the revoked token ids, token versions and fences from Redis."""
+        revoked = await self._scan(REVOKED_PREFIX)
+        version_keys = await self._scan(VERSION_PREFIX)
+        versions = await self.redis.mget(version_keys) if version_keys else []
+        fence_keys = await self._scan(MOVING_PREFIX)
+        fences = await self.redis.mget(fence_keys) if fence_keys else []
+
+        revoked_tokens.clear()
+        for key in revoked:
+            revoked_tokens.add(key[len(REVOKED_PREFIX) :])
+        for key, version in zip(version_keys, versions):
+            if version is not None:
+                _record_version(int(key[len(VERSION_PREFIX) :]), int(version))
+        moving_users.clear()
+        for key, expires_at in zip(fence_keys, fences):
+            if expires_at is not None:
+                _record_fence(int(key[len(MOVING_PREFIX) :]), float(expires_at))
+        logger.info(
+            f"Loaded {len(revoked)} revoked tokens and "
+            f"{len(version_keys)} token versions"
+        )
+
+    def handle(self, data: str) -> None:
+        """
+        Applies one message published on the revocation channel.
+
+        Args:
+            data: ``"jti <id>"``, ``"ver <user id> <version> <email>"``,
+                ``"user <email>"``, ``"fence <user id> <expiry timestamp>"``
+                or ``"unfence <user id>"``.
+        """
+        kind, _, rest = data.partition(" ")
+        if kind == "jti":
+            revoked_tokens.add(rest)
+        elif kind == "ver":
+            user_id, version, email = rest.split(" ", 2)
+            _record_version(int(user_id), int(version))
+            user_cache.invalidate(email)
+        elif kind == "user":
+            user_cache.invalidate(rest)
+        elif kind == "fence":
+            user_id, expires_at = rest.split(" ")
+            _record_fence(int(user_id), float(expires_at))
+        elif kind == "unfence":
+            moving_users.pop(int(rest), None)
+        else:
+            logger.warning(f"Unknown revocation message: {data}")
+
+    async def run(self) -> None:
+        """Listens for revocations until cancelled, reconnecting on errors."""
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                await self.load()
+                self.synced = True
+                loaded_at = time.monotonic()
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self.handle(message["data"])
+                    if time.monotonic() - loaded_at >= self.rebuild_interval:
+                        await self.load()
+                        loaded_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.synced = False
+                logger.error(f"Revocation listener failed: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+revocation_listener = RevocationListener(rc, _version_ttl())
@@ -0,0 +1,48 @@
+from src.database.models import User
+from src.services.base import settings
+from src.services.cache import TTLCache
+
+# Token versions bumped by any process, as synced by the revocation listener
+# (src.services.revocation), kept for as long as a stateless token issued
+# before the bump can still be unexpired.
+token_versions = TTLCache(
+    "token_versions",
+    settings.TOKEN_VERSION_CACHE_SIZE,
+    settings.AUTH_STATELESS_EXPIRE_MINUTES * 60,
+)
+
+
+def is_current(user_id: int, version: int) -> bool:
+    """
+    Tells whether a stateless token's version has not been revoked.
+
+    Bumps made in other processes are seen once the revocation listener
+    receives them; the user record stays the source of truth for lookups.
+
+    Args:
+        user_id: The id of the token's user.
+        version: The ``ver`` claim of the token.
+
+    Returns:
+        False if the user's tokens were revoked after this one was issued.
+    """
+    known = token_versions.get(user_id)
+    return known is None or version >= known
+
+
+def revoke_tokens(user: User) -> int:
+    """
+    Bumps a user's token version, revoking every token issued before.
+
+    The caller commits the change, invalidates the cached user and shares
+    the new version with `announce_token_version`.
+
+    Args:
+        user: The user whose tokens to revoke.
+
+    Returns:
+        The new token version.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    token_versions.set(user.id, user.token_version)
+    return user.token_version
@@ -1,8 +1,18 @@
+import itertools
 import pytest_asyncio
+from datetime import date
 from unittest.mock import AsyncMock, patch
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.services import auth as auth_module
 from src.services.auth import auth_service
-from src.database.models import Role
+from src.database.db import Base, user_cache
+from src.database.models import Role, User
+from src.repository.contacts import create_contact
+from src.schemas.schemas import ContactCreate
+from src.services.result_cache import contacts_cache
+from src.services.revocation import revocation_listener
 
 
 class TestSettings(BaseSettings):
@@ -30,6 +40,37 @@ class TestSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=None, extra="ignore")
 
 
+@pytest_asyncio.fixture(autouse=True)
+def clear_user_cache():
+    """Keep the process-local user and token caches from leaking between tests."""
+    user_cache.clear()
+    auth_module.access_token_cache.clear()
+    yield
+    user_cache.clear()
+    auth_module.access_token_cache.clear()
+
+
+@pytest_asyncio.fixture(autouse=True)
+def disable_result_cache():
+    """Keep tests off the shared Redis result cache unless they opt in."""
+    with patch.object(contacts_cache, "ttl", 0):
+        yield
+
+
+@pytest_asyncio.fixture(autouse=True)
+def synced_revocations():
+    """Treat the empty in-process revocation state as synced unless tests opt out."""
+    with patch.object(revocation_listener, "synced", True):
+        yield
+
+
+@pytest_asyncio.fixture(autouse=True)
+def disable_write_fences():
+    """Keep contact writes from checking Redis for shard moves unless tests opt in."""
+    with patch("src.database.shards.is_fenced", AsyncMock(return_value=False)):
+        yield
+
+
 @pytest_asyncio.fixture(scope="session")
 def test_settings() -> TestSettings:
     return TestSettings()
@@ -57,6 +98,7 @@ def mock_user():
             "is_verified": False,
             "avatar_url": None,
             "roles": Role.user.value,
+            "token_version": 0,
             "to_dict": lambda self: {
                 "id": self.id,
                 "email": self.email,
@@ -83,3 +125,58 @@ def test_app(mock_db_session):
         )
         yield app
         app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture(scope="function")
+async def sqlite_session():
+    """In-memory SQLite session with the full schema, for repository tests."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_maker() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="function")
+async def db_user(sqlite_session):
+    """A persisted user that owns the contacts created in repository tests."""
+    user = User(email="owner@example.com", hashed_password="hashed")
+    sqlite_session.add(user)
+    await sqlite_session.commit()
+    return user
+
+
+@pytest_asyncio.fixture(scope="function")
+def make_contact():
+    """
+    Builds valid `ContactCreate`s from the fields given; the rest are filled
+    in with values numbered per call, so every contact is distinct.
+    """
+    numbers = itertools.count(1)
+
+    def build(**fields) -> ContactCreate:
+        n = next(numbers)
+        defaults = {
+            "first_name": f"First{n}",
+            "last_name": f"Last{n}",
+            "email": f"contact{n}@example.com",
+            "phone_number": f"+38050000{n:04d}",
+            "birthday": date(1990, 1, 1),
+        }
+        return ContactCreate(**{**defaults, **fields})
+
+    return build
+
+
+@pytest_asyncio.fixture(scope="function")
+async def add_contact(sqlite_session, db_user, make_contact):
+    """Creates a contact owned by `db_user`; takes `make_contact` fields."""
+
+    async def add(**fields):
+        return await create_contact(sqlite_session, make_contact(**fields), db_user)
+
+    return add
@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import select, text
+
+from src.database.models import Contact
+
+
+@pytest.mark.asyncio
+async def test_user_scoped_queries_prune_to_one_partition(db_session):
+    query = select(Contact).where(Contact.user_id == 42, Contact.id > 0).limit(10)
+    compiled = query.compile(
+        dialect=db_session.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+
+    result = await db_session.execute(text(f"EXPLAIN {compiled}"))
+    plan = "\n".join(row[0] for row in result)
+
+    scanned = {word for word in plan.split() if word.startswith("contacts_p")}
+    assert len(scanned) == 1, plan
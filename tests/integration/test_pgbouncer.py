@@ -0,0 +1,41 @@
+import asyncio
+import os
+import pytest
+
+from sqlalchemy import Integer, literal, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.db import pool_options
+from src.database.models import Contact
+
+PGBOUNCER_DATABASE_URL = os.getenv("PGBOUNCER_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not PGBOUNCER_DATABASE_URL, reason="PGBOUNCER_DATABASE_URL is not set"
+)
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_through_transaction_pooling():
+    # More client connections than PgBouncer has server connections, so the
+    # same statement is re-run on server connections other than the one it
+    # was first prepared on.
+    engine = create_async_engine(
+        PGBOUNCER_DATABASE_URL, **pool_options(PGBOUNCER_DATABASE_URL, pgbouncer=True)
+    )
+
+    async def worker(n: int) -> int:
+        total = 0
+        for _ in range(10):
+            async with engine.connect() as conn:
+                total += (await conn.execute(select(literal(n, Integer)))).scalar()
+                await conn.execute(select(Contact.id).limit(1))
+                await conn.commit()
+        return total
+
+    try:
+        results = await asyncio.gather(*(worker(n) for n in range(15)))
+    finally:
+        await engine.dispose()
+
+    assert results == [n * 10 for n in range(15)]
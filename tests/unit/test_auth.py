@@ -1,9 +1,36 @@
 import pytest
-from jose import jwt
+from jose import JWTError, jwt
 from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from src.database.models import Role, User
+from src.services import auth as auth_module
 from src.services.auth import auth_service
 from src.services.base import settings
+from src.services.cache import CACHE_REQUESTS, CachedUser
+from src.services.revocation import revocation_listener
+from src.services.token_versions import revoke_tokens, token_versions
+
+
+@pytest.fixture
+def stateless():
+    with patch.object(settings, "AUTH_STATELESS", True):
+        yield
+    token_versions.clear()
+
+
+def make_user(**overrides) -> User:
+    fields = dict(
+        id=5,
+        email="claims@example.com",
+        hashed_password="x",
+        is_verified=True,
+        roles=Role.admin,
+        shard=2,
+        token_version=3,
+    )
+    fields.update(overrides)
+    return User(**fields)
 
 
 def test_verify_password_and_hash():
@@ -55,3 +82,95 @@ async def test_get_email_from_token_invalid_token():
     with pytest.raises(HTTPException) as exc:
         await auth_service.get_email_from_token("invalid.token.string")
     assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+@patch("src.services.auth.get_user_from_cache", new_callable=AsyncMock)
+async def test_stateless_token_is_authorized_from_its_claims(mock_lookup, stateless):
+    user = make_user()
+    token = await auth_service.create_user_access_token(user)
+
+    current = await auth_service.get_current_user(token, MagicMock())
+
+    mock_lookup.assert_not_awaited()
+    assert (current.id, current.email, current.roles) == (5, user.email, "admin")
+    assert (current.is_verified, current.shard, current.token_version) == (True, 2, 3)
+
+    revoke_tokens(user)
+    with pytest.raises(HTTPException) as exc:
+        await auth_service.get_current_user(token, MagicMock())
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+@patch("src.services.auth.get_user_from_cache", new_callable=AsyncMock)
+async def test_stateless_tokens_are_looked_up_until_revocations_are_synced(
+    mock_lookup, stateless
+):
+    token = await auth_service.create_user_access_token(make_user())
+    mock_lookup.return_value = CachedUser(5, "claims@example.com", token_version=4)
+
+    with (
+        patch.object(revocation_listener, "synced", False),
+        patch("src.services.auth.is_revoked", AsyncMock(return_value=False)),
+    ):
+        with pytest.raises(HTTPException) as exc:
+            await auth_service.get_current_user(token, MagicMock())
+
+    assert exc.value.status_code == 401
+    mock_lookup.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("src.services.auth.get_user_from_cache", new_callable=AsyncMock)
+async def test_stateless_profile_is_looked_up_and_version_checked(
+    mock_lookup, stateless
+):
+    token = await auth_service.create_user_access_token(make_user())
+    mock_lookup.return_value = CachedUser(
+        5, "claims@example.com", True, "avatar.png", "admin", 2, 3
+    )
+
+    profile = await auth_service.get_current_profile(token, MagicMock())
+    assert profile.avatar_url == "avatar.png"
+
+    mock_lookup.return_value = CachedUser(5, "claims@example.com", token_version=4)
+    with pytest.raises(HTTPException) as exc:
+        await auth_service.get_current_profile(token, MagicMock())
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+@patch("src.services.auth.get_user_from_cache", new_callable=AsyncMock)
+async def test_lookup_mode_rejects_tokens_older_than_the_user(mock_lookup):
+    token = await auth_service.create_user_access_token(make_user(token_version=0))
+    decoded = jwt.decode(
+        token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+    )
+    assert decoded["ver"] == 0 and "roles" not in decoded
+
+    mock_lookup.return_value = CachedUser(5, "claims@example.com", token_version=0)
+    assert (await auth_service.get_current_user(token, MagicMock())).id == 5
+
+    mock_lookup.return_value = CachedUser(5, "claims@example.com", token_version=1)
+    with pytest.raises(HTTPException) as exc:
+        await auth_service.get_current_user(token, MagicMock())
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_access_tokens_are_verified_once_until_they_expire():
+    token = await auth_service.create_access_token({"sub": "a@example.com"}, 5)
+    hits = CACHE_REQUESTS.labels("access_tokens", "hit")
+    before = hits._value.get()
+
+    with patch("src.services.auth.jwt.decode", wraps=jwt.decode) as decode:
+        first = auth_service.decode_access_token(token)
+        second = auth_service.decode_access_token(token)
+        with pytest.raises(JWTError):
+            auth_service.decode_access_token(token[:-2] + "xx")
+
+    assert first == second and first["sub"] == "a@example.com"
+    assert decode.call_count == 2
+    assert hits._value.get() == before + 1
+    assert len(auth_module.access_token_cache) == 1
@@ -0,0 +1,120 @@
+import pytest
+import warnings
+from datetime import date
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from src.repository.contacts import (
+    get_upcoming_birthdays,
+    next_birthday,
+    update_contact,
+)
+from src.schemas.schemas import ContactUpdate
+from src.services.auth import auth_service
+
+
+def test_next_birthday_wraps_year_and_leap_day():
+    assert next_birthday(date(1990, 1, 2), date(2025, 12, 30)) == date(2026, 1, 2)
+    assert next_birthday(date(1992, 2, 29), date(2025, 2, 1)) == date(2025, 2, 28)
+    assert next_birthday(date(1992, 2, 29), date(2028, 2, 1)) == date(2028, 2, 29)
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_across_new_year(sqlite_session, db_user, add_contact):
+    await add_contact(first_name="Jan", birthday=date(1990, 1, 3))
+    await add_contact(first_name="Dec", birthday=date(1985, 12, 31))
+    await add_contact(first_name="Jun", birthday=date(1980, 6, 15))
+
+    upcoming = await get_upcoming_birthdays(
+        sqlite_session, db_user, days=7, start_date=date(2025, 12, 29)
+    )
+
+    assert [b["first_name"] for b in upcoming] == ["Dec", "Jan"]
+    assert upcoming[1]["next_birthday"] == date(2026, 1, 3)
+    assert upcoming[1]["days_until"] == 5
+    assert "JAN-03" in upcoming[1]["message"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "start, days", [(date(2027, 2, 27), 1), (date(2027, 2, 26), 2)]
+)
+async def test_leap_day_birthdays_in_windows_ending_feb_28(
+    sqlite_session, db_user, add_contact, start, days
+):
+    await add_contact(first_name="Leap", birthday=date(1992, 2, 29))
+    await add_contact(first_name="March", birthday=date(1990, 3, 1))
+
+    upcoming = await get_upcoming_birthdays(
+        sqlite_session, db_user, days=days, start_date=start
+    )
+
+    assert [b["first_name"] for b in upcoming] == ["Leap"]
+    assert upcoming[0]["next_birthday"] == date(2027, 2, 28)
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_window_longer_than_a_month(
+    sqlite_session, db_user, add_contact
+):
+    await add_contact(first_name="Mar", birthday=date(1990, 3, 10))
+    await add_contact(first_name="Apr", birthday=date(1990, 4, 20))
+    await add_contact(first_name="May", birthday=date(1990, 5, 25))
+
+    upcoming = await get_upcoming_birthdays(
+        sqlite_session, db_user, days=60, start_date=date(2025, 3, 1)
+    )
+
+    assert [b["first_name"] for b in upcoming] == ["Mar", "Apr"]
+
+
+@pytest.mark.asyncio
+async def test_birthday_key_follows_updates(sqlite_session, db_user, add_contact):
+    contact = await add_contact(first_name="Moved", birthday=date(1990, 8, 1))
+    await update_contact(
+        sqlite_session, contact.id, ContactUpdate(birthday=date(1990, 2, 2)), db_user
+    )
+
+    upcoming = await get_upcoming_birthdays(
+        sqlite_session, db_user, days=3, start_date=date(2025, 2, 1)
+    )
+
+    assert [b["id"] for b in upcoming] == [contact.id]
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_rejects_non_positive_days(sqlite_session, db_user):
+    with pytest.raises(HTTPException) as exc:
+        await get_upcoming_birthdays(sqlite_session, db_user, days=0)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_birthdays_endpoint_serializes_through_the_response_model(
+    sqlite_session, db_user, add_contact
+):
+    from src.main import app
+    from src.database.shards import get_shard_db
+
+    async def fake_db():
+        yield sqlite_session
+
+    await add_contact(first_name="Ann", birthday=date(1990, 5, 17))
+    app.dependency_overrides[auth_service.get_current_user] = lambda: db_user
+    app.dependency_overrides[get_shard_db] = fake_db
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                response = await client.get(
+                    "/api/contacts/contacts/birthdays/",
+                    params={"days": 7, "start_date": "2025-05-15"},
+                )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()[0]["first_name"] == "Ann"
+    assert response.json()[0]["next_birthday"] == "2025-05-17"
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.database.db import get_user_from_cache, invalidate_user_cache, user_cache
+from src.services.cache import CACHE_REQUESTS, CachedUser, TTLCache
+
+USER = {
+    "id": 1,
+    "email": "test@example.com",
+    "is_verified": True,
+    "avatar_url": None,
+    "roles": "user",
+    "shard": 0,
+    "token_version": 0,
+}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test_lru", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache("test_ttl", max_size=10, ttl=60)
+    with patch("src.services.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("src.services.cache.time.monotonic", return_value=159.0):
+        assert cache.get("a") == 1
+    with patch("src.services.cache.time.monotonic", return_value=160.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_counts_hits_and_misses():
+    cache = TTLCache("test_metrics", max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    assert CACHE_REQUESTS.labels("test_metrics", "hit")._value.get() == 1
+    assert CACHE_REQUESTS.labels("test_metrics", "miss")._value.get() == 1
+
+
+def test_cached_user_supports_attribute_and_dict_access():
+    user = CachedUser.from_dict(USER)
+
+    assert user.id == 1
+    assert user["email"] == "test@example.com"
+    assert user.get("roles") == "user"
+    assert user.get("hashed_password") is None
+    assert user.to_dict() == USER
+    assert not hasattr(user, "__dict__")
+    with pytest.raises(KeyError):
+        user["hashed_password"]
+
+
+@pytest.mark.asyncio
+@patch("src.database.db.rc", new_callable=AsyncMock)
+@patch("src.database.db.get_user_from_db", new_callable=AsyncMock)
+async def test_get_user_from_cache_serves_repeat_calls_from_memory(
+    mock_get_user_from_db, mock_rc
+):
+    mock_rc.get.return_value = None
+    mock_get_user_from_db.return_value = USER
+
+    first = await get_user_from_cache(USER["email"], AsyncMock())
+    second = await get_user_from_cache(USER["email"], AsyncMock())
+
+    assert first is second
+    assert second.id == 1
+    mock_rc.get.assert_awaited_once()
+    mock_get_user_from_db.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("src.database.db.rc", new_callable=MagicMock)
+async def test_invalidate_user_cache_clears_both_layers_and_tells_other_workers(
+    mock_rc,
+):
+    pipe = mock_rc.pipeline.return_value.__aenter__.return_value
+    pipe.execute = AsyncMock()
+    user_cache.set(USER["email"], CachedUser.from_dict(USER))
+
+    await invalidate_user_cache(USER["email"])
+
+    assert user_cache.get(USER["email"]) is None
+    pipe.delete.assert_called_once_with(f"get_user_from_cache:{USER['email']}")
+    pipe.publish.assert_called_once_with("token_revocations", f"user {USER['email']}")
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("src.database.db.rc", new_callable=AsyncMock)
+async def test_get_user_from_cache_releases_connection_after_db_lookup(
+    mock_rc, sqlite_session, db_user
+):
+    mock_rc.get.return_value = None
+
+    user = await get_user_from_cache(db_user.email, sqlite_session)
+
+    assert user.id == db_user.id
+    assert not sqlite_session.in_transaction()
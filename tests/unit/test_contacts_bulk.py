@@ -0,0 +1,153 @@
+import pytest
+from datetime import date
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from src.database.db import get_db
+from src.repository.contacts import (
+    bulk_create_contacts,
+    bulk_delete_contacts,
+    bulk_update_contacts,
+    get_contact,
+    get_contacts_by_ids,
+)
+from src.schemas.schemas import ContactBulkUpdate
+from src.services.auth import auth_service
+
+
+@pytest.fixture
+def bulk_client(sqlite_session, db_user):
+    from src.main import app
+
+    app.dependency_overrides[get_db] = lambda: sqlite_session
+    app.dependency_overrides[auth_service.get_current_user] = lambda: db_user
+    yield AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_bulk_repository_roundtrip(sqlite_session, db_user, make_contact):
+    contacts = [make_contact() for _ in range(3)]
+    created = await bulk_create_contacts(sqlite_session, contacts, db_user)
+    ids = [contact.id for contact in created]
+    assert [c.first_name for c in created] == [c.first_name for c in contacts]
+
+    updated = await bulk_update_contacts(
+        sqlite_session,
+        [
+            ContactBulkUpdate(id=ids[0], first_name="Changed"),
+            ContactBulkUpdate(id=ids[1], birthday=date(1991, 7, 4)),
+            ContactBulkUpdate(id=9999, first_name="Missing"),
+        ],
+        db_user,
+    )
+    fetched = await get_contacts_by_ids(sqlite_session, ids + [9999], db_user)
+    deleted = await bulk_delete_contacts(sqlite_session, [ids[2], 9999], db_user)
+
+    assert updated == ids[:2]
+    assert [c.id for c in fetched] == ids
+    assert fetched[0].first_name == "Changed"
+    assert (await get_contact(sqlite_session, ids[1], db_user)).birthday_md == 704
+    assert deleted == [ids[2]]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_matches_the_owner_as_well_as_the_id(
+    sqlite_session, db_user, make_contact
+):
+    created = await bulk_create_contacts(
+        sqlite_session, [make_contact(), make_contact()], db_user
+    )
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = sqlite_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        await bulk_update_contacts(
+            sqlite_session,
+            [
+                ContactBulkUpdate(id=contact.id, last_name="Owned")
+                for contact in created
+            ],
+            db_user,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    updates = [s for s in statements if s.startswith("UPDATE")]
+    assert len(updates) == 1
+    assert "contacts.id = ?" in updates[0] and "contacts.user_id = ?" in updates[0]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_reports_each_item(bulk_client, make_contact):
+    payload = [
+        make_contact().model_dump(mode="json"),
+        {"first_name": "NoEmail"},
+        make_contact().model_dump(mode="json"),
+    ]
+
+    async with bulk_client as client:
+        response = await client.post("/api/contacts/contacts/bulk", json=payload)
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["succeeded"] == 2
+    assert body["failed"] == 1
+    assert [r["status"] for r in body["results"]] == ["created", "invalid", "created"]
+    assert "email" in body["results"][1]["detail"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_patch_delete_and_multi_get(bulk_client, make_contact):
+    async with bulk_client as client:
+        created = await client.post(
+            "/api/contacts/contacts/bulk",
+            json=[
+                make_contact().model_dump(mode="json"),
+                make_contact().model_dump(mode="json"),
+            ],
+        )
+        first, second = [r["id"] for r in created.json()["results"]]
+
+        patched = await client.patch(
+            "/api/contacts/contacts/bulk",
+            json=[{"id": first, "last_name": "New"}, {"id": 9999, "last_name": "X"}],
+        )
+        deleted = await client.request(
+            "DELETE", "/api/contacts/contacts/bulk", json={"ids": [second, 9999]}
+        )
+        fetched = await client.get(
+            "/api/contacts/contacts/", params={"ids": [first, second]}
+        )
+
+    assert [r["status"] for r in patched.json()["results"]] == ["updated", "not_found"]
+    assert [r["status"] for r in deleted.json()["results"]] == ["deleted", "not_found"]
+    assert [c["last_name"] for c in fetched.json()] == ["New"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_patch_rejects_nulls_on_required_fields_per_item(
+    bulk_client, make_contact
+):
+    async with bulk_client as client:
+        created = await client.post(
+            "/api/contacts/contacts/bulk", json=[make_contact().model_dump(mode="json")]
+        )
+        contact_id = created.json()["results"][0]["id"]
+
+        patched = await client.patch(
+            "/api/contacts/contacts/bulk",
+            json=[
+                {"id": contact_id, "first_name": None},
+                {"id": contact_id, "additional_data": None, "last_name": "Kept"},
+            ],
+        )
+
+    body = patched.json()
+    assert patched.status_code == 200
+    assert [r["status"] for r in body["results"]] == ["invalid", "updated"]
+    assert "first_name" in body["results"][0]["detail"]
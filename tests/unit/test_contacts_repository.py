@@ -0,0 +1,97 @@
+import pytest
+from fastapi import HTTPException
+
+from src.repository.contacts import (
+    decode_cursor,
+    delete_contact,
+    encode_cursor,
+    get_contact,
+    get_contacts,
+    get_contacts_page,
+    update_contact,
+)
+from src.schemas.schemas import ContactUpdate
+
+
+def test_cursor_roundtrip():
+    token = encode_cursor({"id": 42})
+    assert "=" not in token
+    assert decode_cursor(token) == {"id": 42}
+
+
+def test_decode_cursor_invalid():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor!")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_page_walks_all_contacts(
+    sqlite_session, db_user, add_contact
+):
+    for _ in range(7):
+        await add_contact()
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await get_contacts_page(sqlite_session, db_user, 3, cursor)
+        seen.extend(contact.id for contact in page)
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == 7
+    offset_page = await get_contacts(sqlite_session, db_user, skip=3, limit=3)
+    assert [c.id for c in offset_page] == seen[3:6]
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_page_last_page_has_no_cursor(
+    sqlite_session, db_user, add_contact
+):
+    for _ in range(3):
+        await add_contact()
+
+    page, cursor = await get_contacts_page(sqlite_session, db_user, 3)
+
+    assert len(page) == 3
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_update_contact_returns_updated_row(sqlite_session, db_user, add_contact):
+    contact = await add_contact(last_name="Lee")
+
+    updated = await update_contact(
+        sqlite_session, contact.id, ContactUpdate(first_name="Renamed"), db_user
+    )
+
+    assert updated.id == contact.id
+    assert updated.first_name == "Renamed"
+    assert updated.last_name == "Lee"
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_ignore_other_users_contacts(
+    sqlite_session, db_user, add_contact
+):
+    contact = await add_contact()
+    stranger = type("User", (), {"id": db_user.id + 1})()
+
+    assert (
+        await update_contact(
+            sqlite_session, contact.id, ContactUpdate(first_name="X"), stranger
+        )
+        is None
+    )
+    assert await delete_contact(sqlite_session, contact.id, stranger) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_contact_returns_deleted_row(sqlite_session, db_user, add_contact):
+    contact = await add_contact()
+
+    deleted = await delete_contact(sqlite_session, contact.id, db_user)
+
+    assert deleted.id == contact.id
+    assert await get_contact(sqlite_session, contact.id, db_user) is None
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from unittest.mock import patch
+
+from src.services.auth import auth_service
+from src.services.executor import BoundedExecutor
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_runs_off_the_event_loop():
+    executor = BoundedExecutor("test_thread", max_workers=1, max_queue=4)
+
+    name = await executor.run(lambda: threading.current_thread().name)
+
+    assert name.startswith("test_thread")
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_rejects_when_queue_is_full():
+    executor = BoundedExecutor("test_full", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    await asyncio.sleep(0)
+    with pytest.raises(HTTPException) as exc:
+        await executor.run(lambda: None)
+    release.set()
+    await running
+
+    assert exc.value.status_code == 503
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_check_password_async():
+    hashed = await auth_service.hash_password("secret123")
+
+    assert await auth_service.check_password("secret123", hashed) == (True, None)
+    assert (await auth_service.check_password("wrong", hashed))[0] is False
+
+
+@pytest.mark.asyncio
+async def test_check_password_returns_rehash_for_deprecated_scheme():
+    legacy_hash = auth_service.get_password_hash("secret123")
+    upgraded = CryptContext(schemes=["sha256_crypt", "bcrypt"], deprecated="auto")
+
+    with patch.object(auth_service, "pwd_context", upgraded):
+        valid, new_hash = await auth_service.check_password("secret123", legacy_hash)
+
+    assert valid is True
+    assert new_hash.startswith("$5$")
@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date
+from unittest.mock import patch
+from httpx import ASGITransport, AsyncClient
+
+from src.database.shards import ShardMap
+from src.repository.contacts import bulk_create_contacts, stream_contacts
+from src.schemas.schemas import ContactCreate, ContactResponse
+from src.services.auth import auth_service
+from src.services.export import EXPORT_FIELDS, render_export, render_json
+
+ROW = (7, "Ann", "Lee, Jr", "ann@example.com", "+380501112233", date(1990, 2, 3), None)
+
+
+async def batches(*items):
+    for item in items:
+        yield item
+
+
+async def collect(export_format, *items):
+    return "".join(
+        [chunk async for chunk in render_export(batches(*items), export_format)]
+    )
+
+
+@pytest.mark.asyncio
+async def test_render_csv_has_header_and_rows():
+    output = await collect("csv", [ROW], [ROW])
+
+    rows = list(csv.reader(io.StringIO(output)))
+    assert rows[0][:3] == ["id", "first_name", "last_name"]
+    assert rows[1][2] == "Lee, Jr"
+    assert rows[1][5] == "1990-02-03"
+    assert len(rows) == 3
+
+
+def test_render_json_matches_the_response_model_and_ignores_extra_columns():
+    output = json.loads(render_json([ROW, (*ROW[:6], "note", 0.5)]))
+
+    expected = ContactResponse.model_validate(dict(zip(EXPORT_FIELDS, ROW)))
+    assert output[0] == expected.model_dump(mode="json")
+    assert output[1]["additional_data"] == "note"
+    assert "score" not in output[1] and len(output[1]) == 7
+
+
+@pytest.mark.asyncio
+async def test_render_ndjson_one_object_per_line():
+    output = await collect("ndjson", [ROW, ROW])
+
+    lines = output.splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["birthday"] == "1990-02-03"
+
+
+@pytest.mark.asyncio
+async def test_render_vcard_escapes_values():
+    output = await collect("vcard", [ROW])
+
+    assert output.startswith("BEGIN:VCARD\r\nVERSION:3.0\r\n")
+    assert "N:Lee\\, Jr;Ann;;;\r\n" in output
+    assert "NOTE" not in output
+
+
+@pytest.mark.asyncio
+async def test_render_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        await collect("xml", [ROW])
+
+
+@pytest.mark.asyncio
+async def test_stream_contacts_yields_batches(sqlite_session, db_user):
+    await bulk_create_contacts(
+        sqlite_session,
+        [
+            ContactCreate(
+                first_name=f"F{n}",
+                last_name="L",
+                email=f"c{n}@example.com",
+                phone_number="+380500000000",
+                birthday=date(1990, 1, 1),
+            )
+            for n in range(5)
+        ],
+        db_user,
+    )
+
+    sizes = [len(batch) async for batch in stream_contacts(sqlite_session, db_user, 2)]
+
+    assert sizes == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_attachment(sqlite_session, db_user):
+    from src.main import app
+
+    class SessionContext:
+        async def __aenter__(self):
+            return sqlite_session
+
+        async def __aexit__(self, *args):
+            return False
+
+    app.dependency_overrides[auth_service.get_current_user] = lambda: db_user
+    try:
+        shards = ShardMap({0: SessionContext})
+        with patch("src.routers.contacts.shard_map", shards):
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                response = await client.get(
+                    "/api/contacts/contacts/export", params={"format": "ndjson"}
+                )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "contacts.ndjson" in response.headers["content-disposition"]
+    assert response.text == ""
@@ -0,0 +1,118 @@
+import io
+import pytest
+import threading
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+from unittest.mock import AsyncMock, patch
+
+from src.database.db import get_db
+from src.repository.contacts import get_contact, get_contacts
+from src.services.auth import auth_service
+from src.services.importer import import_contacts, import_executor, parse_vcard
+
+CSV = """id,first_name,last_name,email,phone_number,birthday,additional_data
+1,Ann,Lee,ann@example.com,+380501112233,1990-02-03,
+2,Bob,Ray,not-an-email,+380501112234,1991-04-05,note
+3,Cid,Moe,cid@example.com,+380501112235,1992-06-07,friend
+"""
+
+VCARD = (
+    "BEGIN:VCARD\r\nVERSION:3.0\r\nN:Lee\\, Jr;Ann;;;\r\n"
+    "EMAIL;TYPE=INTERNET:ann@example.com\r\nTEL:+380501112233\r\n"
+    "BDAY:19900203\r\nNOTE:long \r\n note\r\nEND:VCARD\r\n"
+)
+
+
+def test_parse_vcard_unfolds_and_unescapes():
+    cards = list(parse_vcard(io.StringIO(VCARD)))
+
+    assert cards == [
+        (
+            1,
+            {
+                "last_name": "Lee, Jr",
+                "first_name": "Ann",
+                "email": "ann@example.com",
+                "phone_number": "+380501112233",
+                "birthday": "1990-02-03",
+                "additional_data": "long note",
+            },
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_csv_reports_progress_and_row_errors(sqlite_session, db_user):
+    progress = []
+
+    report = await import_contacts(
+        sqlite_session,
+        io.StringIO(CSV),
+        "csv",
+        db_user,
+        chunk_size=1,
+        on_progress=lambda r: progress.append(r.processed),
+    )
+    contacts = await get_contacts(sqlite_session, db_user)
+
+    assert (report.processed, report.imported, report.failed) == (3, 2, 1)
+    assert report.errors[0].row == 2
+    assert "email" in report.errors[0].detail
+    assert progress == [1, 3, 3]
+    assert [c.first_name for c in contacts] == ["Ann", "Cid"]
+    assert contacts[0].additional_data is None
+    stored = await get_contact(sqlite_session, contacts[1].id, db_user)
+    assert stored.birthday_md == 607
+
+
+@pytest.mark.asyncio
+async def test_import_reads_and_validates_off_the_event_loop(sqlite_session, db_user):
+    readers = set()
+
+    def lines():
+        for line in io.StringIO(CSV):
+            readers.add(threading.get_ident())
+            yield line
+
+    report = await import_contacts(sqlite_session, lines(), "csv", db_user)
+
+    assert report.imported == 2
+    assert readers and threading.get_ident() not in readers
+
+
+async def post_import(sqlite_session, db_user, content, format):
+    from src.main import app
+
+    app.dependency_overrides[get_db] = lambda: sqlite_session
+    app.dependency_overrides[auth_service.get_current_user] = lambda: db_user
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await client.post(
+                "/api/contacts/contacts/import",
+                params={"format": format},
+                files={"file": ("contacts", content, "text/plain")},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_import_endpoint_returns_503_when_imports_are_queued(
+    sqlite_session, db_user
+):
+    busy = HTTPException(status_code=503, detail="Server is busy, please retry")
+
+    with patch.object(import_executor, "run", AsyncMock(side_effect=busy)):
+        response = await post_import(sqlite_session, db_user, CSV.encode(), "csv")
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_import_endpoint_accepts_vcard_upload(sqlite_session, db_user):
+    response = await post_import(sqlite_session, db_user, VCARD.encode(), "vcard")
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
@@ -0,0 +1,35 @@
+import importlib
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from src.database.models import CONTACT_PARTITION_DDL, CONTACT_PARTITIONS, Contact
+
+
+def test_contacts_is_hash_partitioned_on_postgresql():
+    ddl = str(CreateTable(Contact.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "PRIMARY KEY (id, user_id)" in ddl
+    assert "PARTITION BY HASH (user_id)" in ddl
+    assert len(CONTACT_PARTITION_DDL) == CONTACT_PARTITIONS
+    assert CONTACT_PARTITION_DDL[-1] == (
+        "CREATE TABLE contacts_p15 PARTITION OF contacts "
+        "FOR VALUES WITH (MODULUS 16, REMAINDER 15)"
+    )
+
+
+def test_contacts_keeps_plain_table_on_sqlite():
+    ddl = str(CreateTable(Contact.__table__).compile(dialect=sqlite.dialect()))
+
+    assert "PRIMARY KEY (id)" in ddl
+    assert "PARTITION" not in ddl
+    assert [column.name for column in Contact.__mapper__.primary_key] == ["id"]
+
+
+def test_migrations_use_model_partition_count():
+    for revision in (
+        "d2a7f4c81b39_add_partitioned_contacts_shadow",
+        "e8b3c6d05a14_swap_in_partitioned_contacts",
+    ):
+        module = importlib.import_module(f"migrations.versions.{revision}")
+        assert module.PARTITIONS == CONTACT_PARTITIONS
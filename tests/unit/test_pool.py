@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.db import (
+    DB_POOL_WAIT_SECONDS,
+    InstrumentedQueuePool,
+    pool_options,
+    prewarm_pool,
+)
+
+
+def wait_count() -> float:
+    samples = DB_POOL_WAIT_SECONDS.collect()[0].samples
+    return next(s.value for s in samples if s.name.endswith("_count"))
+
+
+def test_pool_options_from_settings():
+    options = pool_options("postgresql+asyncpg://u:p@localhost/db")
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 10
+    assert options["pool_pre_ping"] is True
+    assert pool_options("sqlite+aiosqlite:///:memory:") == {"pool_pre_ping": True}
+
+
+@pytest.mark.asyncio
+async def test_prewarm_pool_opens_connections_up_to_pool_size(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=3,
+        max_overflow=0,
+    )
+    waits_before = wait_count()
+
+    with patch("src.database.db.engine", engine):
+        warmed = await prewarm_pool(10)
+
+    assert warmed == 3
+    assert engine.sync_engine.pool.checkedin() == 3
+    assert wait_count() == waits_before + 3
+    await engine.dispose()
+
+
+def test_pool_options_pgbouncer_disables_statement_caches():
+    options = pool_options("postgresql+asyncpg://u:p@localhost/db", pgbouncer=True)
+    connect_args = options["connect_args"]
+
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func()
+    assert "server_settings" not in connect_args
+
+
+def test_pool_options_set_the_default_statement_timeout_per_connection():
+    options = pool_options("postgresql+asyncpg://u:p@localhost/db", pgbouncer=False)
+    disabled = pool_options(
+        "postgresql+asyncpg://u:p@localhost/db", pgbouncer=False, statement_timeout_ms=0
+    )
+
+    assert options["connect_args"] == {
+        "server_settings": {"statement_timeout": "30000"}
+    }
+    assert "connect_args" not in disabled
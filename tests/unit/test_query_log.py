@@ -0,0 +1,88 @@
+import logging
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.database.query_log import (
+    QUERY_DURATION_SECONDS,
+    current_route,
+    fingerprint,
+    install_query_log,
+)
+
+
+def observations(normalized: str) -> float:
+    samples = QUERY_DURATION_SECONDS.collect()[0].samples
+    return next(
+        s.value
+        for s in samples
+        if s.name.endswith("_count") and s.labels.get("fingerprint") == normalized
+    )
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        (
+            "SELECT * FROM contacts WHERE id = $1 AND email = 'a@b.c'",
+            "SELECT * FROM contacts WHERE id = ? AND email = ?",
+        ),
+        (
+            "SELECT *\n  FROM contacts WHERE id IN (%(id_1)s, %(id_2)s) LIMIT 10",
+            "SELECT * FROM contacts WHERE id IN (?+) LIMIT ?",
+        ),
+        ("SELECT t1.x FROM t1 WHERE a = :a", "SELECT t1.x FROM t1 WHERE a = ?"),
+        (
+            "SELECT contacts.id FROM contacts "
+            "WHERE contacts.id IN ($1::INTEGER, $2::INTEGER, $3::INTEGER)",
+            "SELECT contacts.id FROM contacts WHERE contacts.id IN (?+)",
+        ),
+        (
+            "INSERT INTO contacts (first_name, birthday, user_id) VALUES "
+            "($1::VARCHAR, $2::DATE, $3::INTEGER), "
+            "($4::VARCHAR, $5::DATE, $6::INTEGER) RETURNING contacts.id",
+            "INSERT INTO contacts (first_name, birthday, user_id) "
+            "VALUES (?+) RETURNING contacts.id",
+        ),
+        (
+            "UPDATE users SET updated_at=$1::TIMESTAMP WITHOUT TIME ZONE, "
+            "note=$2::VARCHAR(50) WHERE users.id = $3::INTEGER",
+            "UPDATE users SET updated_at=?, note=? WHERE users.id = ?",
+        ),
+        (
+            "INSERT INTO t (a) VALUES (%(a_m0)s), (%(a_m1)s), (%(a_m2)s)",
+            "INSERT INTO t (a) VALUES (?+)",
+        ),
+    ],
+)
+def test_fingerprint_normalizes_values(statement, expected):
+    assert fingerprint(statement) == expected
+
+
+def test_slow_queries_are_logged_with_route(caplog):
+    engine = create_engine("sqlite://")
+    install_query_log(engine, threshold_ms=0)
+    token = current_route.set("GET /api/contacts/contacts/")
+    try:
+        with caplog.at_level(logging.INFO, logger="src.database.query_log"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 42"))
+    finally:
+        current_route.reset(token)
+
+    record = caplog.records[-1]
+    assert record.levelno == logging.WARNING
+    assert record.fingerprint == "SELECT ?"
+    assert record.route == "GET /api/contacts/contacts/"
+    assert "42" not in record.getMessage()
+    assert observations("SELECT ?") >= 1
+
+
+def test_fast_queries_are_not_logged_without_sampling(caplog):
+    engine = create_engine("sqlite://")
+    install_query_log(engine, threshold_ms=10_000, sample_rate=0.0)
+
+    with caplog.at_level(logging.INFO, logger="src.database.query_log"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    assert caplog.records == []
@@ -0,0 +1,146 @@
+import json
+import pytest
+from fastapi_limiter import (
+    FastAPILimiter,
+    default_identifier,
+    http_default_callback,
+)
+from httpx import ASGITransport, AsyncClient
+from unittest.mock import AsyncMock, patch
+
+from src.database import db as db_module
+from src.database.db import get_db, user_reads
+from src.database.models import Role, User
+from src.services.auth import auth_service
+from src.services.cache import CachedUser
+
+USER = User(
+    id=4,
+    email="batch@example.com",
+    is_verified=True,
+    avatar_url=None,
+    roles=Role.user,
+    shard=0,
+    token_version=0,
+)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self, raise_on_error=True):
+        self.redis.round_trips += 1
+        self.redis.batches.append([name for name, _ in self.commands])
+        return [self.redis.reply(name, args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """Answers the limiter script and the auth reads, counting round trips."""
+
+    def __init__(self, pexpire=0):
+        self.pexpire = pexpire
+        self.round_trips = 0
+        self.batches = []
+        self.data = {f"get_user_from_cache:{USER.email}": json.dumps(USER.to_dict())}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def reply(self, name, args):
+        if name == "evalsha":
+            return self.pexpire
+        if name == "exists":
+            return int(args[0] in self.data)
+        return self.data.get(args[0])
+
+    def __getattr__(self, name):
+        async def command(*args):
+            self.round_trips += 1
+            return self.reply(name, args)
+
+        return command
+
+
+@pytest.fixture
+def redis():
+    redis = FakeRedis()
+    with (
+        patch.object(FastAPILimiter, "redis", redis),
+        patch.object(FastAPILimiter, "prefix", "fastapi-limiter"),
+        patch.object(FastAPILimiter, "lua_sha", "sha"),
+        patch.object(FastAPILimiter, "identifier", default_identifier),
+        patch.object(FastAPILimiter, "http_callback", http_default_callback),
+        patch.object(db_module, "rc", redis),
+        patch.object(db_module, "replica_engine", object()),
+    ):
+        yield redis
+
+
+async def get_me(redis):
+    from src.main import app
+
+    async def fake_db():
+        yield AsyncMock()
+
+    token = await auth_service.create_user_access_token(USER)
+    app.dependency_overrides[get_db] = fake_db
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await client.get(
+                "/api/users/me", headers={"Authorization": f"Bearer {token}"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_me_costs_one_round_trip_on_a_cold_user_cache(redis):
+    response = await get_me(redis)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == USER.email
+    assert redis.round_trips == 1
+    assert redis.batches == [["evalsha", "get", "exists"]]
+
+
+@pytest.mark.asyncio
+async def test_me_reads_the_sticky_marker_ahead_once_the_user_is_cached(redis):
+    db_module.user_cache.set(USER.email, CachedUser.from_dict(USER.to_dict()))
+
+    response = await get_me(redis)
+
+    assert response.status_code == 200
+    assert redis.batches == [["evalsha", "exists"]]
+    assert redis.round_trips == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_requests_get_429_before_authenticating(redis):
+    redis.pexpire = 30000
+
+    response = await get_me(redis)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert redis.round_trips == 1
+
+
+def test_user_reads_skip_what_the_process_already_caches():
+    assert user_reads("nobody@example.com") == [
+        ("get", "get_user_from_cache:nobody@example.com")
+    ]
+    db_module.user_cache.set(USER.email, CachedUser.from_dict(USER.to_dict()))
+    assert user_reads(USER.email) == []
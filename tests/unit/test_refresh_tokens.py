@@ -0,0 +1,141 @@
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from unittest.mock import AsyncMock, patch
+
+from src.services.auth import auth_service
+from src.services.base import settings
+from src.services.cache import CachedUser
+from src.services.refresh_tokens import (
+    REVOKE_SCRIPT,
+    ROTATE_SCRIPT,
+    RefreshTokenError,
+    RefreshTokens,
+)
+
+
+class FakeRedis:
+    """In-memory Redis running the rotation script's logic in Python."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def eval(self, script, numkeys, key, *args):
+        if script == REVOKE_SCRIPT:
+            entry = self.data.get(key)
+            if entry is None or entry[32:].partition(" ")[2] != args[0]:
+                return 0
+            del self.data[key]
+            return 1
+        assert script == ROTATE_SCRIPT
+        digest, new_digest = args
+        entry = self.data.get(key)
+        if entry is None:
+            return 0
+        if entry[:32] != digest:
+            del self.data[key]
+            return -1
+        self.data[key] = new_digest + entry[32:]
+        return entry
+
+
+@pytest.fixture
+def tokens():
+    tokens = RefreshTokens(FakeRedis(), ttl=60)
+    with patch("src.services.auth.refresh_tokens", tokens):
+        yield tokens
+
+
+@pytest.mark.asyncio
+async def test_rotation_returns_the_user_and_invalidates_the_old_token(tokens):
+    first = await tokens.issue("ann@example.com", 2)
+
+    email, version, second = await tokens.rotate(first)
+
+    assert (email, version) == ("ann@example.com", 2)
+    assert second != first
+    assert second.split(".")[0] == first.split(".")[0]
+    assert len(next(iter(tokens.redis.data.values()))) < 64
+
+
+@pytest.mark.asyncio
+async def test_reuse_revokes_the_whole_family(tokens):
+    first = await tokens.issue("ann@example.com", 0)
+    _, _, second = await tokens.rotate(first)
+
+    with pytest.raises(RefreshTokenError):
+        await tokens.rotate(first)
+    with pytest.raises(RefreshTokenError):
+        await tokens.rotate(second)
+    assert tokens.redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_logout_only_revokes_refresh_tokens_of_the_same_user(tokens):
+    ann_refresh = await tokens.issue("ann@example.com", 0)
+    bob = CachedUser(6, "bob@example.com", True, None, "user", 0, 0)
+    bob_token = await auth_service.create_user_access_token(bob)
+
+    with patch("src.services.auth.revoke_token", new_callable=AsyncMock):
+        await auth_service.logout(bob_token, ann_refresh, False, AsyncMock())
+    assert len(tokens.redis.data) == 1
+
+    assert not await tokens.revoke(ann_refresh, "bob@example.com")
+    assert await tokens.revoke(ann_refresh, "ann@example.com")
+    assert tokens.redis.data == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token", ["", "nodot", ".secret", "unknown.secret"])
+async def test_malformed_or_unknown_tokens_are_rejected(tokens, token):
+    with pytest.raises(RefreshTokenError):
+        await tokens.rotate(token)
+
+
+@pytest.mark.asyncio
+async def test_refresh_issues_an_access_token_without_hashing(tokens):
+    user = CachedUser(5, "ann@example.com", True, None, "user", 0, 1)
+    refresh_token = await auth_service.create_refresh_token(user)
+
+    with (
+        patch(
+            "src.services.auth.get_user_from_cache",
+            new_callable=AsyncMock,
+            return_value=user,
+        ),
+        patch.object(auth_service.pwd_context, "verify_and_update") as verify,
+    ):
+        access_token, new_refresh = await auth_service.refresh_access_token(
+            refresh_token, AsyncMock()
+        )
+
+    verify.assert_not_called()
+    claims = jwt.decode(
+        access_token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+    )
+    assert (claims["sub"], claims["ver"]) == ("ann@example.com", 1)
+    assert new_refresh != refresh_token
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_rejected_after_tokens_are_revoked(tokens):
+    user = CachedUser(5, "ann@example.com", True, None, "user", 0, 1)
+    refresh_token = await auth_service.create_refresh_token(user)
+    user.token_version = 2
+
+    with patch(
+        "src.services.auth.get_user_from_cache",
+        new_callable=AsyncMock,
+        return_value=user,
+    ):
+        with pytest.raises(HTTPException) as exc:
+            await auth_service.refresh_access_token(refresh_token, AsyncMock())
+
+    assert exc.value.status_code == 401
+    assert tokens.redis.data == {}
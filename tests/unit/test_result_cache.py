@@ -0,0 +1,215 @@
+import pytest
+import pytest_asyncio
+from datetime import date
+from httpx import ASGITransport, AsyncClient
+from unittest.mock import AsyncMock, patch
+
+from src.repository.contacts import delete_contact, update_contact
+from src.schemas.schemas import ContactUpdate
+from src.services.auth import auth_service
+from src.services.result_cache import ResultCache
+
+
+class FakeRedis:
+    """The handful of Redis commands the result cache uses, in memory."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+@pytest_asyncio.fixture
+async def cache():
+    cache = ResultCache(FakeRedis(), "test_result", ttl=60)
+    with patch("src.routers.contacts.contacts_cache", cache):
+        yield cache
+
+
+@pytest.mark.asyncio
+async def test_lookup_misses_then_hits_and_keys_differ_by_params(cache):
+    key, value = await cache.lookup(1, "list", {"limit": 10})
+    assert value is None
+    await cache.store(key, "[1,2]")
+
+    assert await cache.lookup(1, "list", {"limit": 10}) == (key, "[1,2]")
+    other_key, other = await cache.lookup(1, "list", {"limit": 20})
+    assert other is None and other_key != key
+    assert (await cache.lookup(2, "list", {"limit": 10}))[1] is None
+
+
+@pytest.mark.asyncio
+async def test_bump_orphans_every_entry_of_the_user_only(cache):
+    for user_id in (1, 2):
+        key, _ = await cache.lookup(user_id, "search", {"query": "ann"})
+        await cache.store(key, "[]")
+    generation = await cache.generation(1)
+
+    await cache.bump(1)
+
+    assert await cache.generation(1) == generation + 1
+    assert (await cache.lookup(1, "search", {"query": "ann"}))[1] is None
+    assert (await cache.lookup(2, "search", {"query": "ann"}))[1] == "[]"
+
+
+@pytest.mark.asyncio
+async def test_bump_of_a_missing_counter_starts_from_the_clock(cache):
+    await cache.bump(7)
+
+    assert await cache.generation(7) > 1_000_000
+
+
+@pytest.mark.asyncio
+async def test_disabled_or_failing_redis_falls_through():
+    redis = AsyncMock()
+    disabled = ResultCache(redis, "test_disabled", ttl=0)
+    assert await disabled.lookup(1, "list", {}) == (None, None)
+    await disabled.bump(1)
+    redis.get.assert_not_called()
+
+    redis.get.side_effect = ConnectionError("down")
+    failing = ResultCache(redis, "test_failing", ttl=60)
+    assert await failing.lookup(1, "list", {}) == (None, None)
+    await failing.store(None, "[]")
+    redis.setex.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_contact_writes_bump_the_generation(
+    cache, sqlite_session, db_user, make_contact
+):
+    from src.main import app
+    from src.database.shards import get_shard_db, get_writable_shard_db
+
+    async def fake_db():
+        yield sqlite_session
+
+    generations = [await cache.generation(db_user.id)]
+    app.dependency_overrides[auth_service.get_current_user] = lambda: db_user
+    app.dependency_overrides[get_shard_db] = fake_db
+    app.dependency_overrides[get_writable_shard_db] = fake_db
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            created = await client.post(
+                "/api/contacts/contacts/",
+                json=make_contact().model_dump(mode="json"),
+            )
+            contact_id = created.json()["id"]
+            generations.append(await cache.generation(db_user.id))
+            await client.put(
+                f"/api/contacts/contacts/{contact_id}", json={"first_name": "Anna"}
+            )
+            generations.append(await cache.generation(db_user.id))
+            await client.delete(f"/api/contacts/contacts/{contact_id}")
+            generations.append(await cache.generation(db_user.id))
+            await client.delete(f"/api/contacts/contacts/{contact_id}")
+            generations.append(await cache.generation(db_user.id))
+    finally:
+        app.dependency_overrides.clear()
+
+    first = generations[0]
+    assert generations == [first, first + 1, first + 2, first + 3, first + 3]
+
+
+@pytest.mark.asyncio
+async def test_repository_writes_do_not_touch_redis(
+    sqlite_session, db_user, add_contact
+):
+    redis = AsyncMock()
+    with patch("src.services.result_cache.contacts_cache.redis", redis):
+        contact = await add_contact()
+        await update_contact(
+            sqlite_session, contact.id, ContactUpdate(first_name="Anna"), db_user
+        )
+        await delete_contact(sqlite_session, contact.id, db_user)
+
+    assert redis.method_calls == []
+
+
+@pytest.mark.asyncio
+async def test_list_endpoint_serves_cached_pages_until_a_write(
+    cache, sqlite_session, db_user, make_contact, add_contact
+):
+    from src.main import app
+    from src.database.shards import get_shard_db, get_writable_shard_db
+
+    async def fake_db():
+        yield sqlite_session
+
+    await add_contact(first_name="Ann", birthday=date(1990, 5, 17))
+    app.dependency_overrides[auth_service.get_current_user] = lambda: db_user
+    app.dependency_overrides[get_shard_db] = fake_db
+    app.dependency_overrides[get_writable_shard_db] = fake_db
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            first = await client.get("/api/contacts/contacts/", params={"limit": 1})
+            with patch(
+                "src.routers.contacts.get_contacts_page", new_callable=AsyncMock
+            ) as mock_page:
+                cached = await client.get(
+                    "/api/contacts/contacts/", params={"limit": 1}
+                )
+            mock_page.assert_not_called()
+
+            await client.post(
+                "/api/contacts/contacts/",
+                json=make_contact(
+                    first_name="Bob", birthday=date(1990, 5, 17)
+                ).model_dump(mode="json"),
+            )
+            fresh = await client.get("/api/contacts/contacts/", params={"limit": 1})
+            birthdays = await client.get(
+                "/api/contacts/contacts/birthdays/",
+                params={"days": 30, "start_date": "2025-05-10"},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == cached.status_code == 200
+    assert cached.json() == first.json()
+    assert [c["first_name"] for c in first.json()] == ["Ann"]
+    assert "X-Next-Cursor" not in first.headers
+    assert "X-Next-Cursor" in fresh.headers
+    assert [b["first_name"] for b in birthdays.json()] == ["Ann", "Bob"]
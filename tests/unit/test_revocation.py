@@ -0,0 +1,212 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.database.db import user_cache
+from src.database.models import Role, User
+from src.services import revocation
+from src.services.auth import auth_service
+from src.services.cache import BloomFilter, CachedUser
+from src.services.revocation import (
+    RevocationListener,
+    fence_writes,
+    is_fenced,
+    is_revoked,
+    lift_fence,
+    revoke_token,
+)
+from src.services.token_versions import is_current, token_versions
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.redis.data[key] = str(value)
+
+    def delete(self, key):
+        self.redis.data.pop(key, None)
+
+    def publish(self, channel, message):
+        self.redis.published.append((channel, message))
+
+    async def execute(self):
+        return []
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.published = []
+        self.exists = AsyncMock(side_effect=lambda key: int(key in self.data))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def scan_iter(self, match, count=None):
+        for key in list(self.data):
+            if key.startswith(match.rstrip("*")):
+                yield key
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+
+@pytest.fixture
+def redis():
+    redis = FakeRedis()
+    with (
+        patch.object(revocation, "rc", redis),
+        patch("src.database.db.rc", redis),
+        patch.object(revocation, "revoked_tokens", BloomFilter(1 << 16, 7)),
+        patch.object(revocation, "moving_users", {}),
+    ):
+        yield redis
+    token_versions.clear()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1 << 16, 7)
+    ids = [f"token-{n}" for n in range(1000)]
+    for token_id in ids:
+        bloom.add(token_id)
+
+    assert all(token_id in bloom for token_id in ids)
+    false_positives = sum(f"other-{n}" in bloom for n in range(1000))
+    assert false_positives < 10
+
+    bloom.clear()
+    assert "token-1" not in bloom
+
+
+@pytest.mark.asyncio
+async def test_unrevoked_tokens_are_checked_without_redis(redis):
+    assert not await is_revoked("fresh")
+    redis.exists.assert_not_called()
+
+    await revoke_token("stolen", 60)
+
+    assert await is_revoked("stolen")
+    assert redis.published == [("token_revocations", "jti stolen")]
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_checked_in_redis_until_the_listener_is_synced(redis):
+    user = CachedUser(5, "ann@example.com", True, None, "user", 0, 0)
+    token = await auth_service.create_user_access_token(user)
+    jti = auth_service.decode_access_token(token)["jti"]
+    # Revoked by another worker; this process has not heard of it yet.
+    redis.data[f"revoked_token:{jti}"] = "1"
+
+    with (
+        patch.object(revocation.revocation_listener, "synced", False),
+        patch(
+            "src.services.auth.get_user_from_cache",
+            new_callable=AsyncMock,
+            return_value=user,
+        ),
+    ):
+        with pytest.raises(HTTPException) as exc:
+            await auth_service.get_current_user(token, AsyncMock())
+
+    assert exc.value.status_code == 401
+    redis.exists.assert_awaited_with(f"revoked_token:{jti}")
+
+
+@pytest.mark.asyncio
+async def test_listener_applies_messages_and_loads_from_redis(redis):
+    listener = RevocationListener(redis, rebuild_interval=60)
+    user_cache.set("ann@example.com", CachedUser(9, "ann@example.com"))
+
+    listener.handle("jti abc")
+    listener.handle("ver 9 4 ann@example.com")
+
+    assert "abc" in revocation.revoked_tokens
+    assert not is_current(9, 3) and is_current(9, 4)
+    assert user_cache.get("ann@example.com") is None
+
+    user_cache.set("bob@example.com", CachedUser(10, "bob@example.com"))
+    listener.handle("user bob@example.com")
+    assert user_cache.get("bob@example.com") is None
+
+    redis.data.update({"revoked_token:xyz": "1", "token_version:11": "2"})
+    await listener.load()
+
+    assert "xyz" in revocation.revoked_tokens
+    assert "abc" not in revocation.revoked_tokens
+    assert not is_current(11, 1)
+
+
+@pytest.mark.asyncio
+async def test_write_fences_are_shared_and_checked_in_redis_until_synced(redis):
+    listener = RevocationListener(redis, rebuild_interval=60)
+
+    await fence_writes(7, 30)
+
+    assert redis.published[-1][1].startswith("fence 7 ")
+    with patch.object(revocation.revocation_listener, "synced", False):
+        revocation.moving_users.clear()
+        assert await is_fenced(7)
+    redis.exists.assert_awaited_with("moving_user:7")
+
+    assert not await is_fenced(7)
+    listener.handle(redis.published[-1][1])
+    assert await is_fenced(7)
+    listener.handle("unfence 7")
+    assert not await is_fenced(7)
+    await listener.load()
+    assert await is_fenced(7)
+
+    await lift_fence(7)
+    assert not await is_fenced(7)
+    with patch.object(revocation.revocation_listener, "synced", False):
+        assert not await is_fenced(7)
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_the_access_token(redis):
+    user = CachedUser(5, "ann@example.com", True, None, "user", 0, 0)
+    token = await auth_service.create_user_access_token(user)
+    db = AsyncMock()
+
+    with patch(
+        "src.services.auth.get_user_from_cache",
+        new_callable=AsyncMock,
+        return_value=user,
+    ):
+        assert await auth_service.get_current_user(token, db) is user
+        await auth_service.logout(token, None, False, db)
+        with pytest.raises(HTTPException) as exc:
+            await auth_service.get_current_user(token, db)
+
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_everywhere_bumps_and_announces_the_token_version(redis):
+    user = User(id=5, email="ann@example.com", roles=Role.user, token_version=1)
+    token = await auth_service.create_user_access_token(user)
+    db = MagicMock(commit=AsyncMock())
+
+    with (
+        patch(
+            "src.repository.users.get_user_by_email",
+            new_callable=AsyncMock,
+            return_value=user,
+        ),
+        patch("src.services.auth.invalidate_user_cache", new_callable=AsyncMock),
+        patch("src.services.auth.refresh_tokens.revoke", new_callable=AsyncMock),
+    ):
+        await auth_service.logout(token, "family.secret", True, db)
+
+    assert user.token_version == 2
+    assert redis.data["token_version:5"] == "2"
+    assert ("token_revocations", "ver 5 2 ann@example.com") in redis.published
+    db.commit.assert_awaited_once()
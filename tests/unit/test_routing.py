@@ -0,0 +1,166 @@
+import json
+import pytest
+import pytest_asyncio
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.database.db import Base, pin_reads_for_user, remember_writes
+from src.database.models import Contact, User
+from src.database.routing import ReplicaMonitor, RoutingSession
+from src.repository.contacts import get_contact, update_contact
+from src.schemas.schemas import ContactUpdate
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    for engine, name in ((primary, "Primary"), (replica, "Replica")):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            user = User(email="owner@example.com", hashed_password="hashed")
+            db.add(user)
+            await db.flush()
+            db.add(
+                Contact(
+                    first_name=name,
+                    last_name="Copy",
+                    email=f"{name.lower()}@example.com",
+                    phone_number="123",
+                    birthday=date(1990, 1, 1),
+                    user_id=user.id,
+                )
+            )
+            await db.commit()
+    yield primary, replica
+    await primary.dispose()
+    await replica.dispose()
+
+
+def routing_session(primary, replica, monitor=None) -> AsyncSession:
+    return AsyncSession(
+        sync_session_class=RoutingSession,
+        primary=primary.sync_engine,
+        replica=replica.sync_engine,
+        monitor=monitor,
+        expire_on_commit=False,
+    )
+
+
+async def first_name(db: AsyncSession) -> str:
+    return (await db.execute(select(Contact.first_name))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_writes_to_primary(engines):
+    primary, replica = engines
+    async with routing_session(primary, replica) as db:
+        owner = (await db.execute(select(User))).scalar_one()
+        contact = await get_contact(db, 1, owner)
+        assert contact.first_name == "Replica"
+
+        updated = await update_contact(db, 1, ContactUpdate(last_name="Moved"), owner)
+        await db.commit()
+
+        assert updated.first_name == "Primary"
+        assert db.info["wrote"] is True
+        # Reads after a write stay on the primary.
+        assert await first_name(db) == "Primary"
+
+
+@pytest.mark.asyncio
+async def test_select_for_update_uses_primary(engines):
+    primary, replica = engines
+    async with routing_session(primary, replica) as db:
+        result = await db.execute(select(Contact.first_name).with_for_update())
+        assert result.scalar_one() == "Primary"
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_falls_back_to_primary(engines):
+    primary, replica = engines
+    monitor = ReplicaMonitor(replica, max_lag=1.0, interval=1.0)
+    async with routing_session(primary, replica, monitor) as db:
+        monitor.healthy = False
+        assert await first_name(db) == "Primary"
+
+    monitor.healthy = True
+    async with routing_session(primary, replica, monitor) as db:
+        assert await first_name(db) == "Replica"
+
+
+@pytest.mark.asyncio
+async def test_replica_monitor_marks_lagging_replica_unhealthy():
+    conn = AsyncMock()
+    conn.execute.return_value.scalar = lambda: 5.0
+    engine = MagicMock()
+    engine.dialect.name = "postgresql"
+    engine.connect.return_value.__aenter__.return_value = conn
+    monitor = ReplicaMonitor(engine, max_lag=2.0, interval=1.0)
+
+    assert await monitor.check() == 5.0
+    assert monitor.healthy is False
+
+    engine.connect.side_effect = OSError("connection refused")
+    assert await monitor.check() is None
+    assert monitor.healthy is False
+
+
+@pytest.mark.asyncio
+@patch("src.database.db.replica_engine", object())
+@patch("src.database.db.rc")
+async def test_user_writes_pin_later_reads_to_primary(mock_rc, engines):
+    primary, replica = engines
+    mock_rc.exists = AsyncMock(return_value=0)
+    mock_rc.setex = AsyncMock()
+
+    async with routing_session(primary, replica) as db:
+        await pin_reads_for_user(db, 1)
+        assert await first_name(db) == "Replica"
+        await remember_writes(db)
+        mock_rc.setex.assert_not_awaited()
+
+        owner = (await db.execute(select(User))).scalar_one()
+        await update_contact(db, 1, ContactUpdate(last_name="Moved"), owner)
+        await remember_writes(db)
+        mock_rc.setex.assert_awaited_once_with("db_primary_sticky:1", 5, 1)
+
+    mock_rc.exists = AsyncMock(return_value=1)
+    async with routing_session(primary, replica) as db:
+        await pin_reads_for_user(db, 1)
+        assert await first_name(db) == "Primary"
+
+
+@pytest.mark.asyncio
+@patch("src.database.db.replica_engine", object())
+@patch("src.database.db.rc")
+async def test_export_after_a_write_reads_from_primary(mock_rc, engines):
+    from httpx import ASGITransport, AsyncClient
+    from src.database.shards import ShardMap
+    from src.main import app
+    from src.services.auth import auth_service
+
+    primary, replica = engines
+    async with AsyncSession(primary) as db:
+        owner = (await db.execute(select(User))).scalar_one()
+    shards = ShardMap({0: lambda: routing_session(primary, replica)})
+    app.dependency_overrides[auth_service.get_current_user] = lambda: owner
+    try:
+        with patch("src.routers.contacts.shard_map", shards):
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                exports = []
+                for sticky in (0, 1):
+                    mock_rc.exists = AsyncMock(return_value=sticky)
+                    response = await client.get(
+                        "/api/contacts/contacts/export", params={"format": "ndjson"}
+                    )
+                    exports.append(json.loads(response.text)["first_name"])
+    finally:
+        app.dependency_overrides.clear()
+
+    assert exports == ["Replica", "Primary"]
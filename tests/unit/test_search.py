@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.repository.search import search_contacts, _postgres_ranking
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_exact_before_prefix_before_substring(
+    sqlite_session, db_user, add_contact
+):
+    substring = await add_contact(first_name="Ann", last_name="McJoan", email="a@x.com")
+    prefix = await add_contact(first_name="Joanna", last_name="Smith", email="b@x.com")
+    exact = await add_contact(first_name="Joan", last_name="Brown", email="c@x.com")
+    await add_contact(first_name="Bob", last_name="Stone", email="d@x.com")
+
+    contacts, cursor = await search_contacts(sqlite_session, "JOAN", db_user)
+
+    assert [c.id for c in contacts] == [exact.id, prefix.id, substring.id]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_search_matches_phone_and_escapes_wildcards(
+    sqlite_session, db_user, add_contact
+):
+    await add_contact(
+        first_name="Ann", last_name="Lee", email="a@x.com", phone_number="+380671112233"
+    )
+
+    by_phone, _ = await search_contacts(sqlite_session, "1112", db_user)
+    wildcard, _ = await search_contacts(sqlite_session, "%", db_user)
+
+    assert len(by_phone) == 1
+    assert wildcard == []
+
+
+@pytest.mark.asyncio
+async def test_search_is_bounded_and_paginates(sqlite_session, db_user, add_contact):
+    for n in range(5):
+        await add_contact(first_name=f"Sam{n}", last_name="Doe", email=f"s{n}@x.com")
+
+    first, cursor = await search_contacts(sqlite_session, "sam", db_user, limit=3)
+    second, last_cursor = await search_contacts(
+        sqlite_session, "sam", db_user, limit=3, cursor=cursor
+    )
+
+    assert len(first) == 3
+    assert len(second) == 2
+    assert last_cursor is None
+    assert {c.id for c in first}.isdisjoint(c.id for c in second)
+
+
+def test_postgres_ranking_uses_indexed_columns():
+    match, score = _postgres_ranking("joan")
+    sql = str(match.compile(dialect=postgresql.dialect()))
+
+    assert "contacts.search_vector @@ websearch_to_tsquery" in sql
+    assert "contacts.search_text LIKE" in sql
@@ -180,6 +180,9 @@ async def test_reset_password_success(mock_db_session, mock_user, test_app):
         patch(
             "src.repository.users.get_user_by_email", AsyncMock(return_value=mock_user)
         ),
+        patch(
+            "src.services.revocation.announce_token_version", new_callable=AsyncMock
+        ) as mock_announce,
     ):
         print(f"Mock rc in test_reset_password_success: {mock_rc}")
         auth_service_reloaded = reload_auth_service()
@@ -197,6 +200,7 @@ async def test_reset_password_success(mock_db_session, mock_user, test_app):
             "new_password", mock_user.hashed_password
         )
         mock_rc.delete.assert_called_with(f"reset_token:{token}")
+        mock_announce.assert_awaited_once_with(mock_user)
 
 
 @pytest.mark.unit
@@ -0,0 +1,250 @@
+import pytest
+import pytest_asyncio
+from datetime import date
+from unittest.mock import AsyncMock, patch
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.db import Base
+from src.database.models import Contact, Role, User
+from src.database.shards import ShardMap, fan_out, get_shard_db, move_user, shard_of
+from src.repository.contacts import count_contacts, get_contacts
+from src.services.auth import auth_service
+from src.services.cache import CachedUser
+
+
+@pytest_asyncio.fixture
+async def shards(tmp_path):
+    engines = {
+        shard: create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / f'shard{shard}.db'}"
+        )
+        for shard in (0, 1)
+    }
+    for engine in engines.values():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    shard_map = ShardMap(
+        {
+            shard: sessionmaker(
+                bind=engine, class_=AsyncSession, expire_on_commit=False
+            )
+            for shard, engine in engines.items()
+        }
+    )
+    with patch("src.database.shards.shard_map", shard_map):
+        yield shard_map
+    for engine in engines.values():
+        await engine.dispose()
+
+
+async def add_user(shard_map, email, contacts, roles=Role.user) -> User:
+    async with shard_map.session(0) as db:
+        user = User(email=email, hashed_password="hashed", roles=roles)
+        db.add(user)
+        await db.flush()
+        db.add_all(
+            Contact(
+                first_name=f"Contact{n}",
+                last_name="Test",
+                email=f"c{n}@example.com",
+                phone_number="123",
+                birthday=date(1990, 1, 1),
+                user_id=user.id,
+            )
+            for n in range(contacts)
+        )
+        await db.commit()
+        return user
+
+
+def test_shard_of_accepts_models_cached_users_and_dicts():
+    assert shard_of(CachedUser(1, "a@example.com", shard=3)) == 3
+    assert shard_of({"id": 1, "shard": 2}) == 2
+    assert shard_of({"id": 1}) == 0
+    with pytest.raises(ValueError):
+        ShardMap({}).session(5)
+
+
+@pytest_asyncio.fixture
+async def fences():
+    events = []
+    with (
+        patch(
+            "src.database.shards.fence_writes",
+            AsyncMock(side_effect=lambda user_id, ttl: events.append("fence")),
+        ),
+        patch(
+            "src.database.shards.lift_fence",
+            AsyncMock(side_effect=lambda user_id: events.append("lift")),
+        ),
+    ):
+        yield events
+
+
+@pytest.mark.asyncio
+@patch("src.database.shards.announce_token_version", new_callable=AsyncMock)
+@patch("src.database.shards.invalidate_user_cache", new_callable=AsyncMock)
+async def test_move_user_copies_contacts_with_ids_and_switches_directory(
+    mock_invalidate, mock_announce, shards, fences
+):
+    user = await add_user(shards, "mover@example.com", 3)
+    await add_user(shards, "stayer@example.com", 2)
+
+    moved = await move_user(user.id, 1, grace=0, settle=0)
+
+    assert moved == 3
+    mock_invalidate.assert_awaited_once_with("mover@example.com")
+    mock_announce.assert_not_awaited()
+    async with shards.session(0) as db:
+        assert (await db.get(User, user.id)).shard == 1
+        assert (await db.get(User, user.id)).token_version == 0
+        assert await get_contacts(db, user) == []
+        assert await count_contacts(db) == 2
+    async with shards.session(1) as db:
+        moved_contacts = await get_contacts(db, user)
+        assert [contact.id for contact in moved_contacts] == [1, 2, 3]
+        # The user row is mirrored so the foreign key holds on the shard.
+        assert (await db.get(User, user.id)).email == "mover@example.com"
+
+    assert fences == ["fence", "lift"]
+    assert await move_user(user.id, 1, grace=0, settle=0) == 0
+
+
+@pytest.mark.asyncio
+@patch("src.database.shards.announce_token_version", new_callable=AsyncMock)
+@patch("src.database.shards.invalidate_user_cache", new_callable=AsyncMock)
+async def test_move_user_revokes_stateless_tokens_which_carry_the_shard(
+    mock_invalidate, mock_announce, shards, fences
+):
+    user = await add_user(shards, "mover@example.com", 1)
+
+    with patch("src.database.shards.settings.AUTH_STATELESS", True):
+        await move_user(user.id, 1, grace=0, settle=0)
+
+    assert mock_announce.await_args.args[0].token_version == 1
+    async with shards.session(0) as db:
+        assert (await db.get(User, user.id)).token_version == 1
+
+
+@pytest.mark.asyncio
+@patch("src.database.shards.announce_token_version", new_callable=AsyncMock)
+@patch("src.database.shards.invalidate_user_cache", new_callable=AsyncMock)
+async def test_move_user_releases_the_source_during_grace_and_sweeps_after(
+    mock_invalidate, mock_announce, shards, fences
+):
+    user = await add_user(shards, "mover@example.com", 2)
+    sessions = []
+    open_session = shards.session
+
+    def tracking_session(shard):
+        session = open_session(shard)
+        sessions.append(session)
+        return session
+
+    async def grace(seconds):
+        assert fences == ["fence"]
+        assert not any(session.in_transaction() for session in sessions)
+        async with open_session(0) as db:
+            db.add(
+                Contact(
+                    first_name="Late",
+                    last_name="Test",
+                    email="late@example.com",
+                    phone_number="123",
+                    birthday=date(1990, 1, 1),
+                    user_id=user.id,
+                )
+            )
+            await db.commit()
+
+    with (
+        patch.object(shards, "session", tracking_session),
+        patch("src.database.shards.asyncio.sleep", grace),
+    ):
+        moved = await move_user(user.id, 1, grace=5, settle=0)
+
+    assert moved == 3
+    async with shards.session(0) as db:
+        assert await get_contacts(db, user) == []
+    async with shards.session(1) as db:
+        assert [c.first_name for c in await get_contacts(db, user)][-1] == "Late"
+
+
+@pytest.mark.asyncio
+async def test_contact_writes_are_refused_while_the_user_moves(shards):
+    from src.main import app
+
+    user = await add_user(shards, "mover@example.com", 1)
+    app.dependency_overrides[auth_service.get_current_user] = lambda: user
+    try:
+        with patch("src.database.shards.is_fenced", AsyncMock(return_value=True)):
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                response = await client.delete("/api/contacts/contacts/1")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    async with shards.session(0) as db:
+        assert await count_contacts(db) == 1
+
+
+@pytest.mark.asyncio
+async def test_fan_out_queries_every_shard(shards):
+    await add_user(shards, "home@example.com", 2)
+    async with shards.session(1) as db:
+        user = User(email="far@example.com", hashed_password="hashed")
+        db.add(user)
+        await db.flush()
+        db.add(
+            Contact(
+                first_name="Far",
+                last_name="Away",
+                email="far@example.com",
+                phone_number="1",
+                birthday=date(1990, 1, 1),
+                user_id=user.id,
+            )
+        )
+        await db.commit()
+
+    assert await fan_out(count_contacts) == {0: 2, 1: 1}
+
+
+@pytest.mark.asyncio
+async def test_get_shard_db_uses_the_users_shard(shards):
+    home_db = object()
+    home = get_shard_db({"id": 1, "shard": 0}, home_db)
+    assert await home.__anext__() is home_db
+
+    remote = get_shard_db({"id": 1, "shard": 1}, home_db)
+    db = await remote.__anext__()
+    assert db is not home_db
+    assert (await db.execute(select(Contact))).all() == []
+    await remote.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint_counts_every_shard(shards):
+    from src.main import app
+
+    await add_user(shards, "home@example.com", 4)
+    app.dependency_overrides[auth_service.get_current_admin] = lambda: {
+        "id": 1,
+        "roles": Role.admin.value,
+    }
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get("/api/contacts/contacts/stats")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == {"total": 4, "shards": {"0": 4, "1": 0}}
@@ -0,0 +1,156 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.exc import OperationalError
+
+from src.database.timeouts import (
+    REQUESTS_CANCELLED,
+    CancelOnDisconnectMiddleware,
+    _set_local_statement_timeout,
+    is_statement_timeout,
+    route_timeout,
+    statement_timeout_ms,
+)
+from src.services.auth import auth_service
+from src.services.base import settings
+
+
+def connection(dialect: str) -> MagicMock:
+    conn = MagicMock()
+    conn.dialect.name = dialect
+    return conn
+
+
+def test_route_timeout_uses_override_or_default():
+    timeouts = {"GET /api/contacts/contacts/search/": 2000}
+
+    assert route_timeout("GET /api/contacts/contacts/search/", timeouts, 30000) == 2000
+    assert route_timeout("GET /api/contacts/contacts/", timeouts, 30000) == 30000
+
+
+def test_only_overriding_routes_start_transactions_with_set_local():
+    token = statement_timeout_ms.set(2000)
+    try:
+        postgres, sqlite = connection("postgresql"), connection("sqlite")
+        _set_local_statement_timeout(None, None, postgres)
+        _set_local_statement_timeout(None, None, sqlite)
+    finally:
+        statement_timeout_ms.reset(token)
+    outside_request = connection("postgresql")
+    _set_local_statement_timeout(None, None, outside_request)
+    token = statement_timeout_ms.set(settings.DB_STATEMENT_TIMEOUT_MS)
+    try:
+        default_route = connection("postgresql")
+        _set_local_statement_timeout(None, None, default_route)
+    finally:
+        statement_timeout_ms.reset(token)
+
+    postgres.exec_driver_sql.assert_called_once_with(
+        "SET LOCAL statement_timeout = 2000"
+    )
+    sqlite.exec_driver_sql.assert_not_called()
+    outside_request.exec_driver_sql.assert_not_called()
+    default_route.exec_driver_sql.assert_not_called()
+
+
+def test_is_statement_timeout_checks_sqlstate():
+    canceled = OperationalError("SELECT 1", {}, MagicMock(sqlstate="57014"))
+    other = OperationalError("SELECT 1", {}, MagicMock(sqlstate="40001"))
+
+    assert is_statement_timeout(canceled)
+    assert not is_statement_timeout(other)
+    assert not is_statement_timeout(ValueError("57014"))
+
+
+@pytest.mark.asyncio
+async def test_handler_is_cancelled_when_client_disconnects():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await receive()
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    before = REQUESTS_CANCELLED._value.get()
+    middleware = CancelOnDisconnectMiddleware(slow_app)
+    scope = {"type": "http", "method": "GET", "path": "/api/contacts/contacts/search/"}
+    await asyncio.wait_for(middleware(scope, receive, MagicMock()), timeout=5)
+
+    assert cancelled.is_set()
+    assert REQUESTS_CANCELLED._value.get() == before + 1
+
+
+@pytest.mark.asyncio
+async def test_request_bodies_are_read_as_fast_as_the_handler_consumes_them():
+    chunks, reads = 100, 0
+    proceed = asyncio.Event()
+    received = []
+
+    async def receive():
+        nonlocal reads
+        if reads == chunks:
+            await asyncio.Event().wait()
+        reads += 1
+        await asyncio.sleep(0)
+        return {"type": "http.request", "body": b"x", "more_body": reads < chunks}
+
+    async def upload_app(scope, receive, send):
+        received.append(await receive())
+        await proceed.wait()
+        while received[-1]["more_body"]:
+            received.append(await receive())
+
+    middleware = CancelOnDisconnectMiddleware(upload_app)
+    scope = {"type": "http", "method": "POST", "path": "/api/contacts/contacts/import"}
+    call = asyncio.ensure_future(middleware(scope, receive, MagicMock()))
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert reads <= 3
+    proceed.set()
+    await asyncio.wait_for(call, timeout=5)
+    assert len(received) == chunks
+
+
+@pytest.mark.asyncio
+async def test_completed_requests_and_route_timeouts_pass_through(
+    sqlite_session, db_user
+):
+    from src.main import app
+    from src.database.shards import get_shard_db
+
+    seen = []
+
+    async def fake_db():
+        seen.append(statement_timeout_ms.get())
+        yield sqlite_session
+
+    app.dependency_overrides[auth_service.get_current_user] = lambda: db_user
+    app.dependency_overrides[get_shard_db] = fake_db
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            search = await client.get(
+                "/api/contacts/contacts/search/", params={"query": "ann"}
+            )
+            listing = await client.get("/api/contacts/contacts/")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert search.status_code == 200
+    assert listing.status_code == 200
+    assert seen == [2000, 30000]